@@ -0,0 +1,205 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Endpoint benchmark
+------------------
+
+Measures the client side overhead of every API call of :class:`~twitchAPI.twitch.Twitch`: validating the arguments,
+building the request, the header and URL handling and parsing and transforming the response. The responses come from
+a :class:`~twitchAPI.transport.ReplayTransport`, so no network is involved and the results are deterministic enough
+to compare against a baseline.
+
+The responses are recorded from a local :class:`~twitchAPI.mock_server.MockHelixServer` on every run, or loaded from
+:code:`--fixture` if that file exists. A missing fixture file is recorded and saved first. The mock server is also
+used to authenticate the client.
+
+The benchmark fails if an API call of :class:`~twitchAPI.twitch.Twitch` is not covered by :const:`CALLS`.
+
+Usage::
+
+    python benchmarks/endpoint_benchmark.py --iterations 500 --output result.json
+    # fail with exit code 1 if the median overhead of a API call raised by more than 20% against a baseline
+    python benchmarks/endpoint_benchmark.py --baseline result.json --tolerance 0.2
+    # replay a stored fixture with the original response times
+    python benchmarks/endpoint_benchmark.py --fixture fixture.json.gz --speed 1.0
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from twitchAPI.mock_server import MockHelixServer  # noqa: E402
+from twitchAPI.transport import RecordingTransport, ReplayTransport  # noqa: E402
+from twitchAPI.twitch import Twitch  # noqa: E402
+from twitchAPI.types import AnalyticsReportType, AuthScope, SortMethod, TimePeriod, VideoType  # noqa: E402
+
+STARTED_AT = datetime(2020, 8, 1, tzinfo=timezone.utc)
+ENDED_AT = datetime(2020, 8, 20, tzinfo=timezone.utc)
+
+CALLS: List[Tuple[str, dict]] = [
+    ('get_extension_analytics', {'extension_id': 'e1', 'started_at': STARTED_AT, 'ended_at': ENDED_AT,
+                                 'report_type': AnalyticsReportType.V1}),
+    ('get_game_analytics', {'game_id': 'g1', 'first': 5}),
+    ('get_bits_leaderboard', {'count': 5, 'period': TimePeriod.WEEK, 'started_at': STARTED_AT, 'user_id': 'u'}),
+    ('get_extension_transactions', {'extension_id': 'e1', 'first': 20}),
+    ('create_clip', {'broadcaster_id': '10000001', 'has_delay': True}),
+    ('get_clips', {'game_id': '20001', 'first': 20}),
+    ('create_entitlement_grants_upload_url', {'manifest_id': 'm'}),
+    ('get_code_status', {'code': ['A', 'B'], 'user_id': 5}),
+    ('redeem_code', {'code': ['A'], 'user_id': 5}),
+    ('get_top_games', {'first': 20}),
+    ('get_games', {'game_ids': ['20001', '20002'], 'names': ['Game 3']}),
+    ('check_automod_status', {'broadcaster_id': 'b', 'msg_id': 'm', 'msg_text': 't', 'user_id': 'u'}),
+    ('check_automod_status_batch', {'broadcaster_id': 'b',
+                                    'messages': [{'msg_id': '1', 'msg_text': 'a', 'user_id': 'u'}]}),
+    ('get_banned_events', {'broadcaster_id': 'b', 'first': 20}),
+    ('get_banned_users', {'broadcaster_id': 'b'}),
+    ('get_moderators', {'broadcaster_id': 'b'}),
+    ('get_moderator_events', {'broadcaster_id': 'b'}),
+    ('create_stream_marker', {'user_id': 'u', 'description': 'd'}),
+    ('get_streams', {'first': 20, 'language': ['en', 'de']}),
+    ('get_stream_markers', {'user_id': 'u', 'video_id': 'v', 'first': 20}),
+    ('get_broadcaster_subscriptions', {'broadcaster_id': 'b'}),
+    ('get_all_stream_tags', {'first': 20}),
+    ('get_stream_tags', {'broadcaster_id': 'b'}),
+    ('replace_stream_tags', {'broadcaster_id': 'b', 'tag_ids': ['a']}),
+    ('get_users', {'user_ids': ['10000001'], 'logins': ['user_2']}),
+    ('get_users_follows', {'first': 20, 'from_id': '10000001'}),
+    ('update_user', {'description': 'hi'}),
+    ('get_user_extensions', {}),
+    ('get_user_active_extensions', {'user_id': 'u'}),
+    ('update_user_extensions', {'data': {'panel': {}}}),
+    ('get_videos', {'user_id': '10000001', 'first': 20, 'period': TimePeriod.MONTH, 'sort': SortMethod.VIEWS,
+                    'video_type': VideoType.ARCHIVE}),
+    ('get_webhook_subscriptions', {'first': 20}),
+    ('get_channel_information', {'broadcaster_id': '10000001'}),
+    ('modify_channel_information', {'broadcaster_id': 'b', 'game_id': '1', 'title': 't'}),
+    ('search_channels', {'query': 'user', 'first': 20}),
+    ('search_categories', {'query': 'game', 'first': 20}),
+    ('get_stream_key', {'broadcaster_id': 'b'}),
+    ('start_commercial', {'broadcaster_id': 'b', 'length': 60}),
+    ('create_user_follows', {'from_id': 'a', 'to_id': 'b', 'allow_notifications': True}),
+    ('delete_user_follows', {'from_id': 'a', 'to_id': 'b'}),
+    ('get_cheermotes', {'broadcaster_id': 'b'}),
+    ('get_hype_train_events', {'broadcaster_id': 'b', 'first': 20}),
+    ('get_drops_entitlements', {'user_id': '10000001', 'first': 20}),
+]
+
+
+def endpoints() -> List[str]:
+    """all API calls of Twitch, see twitchAPI.endpoint.helix_endpoint"""
+    return sorted(name for name in dir(Twitch) if hasattr(getattr(Twitch, name), 'build'))
+
+
+def percentile(values: List[float], p: float) -> float:
+    if len(values) == 0:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def record(twitch: Twitch) -> RecordingTransport:
+    recorder = RecordingTransport(twitch.transport)
+    twitch.transport = recorder
+    for name, kwargs in CALLS:
+        getattr(twitch, name)(**kwargs)
+    twitch.transport = recorder.transport
+    return recorder
+
+
+def measure(twitch: Twitch, name: str, kwargs: dict, iterations: int) -> dict:
+    call = getattr(twitch, name)
+    # warm up caches of the interpreter and the replay positions
+    for _ in range(min(iterations, 10)):
+        call(**kwargs)
+    totals = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call(**kwargs)
+        totals.append(time.perf_counter() - start)
+    result = {'median_us': percentile(totals, 50) * 1e6, 'p99_us': percentile(totals, 99) * 1e6}
+    if hasattr(getattr(Twitch, name), 'build'):
+        builds = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            twitch.build_request(name, **kwargs)
+            builds.append(time.perf_counter() - start)
+        result['build_us'] = percentile(builds, 50) * 1e6
+    return result
+
+
+def run(args) -> dict:
+    server = MockHelixServer()
+    server.start()
+    try:
+        twitch = Twitch(args.app_id, args.app_secret)
+        twitch.base_url = server.base_url
+        twitch.auth_base_url = server.auth_base_url
+        twitch.authenticate_app(list(AuthScope))
+        access_token, refresh_token = server.issue_token()
+        twitch.set_user_authentication(access_token, list(AuthScope), refresh_token)
+        if args.fixture is not None and os.path.exists(args.fixture):
+            entries = ReplayTransport.load(args.fixture)
+        else:
+            recorder = record(twitch)
+            if args.fixture is not None:
+                recorder.save(args.fixture)
+            entries = recorder.entries
+    finally:
+        server.stop()
+    twitch.transport = ReplayTransport(entries, speed=args.speed)
+    results = {}
+    for name, kwargs in CALLS:
+        results[name] = measure(twitch, name, kwargs, args.iterations)
+    return {'iterations': args.iterations, 'speed': args.speed, 'endpoints': results}
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, base in baseline.get('endpoints', {}).items():
+        current = result['endpoints'].get(name)
+        if current is None:
+            continue
+        if current['median_us'] > base['median_us'] * (1 + tolerance):
+            regressions.append(f'{name}: median {current["median_us"]:.1f}us > {base["median_us"]:.1f}us')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the client side overhead of every API call')
+    parser.add_argument('--iterations', type=int, default=200, help='calls per API call')
+    parser.add_argument('--fixture', default=None,
+                        help='replay responses from this file, it is recorded first if it does not exist')
+    parser.add_argument('--speed', type=float, default=None,
+                        help='replay the recorded response times this many times faster, default is no delay')
+    parser.add_argument('--app-id', default='benchmark')
+    parser.add_argument('--app-secret', default='benchmark')
+    parser.add_argument('--output', default=None, help='write the result as JSON to this file')
+    parser.add_argument('--baseline', default=None, help='compare against this result file')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+    covered = set(name for name, _ in CALLS)
+    missing = [name for name in endpoints() if name not in covered]
+    result = run(args)
+    print(json.dumps(result, indent=2))
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    for name in missing:
+        print('MISSING ' + name)
+    failed = len(missing) > 0
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        failed = failed or len(regressions) > 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
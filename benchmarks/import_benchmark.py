@@ -0,0 +1,117 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Import time benchmark
+---------------------
+
+Imports modules of twitchAPI in fresh interpreters with :code:`python -X importtime` and reports the median cumulative
+import time of each module over multiple runs, together with the heavy dependencies that got loaded on the way.
+
+Plain client use (:code:`twitchAPI`, :code:`twitchAPI.twitch` and :code:`twitchAPI.oauth`) must not load the aiohttp
+web server stack or dateutil and the record sinks (:code:`twitchAPI.sinks` and :code:`twitchAPI.export`) must not load
+pyarrow, the benchmark fails if they do.
+
+Usage::
+
+    python benchmarks/import_benchmark.py --runs 10 --output result.json
+    # fail with exit code 1 if a import got more than 20% slower than in the baseline
+    python benchmarks/import_benchmark.py --baseline result.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import List
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+MODULES = ['twitchAPI', 'twitchAPI.twitch', 'twitchAPI.oauth', 'twitchAPI.webhook', 'twitchAPI.sinks', 'twitchAPI.export']
+"""the modules that are measured"""
+
+HEAVY = ['requests', 'aiohttp', 'aiohttp.web', 'dateutil', 'pyarrow']
+"""dependencies that are reported as loaded or not"""
+
+FORBIDDEN = {
+    'twitchAPI': ['aiohttp', 'dateutil'],
+    'twitchAPI.twitch': ['aiohttp', 'dateutil'],
+    'twitchAPI.oauth': ['aiohttp', 'dateutil'],
+    'twitchAPI.sinks': ['pyarrow'],
+    'twitchAPI.export': ['pyarrow']
+}
+"""dependencies that must not be loaded by importing the module"""
+
+
+def measure(module: str) -> dict:
+    code = f'import sys, json, {module}; print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))'
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True,
+                          text=True, check=True)
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = max(cumulative, int(parts[1].strip()))
+    return {'cumulative_us': cumulative, 'loaded': json.loads(proc.stdout.strip().splitlines()[-1])}
+
+
+def run(runs: int) -> dict:
+    results = {}
+    for module in MODULES:
+        measurements = [measure(module) for _ in range(runs)]
+        results[module] = {
+            'median_ms': statistics.median(m['cumulative_us'] for m in measurements) / 1000,
+            'min_ms': min(m['cumulative_us'] for m in measurements) / 1000,
+            'loaded': measurements[0]['loaded']
+        }
+    return {'python': sys.version.split()[0], 'runs': runs, 'modules': results}
+
+
+def check_forbidden(result: dict) -> List[str]:
+    problems = []
+    for module, forbidden in FORBIDDEN.items():
+        for dependency in result['modules'][module]['loaded']:
+            if dependency in forbidden:
+                problems.append(f'{module} loads {dependency}')
+    return problems
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for module, base in baseline.get('modules', {}).items():
+        current = result['modules'].get(module)
+        if current is None:
+            continue
+        if current['median_ms'] > base['median_ms'] * (1 + tolerance):
+            regressions.append(f'{module}: {current["median_ms"]:.1f}ms > {base["median_ms"]:.1f}ms')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the import time of twitchAPI')
+    parser.add_argument('--runs', type=int, default=10, help='fresh interpreters per module')
+    parser.add_argument('--output', default=None, help='write the result as JSON to this file')
+    parser.add_argument('--baseline', default=None, help='compare against this result file')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+    result = run(args.runs)
+    print(json.dumps(result, indent=2))
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    problems = check_forbidden(result)
+    for problem in problems:
+        print('FORBIDDEN ' + problem)
+    failed = len(problems) > 0
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        failed = failed or len(regressions) > 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
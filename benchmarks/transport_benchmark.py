@@ -0,0 +1,175 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Transport benchmark
+-------------------
+
+Runs the same fan-out workload of :meth:`~twitchAPI.twitch.Twitch.get_users` calls through every available transport
+of :mod:`twitchAPI.transport` against a local :class:`~twitchAPI.mock_server.MockHelixServer` and reports requests per
+second, p50/p99 latency and the amount of connections the mock server saw.
+
+Measured transports:
+
+- :code:`requests`: the default :class:`~twitchAPI.transport.RequestsTransport`
+- :code:`requests-pool`: :class:`~twitchAPI.transport.RequestsTransport` with a connection pool as large as the
+  concurrency
+- :code:`httpx` and :code:`httpx-http2`: :class:`~twitchAPI.transport.HTTPXTransport`, only if httpx is installed
+
+The mock server speaks plain HTTP/1.1, so :code:`httpx-http2` falls back to HTTP/1.1 here and only shows the overhead
+of httpx. Point :code:`--url` at a TLS endpoint that supports HTTP/2 to measure multiplexing.
+
+Usage::
+
+    python benchmarks/transport_benchmark.py --requests 2000 --concurrency 100 --latency 0.02 --output result.json
+    # fail with exit code 1 if the throughput dropped or the p99 latency raised by more than 20% against a baseline
+    python benchmarks/transport_benchmark.py --baseline result.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from twitchAPI.mock_server import MockHelixServer  # noqa: E402
+from twitchAPI.transport import Transport, RequestsTransport, HTTPXTransport  # noqa: E402
+from twitchAPI.twitch import Twitch  # noqa: E402
+
+
+def percentile(values: List[float], p: float) -> float:
+    if len(values) == 0:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def transports(concurrency: int) -> Dict[str, Callable[[Twitch], Optional[Transport]]]:
+    def pooled(twitch: Twitch) -> Transport:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return RequestsTransport(session)
+
+    def httpx(http2: bool) -> Callable[[Twitch], Optional[Transport]]:
+        def create(twitch: Twitch) -> Optional[Transport]:
+            try:
+                return HTTPXTransport(http2=http2, max_connections=concurrency)
+            except RuntimeError:
+                return None
+        return create
+
+    return {
+        'requests': lambda twitch: twitch.transport,
+        'requests-pool': pooled,
+        'httpx': httpx(False),
+        'httpx-http2': httpx(True)
+    }
+
+
+def measure(twitch: Twitch, server: Optional[MockHelixServer], total: int, concurrency: int) -> dict:
+    latencies = []
+
+    def call(i: int):
+        start = time.perf_counter()
+        twitch.get_users(user_ids=[str(10000000 + i % 1000)])
+        latencies.append(time.perf_counter() - start)
+
+    connections = server.stats['connections'] if server is not None else 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(total)))
+    duration = time.perf_counter() - start
+    return {
+        'requests_per_second': total / duration,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'connections': (server.stats['connections'] - connections) if server is not None else None
+    }
+
+
+def run(args) -> dict:
+    server = None
+    if args.url is None:
+        server = MockHelixServer(latency=args.latency)
+        # every transport sends more requests than fit into a rate limit bucket
+        server.ratelimit_limit = 10 ** 9
+        server.start()
+    results = {}
+    try:
+        for name, create in transports(args.concurrency).items():
+            twitch = Twitch(args.app_id, args.app_secret)
+            if server is not None:
+                twitch.base_url = server.base_url
+                twitch.auth_base_url = server.auth_base_url
+            else:
+                twitch.base_url = args.url
+            transport = create(twitch)
+            if transport is None:
+                logging.warning(f'skipping {name}, httpx is not installed')
+                continue
+            twitch.transport = transport
+            twitch.authenticate_app([])
+            # warm up the connections so only the steady state is measured
+            measure(twitch, None, args.concurrency, args.concurrency)
+            results[name] = measure(twitch, server, args.requests, args.concurrency)
+            transport.close()
+    finally:
+        if server is not None:
+            server.stop()
+    return {'requests': args.requests, 'concurrency': args.concurrency, 'latency': args.latency,
+            'transports': results}
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, base in baseline.get('transports', {}).items():
+        current = result['transports'].get(name)
+        if current is None:
+            continue
+        if current['requests_per_second'] < base['requests_per_second'] * (1 - tolerance):
+            regressions.append(f'{name}: requests/s {current["requests_per_second"]:.0f} < '
+                               f'{base["requests_per_second"]:.0f}')
+        if current['p99_ms'] > base['p99_ms'] * (1 + tolerance):
+            regressions.append(f'{name}: p99 {current["p99_ms"]:.2f}ms > {base["p99_ms"]:.2f}ms')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the transports of the twitchAPI client')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per transport')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02, help='response delay of the mock server in seconds')
+    parser.add_argument('--url', default=None, help='Helix base URL to use instead of a local mock server')
+    parser.add_argument('--app-id', default='benchmark')
+    parser.add_argument('--app-secret', default='benchmark')
+    parser.add_argument('--output', default=None, help='write the result as JSON to this file')
+    parser.add_argument('--baseline', default=None, help='compare against this result file')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    # the default pool discards connections above its size, which is part of what is measured
+    logging.getLogger('urllib3.connectionpool').setLevel(logging.ERROR)
+    result = run(args)
+    print(json.dumps(result, indent=2))
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    failed = False
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        failed = len(regressions) > 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
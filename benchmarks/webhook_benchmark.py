@@ -0,0 +1,253 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Webhook load test
+-----------------
+
+Stands up a :class:`~twitchAPI.webhook.TwitchWebHook` on localhost together with a fake Twitch webhook hub, subscribes
+to every topic (running the full challenge handshake) and then floods each route with recorded notification payloads
+at a fixed concurrency.
+
+Reports p50/p99 latency, events per second and memory usage per route. The latency is measured by the load generator,
+so it includes the loopback round trip on top of the time the webhook needs to handle a notification.
+
+Usage::
+
+    python benchmarks/webhook_benchmark.py --requests 5000 --concurrency 50 --output result.json
+    # fail with exit code 1 if the throughput dropped or the p99 latency raised by more than 20% against a baseline
+    python benchmarks/webhook_benchmark.py --baseline result.json --tolerance 0.2
+    # measure with signature verification enabled
+    python benchmarks/webhook_benchmark.py --secret my_secret
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from typing import Dict, List
+
+from aiohttp import web, ClientSession, TCPConnector
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from twitchAPI.webhook import TwitchWebHook  # noqa: E402
+
+PAYLOADS = {
+    '/streams': {'data': [{
+        'id': '0123456789', 'user_id': '5678', 'user_name': 'wjdtkdqhs', 'game_id': '21779',
+        'community_ids': [], 'type': 'live', 'title': 'Best Stream Ever', 'viewer_count': 417,
+        'started_at': '2017-12-01T10:09:45Z', 'language': 'en', 'thumbnail_url': 'https://link/to/thumbnail.jpg'}]},
+    '/users/follows': {'data': [{
+        'from_id': '1336', 'from_name': 'ebi', 'to_id': '1337', 'to_name': 'oliver0823nagy',
+        'followed_at': '2017-08-22T22:55:24Z'}]},
+    '/users/changed': {'data': [{
+        'id': '1234', 'login': 'hiimstreamer', 'display_name': 'HiImStreamer', 'type': '', 'broadcaster_type': '',
+        'description': 'This is a streamer', 'profile_image_url': 'https://link/to/profile.jpg',
+        'offline_image_url': 'https://link/to/offline.jpg', 'view_count': 3}]},
+    '/moderation/moderators/events': {'data': [{
+        'id': '1IVBTnDSUDApiBQW4UBcVTK4hPr', 'event_type': 'moderation.moderator.remove',
+        'event_timestamp': '2019-03-15T18:18:14Z', 'version': '1.0',
+        'event_data': {'broadcaster_id': '198704263', 'broadcaster_name': 'aan22209', 'user_id': '423374343',
+                       'user_name': 'glowillig'}}]},
+    '/moderation/banned/events': {'data': [{
+        'id': '1IPFqAb0p0JncbPSTEPhx8JF1Sa', 'event_type': 'moderation.user.ban',
+        'event_timestamp': '2019-03-13T15:55:14Z', 'version': '1.0',
+        'event_data': {'broadcaster_id': '198704263', 'broadcaster_name': 'aan22209', 'user_id': '424596340',
+                       'user_name': 'quotrok', 'expires_at': ''}}]},
+    '/subscriptions/events': {'data': [{
+        'id': '1mZa2qA4rOdKDtZRzLQhO9mJfm2', 'event_type': 'subscriptions.subscribe',
+        'event_timestamp': '2019-06-04T22:02:43Z', 'version': '1.0',
+        'event_data': {'broadcaster_id': '123', 'broadcaster_name': 'test_user', 'is_gift': False, 'plan_name': '',
+                       'tier': '1000', 'user_id': '155112208', 'user_name': 'emilia'}}]},
+    '/hypetrain/events': {'data': [{
+        'id': '1b0AsbInCHZW2SQFQkCzqN07Ib2', 'event_type': 'hypetrain.progression',
+        'event_timestamp': '2020-04-24T20:07:24Z', 'version': '1.0',
+        'event_data': {'broadcaster_id': '270954519', 'cooldown_end_time': '2020-04-24T20:13:21.003802269Z',
+                       'expires_at': '2020-04-24T20:12:21.003802269Z', 'goal': 1800, 'id': '70f0c7d8-ff60-4c50',
+                       'last_contribution': {'total': 200, 'type': 'BITS', 'user': '134247454'}, 'level': 2,
+                       'started_at': '2020-04-24T20:05:47.30473127Z',
+                       'top_contributions': [{'total': 600, 'type': 'BITS', 'user': '134247450'}],
+                       'total': 600}}]}
+}
+
+
+class FakeHub:
+    """Answers subscription requests like the Twitch hub and runs the challenge handshake against the webhook"""
+
+    def __init__(self, lease_seconds: int = 864000):
+        self.lease_seconds = lease_seconds
+        self.confirmed = 0
+        self.__session = None
+        self.__tasks = []
+
+    async def __handshake(self, callback: str, mode: str, topic: str):
+        challenge = os.urandom(8).hex()
+        params = {'hub.challenge': challenge, 'hub.mode': mode, 'hub.topic': topic,
+                  'hub.lease_seconds': str(self.lease_seconds)}
+        async with self.__session.get(callback, params=params) as response:
+            if await response.text() == challenge:
+                self.confirmed += 1
+
+    async def handle_hub(self, request: 'web.Request'):
+        data = await request.post()
+        self.__tasks.append(asyncio.ensure_future(self.__handshake(data['hub.callback'],
+                                                                   data['hub.mode'],
+                                                                   data['hub.topic'])))
+        return web.Response(status=202)
+
+    async def start(self, port: int) -> 'web.AppRunner':
+        self.__session = ClientSession()
+        app = web.Application()
+        app.add_routes([web.post('/webhooks/hub', self.handle_hub)])
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, 'localhost', port).start()
+        return runner
+
+    async def stop(self, runner: 'web.AppRunner'):
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        await self.__session.close()
+        await runner.cleanup()
+
+
+def percentile(values: List[float], p: float) -> float:
+    if len(values) == 0:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+
+async def flood(url: str, body: bytes, headers: dict, total: int, concurrency: int) -> Dict[str, float]:
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async def worker(session: ClientSession):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            async with session.post(url, data=body, headers=headers) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    async with ClientSession(connector=TCPConnector(limit=concurrency)) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(session) for _ in range(concurrency)])
+        duration = time.perf_counter() - start
+    return {
+        'requests': total,
+        'errors': errors,
+        'events_per_second': total / duration,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+
+async def run(args) -> dict:
+    hook_url = f'http://localhost:{args.port}'
+    received = {'count': 0}
+
+    def callback(uuid, data):
+        received['count'] += 1
+
+    hub = FakeHub()
+    hub_runner = await hub.start(args.hub_port)
+    hook = TwitchWebHook(hook_url, 'benchmark', args.port)
+    hook.hub_url = f'http://localhost:{args.hub_port}/webhooks/hub'
+    hook.secret = args.secret
+    hook.auto_renew_subscription = False
+    hook.unsubscribe_on_stop = False
+    await hook.start_async()
+    loop = asyncio.get_event_loop()
+    # subscribing blocks till the handshake is done, so it has to run outside of the event loop
+    subscriptions = {
+        '/streams': lambda: hook.subscribe_stream_changed('5678', callback),
+        '/users/follows': lambda: hook.subscribe_user_follow(None, '1337', callback),
+        '/users/changed': lambda: hook.subscribe_user_changed('1234', callback),
+        '/moderation/moderators/events': lambda: hook.subscribe_moderator_change_events('198704263', None,
+                                                                                       callback),
+        '/moderation/banned/events': lambda: hook.subscribe_channel_ban_change_events('198704263', None, callback),
+        '/subscriptions/events': lambda: hook.subscribe_subscription_events('123', callback),
+        '/hypetrain/events': lambda: hook.subscribe_hype_train_events('270954519', callback)
+    }
+    results = {}
+    try:
+        for path, subscribe in subscriptions.items():
+            success, uuid = await loop.run_in_executor(None, subscribe)
+            if not success:
+                raise RuntimeError(f'subscription handshake for {path} failed')
+            body = json.dumps(PAYLOADS[path]).encode('utf-8')
+            headers = {'Content-Type': 'application/json'}
+            if args.secret is not None:
+                headers['X-Hub-Signature'] = 'sha256=' + hmac.new(args.secret.encode('utf-8'),
+                                                                  body,
+                                                                  hashlib.sha256).hexdigest()
+            results[path] = await flood(f'{hook_url}{path}?uuid={uuid}', body, headers, args.requests,
+                                        args.concurrency)
+            logging.info(f'{path}: {results[path]}')
+    finally:
+        await hook.stop_async()
+        await hub.stop(hub_runner)
+    total_requests = sum(r['requests'] for r in results.values())
+    return {
+        'routes': results,
+        'handshakes': hub.confirmed,
+        'events_received': received['count'],
+        'events_expected': total_requests,
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'signed': args.secret is not None
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for path, base in baseline.get('routes', {}).items():
+        current = result['routes'].get(path)
+        if current is None:
+            continue
+        if current['events_per_second'] < base['events_per_second'] * (1 - tolerance):
+            regressions.append(f'{path}: events/s {current["events_per_second"]:.0f} < '
+                               f'{base["events_per_second"]:.0f}')
+        if current['p99_ms'] > base['p99_ms'] * (1 + tolerance):
+            regressions.append(f'{path}: p99 {current["p99_ms"]:.2f}ms > {base["p99_ms"]:.2f}ms')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the twitchAPI webhook')
+    parser.add_argument('--requests', type=int, default=2000, help='notifications per route')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--hub-port', type=int, default=18081)
+    parser.add_argument('--secret', default=None, help='sign notifications and verify them in the webhook')
+    parser.add_argument('--output', default=None, help='write the result as JSON to this file')
+    parser.add_argument('--baseline', default=None, help='compare against this result file')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    result = asyncio.get_event_loop().run_until_complete(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    failed = result['events_received'] != result['events_expected']
+    if failed:
+        print(f'only {result["events_received"]} of {result["events_expected"]} events reached the callbacks')
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        failed = failed or len(regressions) > 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -27,5 +27,9 @@ setup(
         "twitchAPI": ["*.html"],
         "twitchAPI.res": ["*.html"]
     },
-    install_requires=['requests', 'python-dateutil', 'aiohttp']
+    install_requires=['requests', 'python-dateutil', 'aiohttp'],
+    extras_require={
+        'parquet': ['pyarrow'],
+        'http2': ['httpx[http2]']
+    }
 )
@@ -1,4 +1,25 @@
-from twitchAPI.twitch import Twitch
-from twitchAPI.webhook import TwitchWebHook
-from twitchAPI.oauth import UserAuthenticator, refresh_access_token
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
 import twitchAPI.types
+
+__all__ = ['Twitch', 'TwitchWebHook', 'UserAuthenticator', 'refresh_access_token']
+
+# the classes are only imported on first access, so using the client does not load the aiohttp web server stack
+_LAZY = {
+    'Twitch': 'twitchAPI.twitch',
+    'TwitchWebHook': 'twitchAPI.webhook',
+    'UserAuthenticator': 'twitchAPI.oauth',
+    'refresh_access_token': 'twitchAPI.oauth'
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    import importlib
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
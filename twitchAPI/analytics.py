@@ -0,0 +1,258 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Analytics Reports
+-----------------
+
+:meth:`~twitchAPI.twitch.Twitch.get_game_analytics` and :meth:`~twitchAPI.twitch.Twitch.get_extension_analytics`
+only return a URL to a CSV report that is valid for 5 minutes.
+
+:class:`AnalyticsReportFetcher` resolves that URL and streams the report through the
+:attr:`~twitchAPI.twitch.Twitch.session` of the client. The rows are parsed while the report is downloaded, so only a
+small chunk of the file is held in memory at any time. The URL of a report is only requested right before its
+download starts, so it can not expire while waiting for other downloads.
+
+Every row is returned as dict of column name to value. Empty values become None, numbers are parsed as int or float
+and the values of columns containing :code:`Date` are parsed as :class:`~datetime.datetime`, see
+:func:`parse_report_value`. Set
+:attr:`~AnalyticsReportFetcher.converters` to change the parsing of single columns.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.analytics import AnalyticsReportFetcher
+    from twitchAPI.sinks import JSONLSink
+
+    fetcher = AnalyticsReportFetcher(twitch)
+    for row in fetcher.iter_game_report('493057'):
+        print(row['Date'], row['Live Views'])
+
+    # download the reports of multiple games at once, each into its own file
+    rows = fetcher.fetch_game_reports(['493057', '33214'], lambda game_id: JSONLSink(f'{game_id}.jsonl'))
+
+********************
+Class Documentation:
+********************
+"""
+
+import codecs
+import csv
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import requests
+from dateutil import parser as du_parser
+
+from .sinks import RecordSink
+from .twitch import Twitch
+from .types import AnalyticsReportType, TwitchAPIException
+
+_INT = re.compile(r'^-?\d+$')
+_FLOAT = re.compile(r'^-?\d*\.\d+$')
+
+
+def parse_report_value(column: str, value: str) -> Any:
+    """Parses a value of a analytics report to its type
+
+    :param str column: name of the column
+    :param str value: the raw value
+    :return: None for empty values, the unchanged value for columns containing :code:`ID`, a
+            :class:`~datetime.datetime` for columns containing :code:`Date`, a int or float for numbers and otherwise
+            the unchanged value
+    """
+    if value == '':
+        return None
+    if 'ID' in column:
+        return value
+    if 'Date' in column:
+        try:
+            # a lot faster than the dateutil parser for the common case
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+        try:
+            return du_parser.parse(value)
+        except (ValueError, OverflowError):
+            return value
+    if _INT.match(value):
+        return int(value)
+    if _FLOAT.match(value):
+        return float(value)
+    return value
+
+
+class AnalyticsReportFetcher:
+    """Downloads and parses analytics reports
+
+    :param ~twitchAPI.twitch.Twitch twitch: a instance of :class:`~twitchAPI.twitch.Twitch` with user authentication
+            and the scope :const:`~twitchAPI.types.AuthScope.ANALYTICS_READ_GAMES` or
+            :const:`~twitchAPI.types.AuthScope.ANALYTICS_READ_EXTENSION`
+    :var int chunk_size: size of the chunks the report is downloaded in, in bytes |default| :code:`65536`
+    :var int max_workers: the maximum amount of concurrent downloads |default| :code:`4`
+    :var dict converters: dict of column name to a function parsing the raw values of that column, overrides
+            :func:`parse_report_value` |default| :code:`{}`
+    """
+
+    def __init__(self, twitch: Twitch):
+        self.twitch = twitch
+        self.chunk_size: int = 65536
+        self.max_workers: int = 4
+        self.converters: Dict[str, Callable[[str], Any]] = {}
+
+    def __iter_lines(self, response: requests.Response) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        rest = ''
+        for chunk in response.iter_content(self.chunk_size):
+            lines = (rest + decoder.decode(chunk)).split('\n')
+            # the last line might not be complete yet
+            rest = lines.pop()
+            for line in lines:
+                yield line + '\n'
+        rest += decoder.decode(b'', final=True)
+        if len(rest) > 0:
+            yield rest
+
+    def iter_report(self, url: str) -> Iterator[dict]:
+        """Downloads the report at the given URL and yields its rows while downloading
+
+        :param str url: the URL of the report
+        :rtype: Iterator[dict]
+        :raises ~twitchAPI.types.TwitchAPIException: if the download failed
+        """
+        with self.twitch.session.get(url, stream=True) as response:
+            if response.status_code != 200:
+                raise TwitchAPIException(f'downloading the report failed with status {response.status_code}')
+            reader = csv.reader(self.__iter_lines(response))
+            header = next(reader, None)
+            if header is None:
+                return
+            parsers = [self.converters.get(column) for column in header]
+            for row in reader:
+                yield {column: (parser(value) if parser is not None else parse_report_value(column, value))
+                       for column, parser, value in zip(header, parsers, row)}
+
+    @staticmethod
+    def __report_url(data: dict) -> str:
+        if len(data.get('data', [])) == 0:
+            raise TwitchAPIException(f'no report available: {data}')
+        return data['data'][0]['URL']
+
+    def iter_game_report(self,
+                         game_id: str,
+                         started_at: Optional[datetime] = None,
+                         ended_at: Optional[datetime] = None,
+                         report_type: Optional[AnalyticsReportType] = None) -> Iterator[dict]:
+        """Resolves the URL of the report of a game and yields its rows while downloading,
+        see :meth:`~twitchAPI.twitch.Twitch.get_game_analytics`
+
+        :param str game_id: the game id
+        :param ~datetime.datetime started_at: start of the reporting window |default| :code:`None`
+        :param ~datetime.datetime ended_at: end of the reporting window |default| :code:`None`
+        :param ~twitchAPI.types.AnalyticsReportType report_type: type of the report |default| :code:`None`
+        :rtype: Iterator[dict]
+        :raises ~twitchAPI.types.TwitchAPIException: if no report is available or the download failed
+        """
+        data = self.twitch.get_game_analytics(game_id=game_id, started_at=started_at, ended_at=ended_at,
+                                              report_type=report_type)
+        return self.iter_report(self.__report_url(data))
+
+    def iter_extension_report(self,
+                              extension_id: str,
+                              started_at: Optional[datetime] = None,
+                              ended_at: Optional[datetime] = None,
+                              report_type: Optional[AnalyticsReportType] = None) -> Iterator[dict]:
+        """Resolves the URL of the report of a extension and yields its rows while downloading,
+        see :meth:`~twitchAPI.twitch.Twitch.get_extension_analytics`
+
+        :param str extension_id: the extension id
+        :param ~datetime.datetime started_at: start of the reporting window |default| :code:`None`
+        :param ~datetime.datetime ended_at: end of the reporting window |default| :code:`None`
+        :param ~twitchAPI.types.AnalyticsReportType report_type: type of the report |default| :code:`None`
+        :rtype: Iterator[dict]
+        :raises ~twitchAPI.types.TwitchAPIException: if no report is available or the download failed
+        """
+        data = self.twitch.get_extension_analytics(extension_id=extension_id, started_at=started_at,
+                                                   ended_at=ended_at, report_type=report_type)
+        return self.iter_report(self.__report_url(data))
+
+    def __fetch_into(self, rows: Iterator[dict], sink: RecordSink) -> int:
+        count = 0
+        batch = []
+        try:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= 1000:
+                    sink.write(batch)
+                    count += len(batch)
+                    batch = []
+            sink.write(batch)
+            count += len(batch)
+        finally:
+            sink.close()
+        return count
+
+    def __fetch_many(self,
+                     ids: List[str],
+                     iter_func: Callable[..., Iterator[dict]],
+                     sink_factory: Callable[[str], RecordSink],
+                     kwargs: dict) -> Dict[str, int]:
+        result = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # the sink is only created once the download starts
+            futures = {i: executor.submit(lambda i: self.__fetch_into(iter_func(i, **kwargs), sink_factory(i)), i)
+                       for i in ids}
+            for i, future in futures.items():
+                try:
+                    result[i] = future.result()
+                except Exception:
+                    logging.exception(f'fetching the analytics report of {i} failed')
+        return result
+
+    def fetch_game_reports(self,
+                           game_ids: List[str],
+                           sink_factory: Callable[[str], RecordSink],
+                           started_at: Optional[datetime] = None,
+                           ended_at: Optional[datetime] = None,
+                           report_type: Optional[AnalyticsReportType] = None) -> Dict[str, int]:
+        """Downloads the reports of multiple games concurrently, each into its own sink
+
+        Failed downloads are logged and missing in the result.
+
+        :param list[str] game_ids: the game ids
+        :param sink_factory: function called with the game id that returns the sink for that report, the sink is
+                closed once the report is downloaded
+        :param ~datetime.datetime started_at: start of the reporting window |default| :code:`None`
+        :param ~datetime.datetime ended_at: end of the reporting window |default| :code:`None`
+        :param ~twitchAPI.types.AnalyticsReportType report_type: type of the report |default| :code:`None`
+        :return: dict of game id to the amount of rows
+        :rtype: dict[str, int]
+        """
+        return self.__fetch_many(game_ids, self.iter_game_report, sink_factory,
+                                 {'started_at': started_at, 'ended_at': ended_at, 'report_type': report_type})
+
+    def fetch_extension_reports(self,
+                                extension_ids: List[str],
+                                sink_factory: Callable[[str], RecordSink],
+                                started_at: Optional[datetime] = None,
+                                ended_at: Optional[datetime] = None,
+                                report_type: Optional[AnalyticsReportType] = None) -> Dict[str, int]:
+        """Downloads the reports of multiple extensions concurrently, each into its own sink
+
+        Failed downloads are logged and missing in the result.
+
+        :param list[str] extension_ids: the extension ids
+        :param sink_factory: function called with the extension id that returns the sink for that report, the sink is
+                closed once the report is downloaded
+        :param ~datetime.datetime started_at: start of the reporting window |default| :code:`None`
+        :param ~datetime.datetime ended_at: end of the reporting window |default| :code:`None`
+        :param ~twitchAPI.types.AnalyticsReportType report_type: type of the report |default| :code:`None`
+        :return: dict of extension id to the amount of rows
+        :rtype: dict[str, int]
+        """
+        return self.__fetch_many(extension_ids, self.iter_extension_report, sink_factory,
+                                 {'started_at': started_at, 'ended_at': ended_at, 'report_type': report_type})
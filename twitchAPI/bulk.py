@@ -0,0 +1,347 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Bulk Operations
+---------------
+
+Helpers for endpoints that accept multiple items per request. They split any amount of items into the largest
+allowed requests and send them concurrently.
+
+*************
+AutoMod Check
+*************
+
+:func:`check_automod_status_bulk` checks any amount of messages with requests of up to
+:const:`~twitchAPI.twitch.AUTOMOD_BATCH_SIZE` messages.
+
+:class:`AutoModBatcher` is meant for a stream of incoming chat messages: every submitted message is held back for at
+most :code:`window` seconds to be checked together with the messages that arrive in the meantime.
+
+.. code-block:: python
+
+    from twitchAPI.bulk import check_automod_status_bulk, AutoModBatcher
+
+    messages = [{'msg_id': '1', 'msg_text': 'hello', 'user_id': '1234'},
+                {'msg_id': '2', 'msg_text': 'world', 'user_id': '5678'}]
+    # dict of msg_id to is_permitted
+    permitted = check_automod_status_bulk(twitch, broadcaster_id, messages)
+
+    batcher = AutoModBatcher(twitch, broadcaster_id, window=0.2)
+    batcher.start()
+    future = batcher.submit('3', 'some message', '1234')
+    # blocks till the batch containing the message was checked
+    print(future.result())
+    batcher.stop()
+
+**********
+Bits Codes
+**********
+
+:func:`get_code_status_bulk` and :func:`redeem_code_bulk` process any amount of codes with requests of up to
+:const:`~twitchAPI.twitch.CODE_BATCH_SIZE` codes. They follow the rate limit of the client with a
+:class:`~twitchAPI.helper.RateLimitTracker`: requests wait while the bucket is empty and requests that got a 429
+response are sent again once the bucket is refilled.
+
+Pass a :class:`~twitchAPI.storage.CheckpointStore` to :func:`redeem_code_bulk` to make a interrupted run resumable:
+the status of every processed code is stored and codes with a stored status are not submitted again.
+
+.. code-block:: python
+
+    from twitchAPI.bulk import redeem_code_bulk
+    from twitchAPI.storage import SQLiteCheckpointStore
+
+    def progress(done, total):
+        print(f'{done}/{total}')
+
+    statuses = redeem_code_bulk(twitch, codes, user_id,
+                                checkpoint_store=SQLiteCheckpointStore('redeem.db'),
+                                progress=progress)
+
+********************
+Class Documentation:
+********************
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .helper import RateLimitTracker
+from .storage import CheckpointStore
+from .twitch import Twitch, AUTOMOD_BATCH_SIZE, CODE_BATCH_SIZE
+from .types import CodeStatus, TwitchAPIException
+
+
+def _chunks(items: list, size: int) -> List[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _automod_results(data: dict) -> Dict[str, bool]:
+    if 'data' not in data:
+        raise TwitchAPIException(f'invalid response while checking AutoMod status: {data}')
+    return {d['msg_id']: d['is_permitted'] for d in data['data']}
+
+
+def check_automod_status_bulk(twitch: Twitch,
+                              broadcaster_id: str,
+                              messages: List[dict],
+                              max_workers: int = 4) -> Dict[str, bool]:
+    """Checks any amount of messages against the AutoMod of the channel, see
+    :meth:`~twitchAPI.twitch.Twitch.check_automod_status_batch`
+
+    The messages are split into requests of :const:`~twitchAPI.twitch.AUTOMOD_BATCH_SIZE` which are sent concurrently.
+
+    :param ~twitchAPI.twitch.Twitch twitch: a instance of :class:`~twitchAPI.twitch.Twitch` with user authentication
+            and the scope :const:`~twitchAPI.types.AuthScope.MODERATION_READ`
+    :param str broadcaster_id: Provided broadcaster ID must match the user ID in the user auth token.
+    :param list[dict] messages: List of messages, each a dict with the keys :code:`msg_id`, :code:`msg_text` and
+            :code:`user_id`. The msg_id has to be unique.
+    :param int max_workers: the maximum amount of concurrent requests |default| :code:`4`
+    :return: dict of msg_id to is_permitted
+    :rtype: dict[str, bool]
+    :raises ~twitchAPI.types.TwitchAPIException: if a request returned a invalid response
+    """
+    if len(messages) == 0:
+        return {}
+    result = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        responses = executor.map(lambda batch: twitch.check_automod_status_batch(broadcaster_id, batch),
+                                 _chunks(messages, AUTOMOD_BATCH_SIZE))
+        for data in responses:
+            result.update(_automod_results(data))
+    return result
+
+
+class AutoModBatcher:
+    """Collects single messages and checks them in batches against the AutoMod of the channel.
+
+    A batch is sent once its oldest message waited for :code:`window` seconds or it reached
+    :const:`~twitchAPI.twitch.AUTOMOD_BATCH_SIZE` messages, up to :code:`max_workers` batches are sent concurrently.
+
+    :param ~twitchAPI.twitch.Twitch twitch: a instance of :class:`~twitchAPI.twitch.Twitch` with user authentication
+            and the scope :const:`~twitchAPI.types.AuthScope.MODERATION_READ`
+    :param str broadcaster_id: Provided broadcaster ID must match the user ID in the user auth token.
+    :param float window: the maximum time in seconds a message is held back |default| :code:`0.1`
+    :var int max_workers: the maximum amount of concurrent requests, only applied on start |default| :code:`4`
+    """
+
+    def __init__(self, twitch: Twitch, broadcaster_id: str, window: float = 0.1):
+        self.twitch = twitch
+        self.broadcaster_id = broadcaster_id
+        self.window = window
+        self.max_workers: int = 4
+        self.__cond = threading.Condition()
+        # message, future and time of submission
+        self.__pending: List[Tuple[dict, Future, float]] = []
+        self.__running = False
+        self.__thread: Optional[threading.Thread] = None
+        self.__executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, msg_id: str, msg_text: str, user_id: str) -> Future:
+        """Queues a message to be checked
+
+        :param str msg_id: Developer-generated identifier for mapping messages to results, has to be unique.
+        :param str msg_text: Message text.
+        :param str user_id: User ID of the sender.
+        :return: future that resolves to is_permitted or the exception raised while checking the batch
+        :rtype: ~concurrent.futures.Future
+        :raises RuntimeError: if the batcher is not running
+        """
+        future = Future()
+        with self.__cond:
+            if not self.__running:
+                raise RuntimeError('batcher is not running')
+            self.__pending.append(({'msg_id': msg_id, 'msg_text': msg_text, 'user_id': user_id},
+                                   future,
+                                   time.monotonic()))
+            self.__cond.notify()
+        return future
+
+    def __send(self, batch: List[Tuple[dict, Future]]):
+        try:
+            results = _automod_results(self.twitch.check_automod_status_batch(self.broadcaster_id,
+                                                                              [m for m, _ in batch]))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for message, future in batch:
+            if message['msg_id'] in results:
+                future.set_result(results[message['msg_id']])
+            else:
+                future.set_exception(TwitchAPIException(f'no result for message {message["msg_id"]}'))
+
+    def __run(self):
+        while True:
+            with self.__cond:
+                while self.__running:
+                    if len(self.__pending) >= AUTOMOD_BATCH_SIZE:
+                        break
+                    if len(self.__pending) == 0:
+                        self.__cond.wait()
+                        continue
+                    remaining = self.__pending[0][2] + self.window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.__cond.wait(remaining)
+                if len(self.__pending) == 0:
+                    # only reached once stopped
+                    return
+                batch = [(message, future) for message, future, _ in self.__pending[:AUTOMOD_BATCH_SIZE]]
+                self.__pending = self.__pending[AUTOMOD_BATCH_SIZE:]
+            self.__executor.submit(self.__send, batch)
+
+    def start(self) -> None:
+        """Starts sending batches in its own thread
+
+        :rtype: None
+        :raises RuntimeError: if the batcher is already running
+        """
+        with self.__cond:
+            if self.__running:
+                raise RuntimeError('batcher is already running')
+            self.__running = True
+        self.__executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Sends all queued messages, waits for their results and stops the batcher
+
+        :rtype: None
+        """
+        with self.__cond:
+            self.__running = False
+            self.__cond.notify()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+
+
+def _process_codes(twitch: Twitch,
+                   func: Callable[[List[str], int], dict],
+                   codes: List[str],
+                   user_id: int,
+                   max_workers: int,
+                   checkpoint_store: Optional[CheckpointStore],
+                   checkpoint_prefix: str,
+                   progress: Optional[Callable[[int, int], None]]) -> Dict[str, CodeStatus]:
+    codes = list(dict.fromkeys(codes))
+    result: Dict[str, CodeStatus] = {}
+    todo = []
+    for code in codes:
+        checkpoint = None if checkpoint_store is None else checkpoint_store.get(f'{checkpoint_prefix}:{user_id}:{code}')
+        if checkpoint is not None:
+            result[code] = CodeStatus(checkpoint['status'])
+        else:
+            todo.append(code)
+    if progress is not None:
+        progress(len(result), len(codes))
+
+    def record(data: dict) -> None:
+        if 'data' not in data:
+            raise TwitchAPIException(f'invalid response while processing codes: {data}')
+        for entry in data['data']:
+            result[entry['code']] = entry['status']
+            # codes that failed on the side of Twitch should be tried again on the next run
+            if checkpoint_store is not None and entry['status'] != CodeStatus.INTERNAL_ERROR:
+                checkpoint_store.save(f'{checkpoint_prefix}:{user_id}:{entry["code"]}',
+                                      {'status': entry['status'].value})
+        if progress is not None:
+            progress(len(result), len(codes))
+
+    tracker = RateLimitTracker(twitch)
+    stop = threading.Event()
+
+    def send(chunk: List[str]) -> Optional[dict]:
+        while tracker.acquire(stop):
+            data = func(chunk, user_id)
+            # a 429 is returned unless the client waits on the rate limit itself, try again once the bucket is refilled
+            if data.get('status') != 429:
+                return data
+        return None
+
+    tracker.start()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(send, chunk) for chunk in _chunks(todo, CODE_BATCH_SIZE)]
+            recorded = set()
+            try:
+                for future in as_completed(futures):
+                    recorded.add(future)
+                    record(future.result())
+            except BaseException:
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                # requests that are already running still get processed by Twitch, store their results before giving up
+                wait(futures)
+                for future in futures:
+                    if future in recorded or future.cancelled() or future.exception() is not None \
+                            or future.result() is None:
+                        continue
+                    try:
+                        record(future.result())
+                    except Exception:
+                        logging.exception('storing the result of a finished request failed')
+                raise
+    finally:
+        tracker.stop()
+    return result
+
+
+def get_code_status_bulk(twitch: Twitch,
+                         codes: List[str],
+                         user_id: int,
+                         max_workers: int = 4,
+                         progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, CodeStatus]:
+    """Gets the status of any amount of Bits codes, see :meth:`~twitchAPI.twitch.Twitch.get_code_status`
+
+    The codes are split into requests of :const:`~twitchAPI.twitch.CODE_BATCH_SIZE` which are sent concurrently.
+
+    :param ~twitchAPI.twitch.Twitch twitch: a app authenticated instance of :class:`~twitchAPI.twitch.Twitch`
+    :param list[str] codes: the codes
+    :param int user_id: Represents the numeric Twitch user ID of the account which is going to receive the
+            entitlement associated with the codes.
+    :param int max_workers: the maximum amount of concurrent requests |default| :code:`4`
+    :param progress: function called with the amount of processed codes and the total amount of codes after every
+            request |default| :code:`None`
+    :return: dict of code to status
+    :rtype: dict[str, ~twitchAPI.types.CodeStatus]
+    :raises ~twitchAPI.types.TwitchAPIException: if a request returned a invalid response
+    """
+    return _process_codes(twitch, twitch.get_code_status, codes, user_id, max_workers, None, 'code_status', progress)
+
+
+def redeem_code_bulk(twitch: Twitch,
+                     codes: List[str],
+                     user_id: int,
+                     max_workers: int = 4,
+                     checkpoint_store: Optional[CheckpointStore] = None,
+                     progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, CodeStatus]:
+    """Redeems any amount of Bits codes, see :meth:`~twitchAPI.twitch.Twitch.redeem_code`
+
+    The codes are split into requests of :const:`~twitchAPI.twitch.CODE_BATCH_SIZE` which are sent concurrently.
+    If a request fails, the remaining requests are cancelled, the results of the already running ones are stored and the
+    exception is raised. With a checkpoint store,
+    calling this again with the same codes only submits the codes that were not processed yet, except the ones with
+    the status :const:`~twitchAPI.types.CodeStatus.INTERNAL_ERROR`.
+
+    :param ~twitchAPI.twitch.Twitch twitch: a app authenticated instance of :class:`~twitchAPI.twitch.Twitch`
+    :param list[str] codes: the codes
+    :param int user_id: Represents the numeric Twitch user ID of the account which is going to receive the
+            entitlement associated with the codes.
+    :param int max_workers: the maximum amount of concurrent requests |default| :code:`4`
+    :param ~twitchAPI.storage.CheckpointStore checkpoint_store: stores the status of every processed code, use a
+            :class:`~twitchAPI.storage.SQLiteCheckpointStore` for large amounts of codes |default| :code:`None`
+    :param progress: function called with the amount of processed codes and the total amount of codes after every
+            request |default| :code:`None`
+    :return: dict of code to status, including the stored status of codes processed in earlier runs
+    :rtype: dict[str, ~twitchAPI.types.CodeStatus]
+    :raises ~twitchAPI.types.TwitchAPIException: if a request returned a invalid response
+    """
+    return _process_codes(twitch, twitch.redeem_code, codes, user_id, max_workers, checkpoint_store, 'redeem', progress)
@@ -0,0 +1,244 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Clip and Video Catalog
+----------------------
+
+:class:`CatalogIndexer` enumerates all clips and videos of a game or broadcaster and writes every one of them once to
+a :class:`~twitchAPI.sinks.RecordSink`.
+
+*****
+Clips
+*****
+
+Twitch only lets you page through a limited amount of clips per query. :meth:`~CatalogIndexer.crawl_clips` therefore
+splits the requested time range into windows of :attr:`~CatalogIndexer.initial_window` and pages through them
+concurrently. A window that returns :attr:`~CatalogIndexer.saturation_limit` clips is considered saturated and is
+split in halves that are crawled again, down to :attr:`~CatalogIndexer.min_window`.
+
+Once a range was crawled, its end is stored in a :class:`~twitchAPI.storage.CheckpointStore`. Calling
+:meth:`~CatalogIndexer.crawl_clips` without :code:`started_at` later only crawls the window since then, plus
+:attr:`~CatalogIndexer.refresh_overlap` for clips that show up late.
+
+******
+Videos
+******
+
+:meth:`~twitchAPI.twitch.Twitch.get_videos` can not be filtered by time, :meth:`~CatalogIndexer.crawl_videos` pages
+through the videos sorted by time instead. After the first complete crawl, later crawls stop at the first page that
+contains no new video.
+
+*****
+Index
+*****
+
+The ids of all written clips and videos are kept in a :class:`~twitchAPI.storage.DeliveryDeduplicator`. Use a
+:class:`~twitchAPI.storage.SQLiteDeduplicator` without ttl for large catalogs or to keep the index between runs.
+
+Ids are only added to the index after their clips or videos were flushed to the sink, so a failed crawl might write
+some of them again but never loses one.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from datetime import datetime, timedelta, timezone
+    from twitchAPI.catalog import CatalogIndexer
+    from twitchAPI.sinks import JSONLSink
+    from twitchAPI.storage import SQLiteCheckpointStore, SQLiteDeduplicator
+
+    with JSONLSink('clips.jsonl') as sink:
+        indexer = CatalogIndexer(twitch, sink,
+                                 index=SQLiteDeduplicator('catalog.db', ttl=None),
+                                 checkpoint_store=SQLiteCheckpointStore('catalog.db'))
+        # the first crawl needs a start
+        indexer.crawl_clips(game_id='33214', started_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+        # later on, only the clips since the last crawl are fetched
+        indexer.crawl_clips(game_id='33214')
+
+********************
+Class Documentation:
+********************
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set, Tuple
+
+from .helper import iterate_pages
+from .sinks import RecordSink
+from .storage import CheckpointStore, DeliveryDeduplicator, MemoryCheckpointStore, MemoryDeduplicator
+from .twitch import Twitch
+from .types import SortMethod
+
+
+class CatalogIndexer:
+    """Crawls the clips and videos of games and broadcasters
+
+    :param ~twitchAPI.twitch.Twitch twitch: a app authenticated instance of :class:`~twitchAPI.twitch.Twitch`
+    :param ~twitchAPI.sinks.RecordSink sink: the sink the clips and videos get written to
+    :param ~twitchAPI.storage.DeliveryDeduplicator index: remembers the ids of the written clips and videos,
+            |default| :class:`~twitchAPI.storage.MemoryDeduplicator` without size limit
+    :param ~twitchAPI.storage.CheckpointStore checkpoint_store: stores the end of the last crawl,
+            |default| :class:`~twitchAPI.storage.MemoryCheckpointStore`
+    :var ~datetime.timedelta initial_window: length of the windows the time range is split into first
+            |default| :code:`1 day`
+    :var ~datetime.timedelta min_window: windows are not split below this length |default| :code:`1 minute`
+    :var int saturation_limit: amount of clips after which a window is considered saturated |default| :code:`1000`
+    :var ~datetime.timedelta refresh_overlap: how far before the end of the last crawl a refresh starts
+            |default| :code:`1 hour`
+    :var int max_workers: the amount of windows that are crawled at the same time |default| :code:`4`
+    """
+
+    def __init__(self,
+                 twitch: Twitch,
+                 sink: RecordSink,
+                 index: Optional[DeliveryDeduplicator] = None,
+                 checkpoint_store: Optional[CheckpointStore] = None):
+        self.twitch = twitch
+        self.sink = sink
+        self.index = index if index is not None else MemoryDeduplicator(max_size=None)
+        self.checkpoint_store = checkpoint_store if checkpoint_store is not None else MemoryCheckpointStore()
+        self.initial_window: timedelta = timedelta(days=1)
+        self.min_window: timedelta = timedelta(minutes=1)
+        self.saturation_limit: int = 1000
+        self.refresh_overlap: timedelta = timedelta(hours=1)
+        self.max_workers: int = 4
+        self.__pending: Set[str] = set()
+        self.__pending_lock = threading.Lock()
+
+    def __write_new(self, records: List[dict], written_ids: List[str]) -> int:
+        """writes the records that are not in the index yet and adds their ids to written_ids, see __commit"""
+        by_id = {r['id']: r for r in records}
+        # records that an other window is writing right now are not in the index yet
+        with self.__pending_lock:
+            new_ids = [i for i in self.index.find_new(list(by_id.keys())) if i not in self.__pending]
+            self.__pending.update(new_ids)
+        written_ids.extend(new_ids)
+        self.sink.write([by_id[i] for i in new_ids])
+        return len(new_ids)
+
+    def __commit(self, written_ids: List[str], success: bool) -> None:
+        """adds the written ids to the index once they are flushed, a crash before would lose them otherwise"""
+        try:
+            if success:
+                self.sink.flush()
+                self.index.mark_seen(written_ids)
+        finally:
+            with self.__pending_lock:
+                self.__pending.difference_update(written_ids)
+
+    def __crawl_window(self,
+                       owner: dict,
+                       window: Tuple[datetime, datetime]) -> Tuple[int, List[Tuple[datetime, datetime]]]:
+        """returns the amount of new clips and the windows that still need to be crawled"""
+        started_at, ended_at = window
+        seen = 0
+        written = 0
+        written_ids = []
+        success = False
+        try:
+            for clips, _ in iterate_pages(self.twitch.get_clips, first=100, started_at=started_at,
+                                          ended_at=ended_at, **owner):
+                seen += len(clips)
+                written += self.__write_new(clips, written_ids)
+            success = True
+        finally:
+            self.__commit(written_ids, success)
+        if seen >= self.saturation_limit:
+            if ended_at - started_at > self.min_window:
+                middle = started_at + (ended_at - started_at) / 2
+                return written, [(started_at, middle), (middle, ended_at)]
+            logging.warning(f'window {started_at} to {ended_at} is saturated but can not be split further, '
+                            f'some clips might be missing')
+        return written, []
+
+    @staticmethod
+    def __checkpoint_key(kind: str, owner: dict) -> str:
+        return f'catalog:{kind}:' + ':'.join(f'{k}={v}' for k, v in sorted(owner.items()) if v is not None)
+
+    def crawl_clips(self,
+                    game_id: Optional[str] = None,
+                    broadcaster_id: Optional[str] = None,
+                    started_at: Optional[datetime] = None,
+                    ended_at: Optional[datetime] = None) -> int:
+        """Writes all clips of the game or broadcaster created in the given time range that are not in the index yet
+
+        :param str game_id: the game, exactly one of game_id and broadcaster_id has to be set |default| :code:`None`
+        :param str broadcaster_id: the broadcaster |default| :code:`None`
+        :param ~datetime.datetime started_at: start of the time range, if not set the range starts at the end of the
+                last crawl minus :attr:`refresh_overlap`. Naive datetimes are in local time. |default| :code:`None`
+        :param ~datetime.datetime ended_at: end of the time range, naive datetimes are in local time |default| now
+        :return: the amount of new clips
+        :rtype: int
+        :raises ValueError: if not exactly one of game_id and broadcaster_id is set or started_at is not set and there
+                is no earlier crawl
+        :raises ~twitchAPI.types.TwitchAPIException: if the Twitch API returns a invalid page
+        """
+        if (game_id is None) == (broadcaster_id is None):
+            raise ValueError('exactly one of game_id and broadcaster_id has to be set')
+        owner = {'game_id': game_id} if game_id is not None else {'broadcaster_id': broadcaster_id}
+        key = self.__checkpoint_key('clips', owner)
+        # the checkpoint is timezone aware, naive datetimes can not be compared with it
+        ended_at = datetime.now(timezone.utc) if ended_at is None else ended_at.astimezone(timezone.utc)
+        if started_at is not None:
+            started_at = started_at.astimezone(timezone.utc)
+        else:
+            checkpoint = self.checkpoint_store.get(key)
+            if checkpoint is None:
+                raise ValueError('started_at is required for the first crawl')
+            started_at = datetime.fromisoformat(checkpoint['ended_at']) - self.refresh_overlap
+        windows = []
+        window_start = started_at
+        while window_start < ended_at:
+            windows.append((window_start, min(window_start + self.initial_window, ended_at)))
+            window_start += self.initial_window
+        written = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self.__crawl_window, owner, w) for w in windows}
+            while len(pending) > 0:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    new, split = future.result()
+                    written += new
+                    pending |= {executor.submit(self.__crawl_window, owner, w) for w in split}
+        checkpoint = self.checkpoint_store.get(key)
+        if checkpoint is None or datetime.fromisoformat(checkpoint['ended_at']) < ended_at:
+            self.checkpoint_store.save(key, {'ended_at': ended_at.isoformat()})
+        return written
+
+    def crawl_videos(self,
+                     user_id: Optional[str] = None,
+                     game_id: Optional[str] = None) -> int:
+        """Writes all videos of the user or game that are not in the index yet
+
+        :param str user_id: the user, exactly one of user_id and game_id has to be set |default| :code:`None`
+        :param str game_id: the game |default| :code:`None`
+        :return: the amount of new videos
+        :rtype: int
+        :raises ValueError: if not exactly one of user_id and game_id is set
+        :raises ~twitchAPI.types.TwitchAPIException: if the Twitch API returns a invalid page
+        """
+        if (game_id is None) == (user_id is None):
+            raise ValueError('exactly one of user_id and game_id has to be set')
+        owner = {'game_id': game_id} if game_id is not None else {'user_id': user_id}
+        key = self.__checkpoint_key('videos', owner)
+        # stopping early is only safe once all older videos were crawled
+        complete = self.checkpoint_store.get(key) is not None
+        written = 0
+        for videos, _ in iterate_pages(self.twitch.get_videos, first=100, sort=SortMethod.TIME, **owner):
+            written_ids = []
+            success = False
+            try:
+                new = self.__write_new(videos, written_ids)
+                success = True
+            finally:
+                self.__commit(written_ids, success)
+            written += new
+            if complete and new == 0:
+                break
+        self.checkpoint_store.save(key, {'ended_at': datetime.now(timezone.utc).isoformat()})
+        return written
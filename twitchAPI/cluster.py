@@ -0,0 +1,157 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Multi process Webhook
+---------------------
+
+Run multiple webhook worker processes that all share the same listening socket.
+
+All workers should share the same :class:`~twitchAPI.storage.SQLiteSubscriptionStore` and
+:class:`~twitchAPI.storage.SQLiteDeduplicator`. The ownership of each subscription is spread over the workers using
+consistent hashing, only the owning worker renews a subscription. The owner does not know subscriptions that other
+workers made after it started, so the worker that made a subscription renews it itself if the owner did not do so
+shortly before it expires.
+
+.. note:: The subscription handshake might be answered by any worker, set
+            :attr:`~twitchAPI.webhook.TwitchWebHook.wait_for_subscription_confirm` to False when subscribing to topics
+            while running multiple workers.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.twitch import Twitch
+    from twitchAPI.webhook import TwitchWebHook
+    from twitchAPI.storage import SQLiteSubscriptionStore, SQLiteDeduplicator
+    from twitchAPI.cluster import run_webhook_workers
+
+    def callback_for_topic(topic):
+        return callback_stream_changed
+
+    def setup_worker(node_id, ring):
+        twitch = Twitch('my_app_id', 'my_app_secret')
+        twitch.authenticate_app([])
+        hook = TwitchWebHook("https://my.cool.domain.net:8080", 'my_app_id', 8080)
+        hook.subscription_store = SQLiteSubscriptionStore('subscriptions.db')
+        hook.deduplicator = SQLiteDeduplicator('deliveries.db')
+        # the subscriptions are shared between all workers, dont remove them when a single worker stops
+        hook.unsubscribe_on_stop = False
+        hook.authenticate(twitch)
+        return hook, lambda: hook.restore_subscriptions(twitch, callback_for_topic)
+
+    workers = run_webhook_workers(setup_worker, 4)
+
+********************
+Class Documentation:
+********************
+"""
+
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import signal
+import threading
+from typing import List, Callable, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # only needed for annotations, importing the webhook loads aiohttp.web
+    from .webhook import TwitchWebHook
+
+
+class HashRing:
+    """Consistent hash ring used to spread the ownership of keys over multiple nodes.
+
+    :param list[str] nodes: the ids of all nodes
+    :param int replicas: number of virtual nodes per node |default| :code:`100`
+    """
+
+    def __init__(self, nodes: List[str], replicas: int = 100):
+        self.replicas = replicas
+        self.__ring = []
+        self.__owners = {}
+        for node in nodes:
+            self.add_node(node)
+
+    @staticmethod
+    def __hash(key: str) -> int:
+        return int(hashlib.md5(key.encode('utf-8')).hexdigest()[:16], 16)
+
+    def add_node(self, node: str) -> None:
+        """Adds a node to the ring
+
+        :param str node: id of the node
+        :rtype: None
+        """
+        for i in range(self.replicas):
+            h = self.__hash(f'{node}#{i}')
+            self.__owners[h] = node
+            bisect.insort(self.__ring, h)
+
+    def remove_node(self, node: str) -> None:
+        """Removes a node from the ring
+
+        :param str node: id of the node
+        :rtype: None
+        """
+        for i in range(self.replicas):
+            h = self.__hash(f'{node}#{i}')
+            if self.__owners.pop(h, None) is not None:
+                self.__ring.remove(h)
+
+    def get_node(self, key: str) -> Union[str, None]:
+        """Returns the node that owns the given key
+
+        :param str key: the key
+        :return: id of the owning node or None if the ring is empty
+        :rtype: str or None
+        """
+        if len(self.__ring) == 0:
+            return None
+        idx = bisect.bisect(self.__ring, self.__hash(key)) % len(self.__ring)
+        return self.__owners[self.__ring[idx]]
+
+
+def _run_worker(setup: Callable, node_id: str, ring: HashRing) -> None:
+    result = setup(node_id, ring)
+    hook, after_start = result if isinstance(result, tuple) else (result, None)
+    hook.node_id = node_id
+    hook.node_ring = ring
+    hook.reuse_port = True
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    hook.start()
+    if after_start is not None:
+        after_start()
+    logging.info(f'webhook worker {node_id} started')
+    while not stop.wait(1):
+        pass
+    hook.stop()
+
+
+def run_webhook_workers(setup: Callable[[str, HashRing], Union['TwitchWebHook', Tuple['TwitchWebHook', Callable]]],
+                        workers: int) -> List[multiprocessing.Process]:
+    """Starts multiple webhook worker processes sharing the same port.
+
+    setup is called in every worker process with the id of the worker and the shared :class:`HashRing` and has to
+    return a configured, not yet started :class:`~twitchAPI.webhook.TwitchWebHook`. It can optionally return a tuple of
+    the hook and a function that gets called once the hook is started, e.g. to restore subscriptions.
+
+    Stop the workers by terminating the returned processes.
+
+    :param setup: function setting up the webhook of a worker
+    :param int workers: number of worker processes
+    :rtype: list[~multiprocessing.Process]
+    :raises ValueError: if workers is smaller than 1
+    """
+    if workers < 1:
+        raise ValueError('at least one worker is required')
+    node_ids = [f'worker-{i}' for i in range(workers)]
+    ring = HashRing(node_ids)
+    processes = []
+    for node_id in node_ids:
+        process = multiprocessing.Process(target=_run_worker, args=(setup, node_id, ring), daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
@@ -0,0 +1,218 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Connection Warm-up
+------------------
+
+The first request to a host has to resolve its name and open a TCP and TLS connection before anything is sent.
+This module moves that work off the critical path of your API calls:
+
+- :class:`DNSCache` caches resolved addresses for a configurable time. Install it on a client with
+  :meth:`~twitchAPI.twitch.Twitch.enable_dns_cache`.
+- :meth:`~twitchAPI.twitch.Twitch.warm_up` opens pooled connections to the Twitch API and the Twitch authentication
+  API. Set :attr:`~twitchAPI.twitch.Twitch.warm_up_on_auth` to do that in
+  :meth:`~twitchAPI.twitch.Twitch.authenticate_app`.
+- :class:`KeepAlive` sends a request to both hosts when the client was idle for a while, so the pooled connections are
+  not closed by the server.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.twitch import Twitch
+    from twitchAPI.connection import KeepAlive
+
+    twitch = Twitch('my_app_id', 'my_app_secret')
+    twitch.enable_dns_cache(ttl=300)
+    twitch.warm_up_on_auth = True
+    twitch.authenticate_app([])
+
+    keep_alive = KeepAlive(twitch)
+    keep_alive.interval = 30
+    keep_alive.start()
+    # ... use the client
+    keep_alive.stop()
+
+********************
+Class Documentation:
+********************
+"""
+
+import logging
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .types import HookEvent
+
+
+class DNSCache:
+    """Thread safe cache of resolved host names
+
+    :param float ttl: seconds a resolved address is used before the host is resolved again |default| :code:`300`
+    :var float ttl: seconds a resolved address is used before the host is resolved again
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl: float = ttl
+        self.__entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self.__lock = threading.Lock()
+
+    def resolve_all(self, host: str, port: int) -> List[str]:
+        """Returns all addresses of the host in the order of :func:`socket.getaddrinfo`, from the cache if it is not
+        expired yet
+
+        :param str host: the host name
+        :param int port: the port
+        :return: the addresses, empty if the host could not be resolved
+        :rtype: list[str]
+        """
+        key = (host, port)
+        with self.__lock:
+            entry = self.__entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        try:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            return []
+        # getaddrinfo lists an address once per protocol on some systems
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        if len(addresses) > 0:
+            with self.__lock:
+                self.__entries[key] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    def resolve(self, host: str, port: int) -> Optional[str]:
+        """Returns the first address of the host, see :meth:`resolve_all`
+
+        :param str host: the host name
+        :param int port: the port
+        :return: the address or None if the host could not be resolved
+        :rtype: str or None
+        """
+        addresses = self.resolve_all(host, port)
+        return addresses[0] if len(addresses) > 0 else None
+
+    def invalidate(self, host: Optional[str] = None) -> None:
+        """Removes the cached addresses of the host
+
+        :param str host: the host name, removes all hosts if None |default| :code:`None`
+        :rtype: None
+        """
+        with self.__lock:
+            if host is None:
+                self.__entries.clear()
+            else:
+                for key in [k for k in self.__entries.keys() if k[0] == host]:
+                    self.__entries.pop(key)
+
+
+class _CachedDNSConnection:
+    dns_cache: Optional[DNSCache] = None
+
+    def _new_conn(self):
+        # only the address that is connected to is replaced, TLS still uses and verifies the host name
+        host = self._dns_host
+        addresses = self.dns_cache.resolve_all(host, self.port)
+        if len(addresses) == 0:
+            return super()._new_conn()
+        # like urllib3 itself, try every address, e.g. when IPv6 is not reachable
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except Exception:
+                    if i == len(addresses) - 1:
+                        # the cached addresses might be outdated
+                        self.dns_cache.invalidate(host)
+                        raise
+        finally:
+            self._dns_host = host
+
+
+class CachedDNSAdapter(HTTPAdapter):
+    """:class:`~requests.adapters.HTTPAdapter` that resolves host names through a :class:`DNSCache`
+
+    :param ~twitchAPI.connection.DNSCache dns_cache: the cache to use
+    :param kwargs: passed to :class:`~requests.adapters.HTTPAdapter`
+    """
+
+    def __init__(self, dns_cache: DNSCache, **kwargs):
+        self.dns_cache = dns_cache
+        http_connection = type('HTTPConnection', (_CachedDNSConnection, HTTPConnection), {'dns_cache': dns_cache})
+        https_connection = type('HTTPSConnection', (_CachedDNSConnection, HTTPSConnection), {'dns_cache': dns_cache})
+        self.__pool_classes = {
+            'http': type('HTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': http_connection}),
+            'https': type('HTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': https_connection})
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self.__pool_classes
+
+
+class KeepAlive:
+    """Keeps the pooled connections of a client open by sending requests while the client is idle
+
+    :param ~twitchAPI.twitch.Twitch twitch: the client
+    :var float interval: seconds without a request after which the connections are pinged |default| :code:`60`
+    :var int connections: the amount of connections that are kept open per host |default| :code:`2`
+    """
+
+    def __init__(self, twitch):
+        self.twitch = twitch
+        self.interval: float = 60
+        self.connections: int = 2
+        self.__last_activity: float = time.monotonic()
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def __on_receive(self, context: dict) -> None:
+        self.__last_activity = time.monotonic()
+
+    def __run(self):
+        while not self.__stop.is_set():
+            idle = time.monotonic() - self.__last_activity
+            if idle < self.interval:
+                self.__stop.wait(self.interval - idle)
+                continue
+            try:
+                self.twitch.warm_up(self.connections)
+            except Exception:
+                logging.exception('keep alive ping failed')
+            self.__last_activity = time.monotonic()
+
+    def start(self) -> None:
+        """Starts pinging in its own thread
+
+        :rtype: None
+        :raises RuntimeError: if it is already running
+        """
+        if self.__thread is not None:
+            raise RuntimeError('keep alive is already running')
+        self.__stop.clear()
+        self.__last_activity = time.monotonic()
+        self.twitch.register_hook(HookEvent.AFTER_RECEIVE, self.__on_receive)
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stops pinging
+
+        :rtype: None
+        """
+        if self.__thread is None:
+            return
+        self.__stop.set()
+        self.__thread.join()
+        self.__thread = None
+        self.twitch.remove_hook(HookEvent.AFTER_RECEIVE, self.__on_receive)
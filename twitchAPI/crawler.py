@@ -0,0 +1,160 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Follower Crawler
+----------------
+
+:class:`FollowCrawler` pages through :meth:`~twitchAPI.twitch.Twitch.get_users_follows` for many users at once, in
+both directions: the followers of a user (:code:`to_id`) and the users a user follows (:code:`from_id`).
+
+Every page is written to a :class:`~twitchAPI.sinks.RecordSink` as soon as it arrives and the pagination cursor is
+stored in a :class:`~twitchAPI.storage.CheckpointStore` afterwards. When a crawl is interrupted, running it again with
+the same checkpoint store continues every user where it stopped and skips the already finished ones.
+
+A follow that is seen more than once, e.g. because it is part of both the followers of one user and the followings
+of another, is only written once. This is done by a :class:`~twitchAPI.storage.DeliveryDeduplicator`, use a
+:class:`~twitchAPI.storage.SQLiteDeduplicator` for large crawls to keep the memory usage constant. The default
+:class:`~twitchAPI.storage.MemoryDeduplicator` only remembers the most recent follows, so a follow might be written
+again once it was forgotten.
+
+Follows are only remembered by the deduplicator after their page was flushed and its checkpoint saved, so an
+interrupted crawl might write some follows twice but never loses one.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.twitch import Twitch
+    from twitchAPI.crawler import FollowCrawler
+    from twitchAPI.sinks import JSONLSink
+    from twitchAPI.storage import SQLiteCheckpointStore, SQLiteDeduplicator
+
+    twitch = Twitch('my_app_id', 'my_app_secret')
+    twitch.authenticate_app([])
+    with JSONLSink('follows.jsonl') as sink:
+        crawler = FollowCrawler(twitch,
+                                sink,
+                                checkpoint_store=SQLiteCheckpointStore('crawl.db'),
+                                deduplicator=SQLiteDeduplicator('crawl.db', ttl=None))
+        # all followers of two channels and everyone the first one follows
+        counts = crawler.crawl(to_ids=['1234', '5678'], from_ids=['1234'])
+
+********************
+Class Documentation:
+********************
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .helper import iterate_pages
+from .sinks import RecordSink
+from .storage import CheckpointStore, DeliveryDeduplicator, MemoryCheckpointStore, MemoryDeduplicator
+from .twitch import Twitch
+
+
+class FollowCrawler:
+    """Crawls the follow relations of many users concurrently
+
+    :param ~twitchAPI.twitch.Twitch twitch: a app authenticated instance of :class:`~twitchAPI.twitch.Twitch`
+    :param ~twitchAPI.sinks.RecordSink sink: the sink the follows get written to
+    :param ~twitchAPI.storage.CheckpointStore checkpoint_store: stores the progress of every user,
+            |default| :class:`~twitchAPI.storage.MemoryCheckpointStore`
+    :param ~twitchAPI.storage.DeliveryDeduplicator deduplicator: remembers the already written follows,
+            |default| :class:`~twitchAPI.storage.MemoryDeduplicator` remembering the last 100000 follows
+    :var int max_workers: the amount of users that are crawled at the same time |default| :code:`4`
+    :var int page_size: the amount of follows requested per page |default| :code:`100`
+    """
+
+    def __init__(self,
+                 twitch: Twitch,
+                 sink: RecordSink,
+                 checkpoint_store: Optional[CheckpointStore] = None,
+                 deduplicator: Optional[DeliveryDeduplicator] = None):
+        self.twitch = twitch
+        self.sink = sink
+        self.checkpoint_store = checkpoint_store if checkpoint_store is not None else MemoryCheckpointStore()
+        self.deduplicator = deduplicator if deduplicator is not None else MemoryDeduplicator(max_size=100000)
+        self.max_workers: int = 4
+        self.page_size: int = 100
+        self.__pending = set()
+        self.__pending_lock = threading.Lock()
+
+    @staticmethod
+    def __checkpoint_key(direction: str, user_id: str) -> str:
+        return f'follows:{direction}:{user_id}'
+
+    def __crawl_user(self, direction: str, user_id: str) -> int:
+        key = self.__checkpoint_key(direction, user_id)
+        checkpoint = self.checkpoint_store.get(key) or {'cursor': None, 'done': False, 'count': 0}
+        if checkpoint['done']:
+            return 0
+        written = 0
+        pages = iterate_pages(self.twitch.get_users_follows,
+                              cursor=checkpoint['cursor'],
+                              first=self.page_size,
+                              **{direction: user_id})
+        for follows, cursor in pages:
+            by_key = {f'{f["from_id"]}:{f["to_id"]}': f for f in follows}
+            # follows that an other user is writing right now are not yet marked as seen
+            with self.__pending_lock:
+                new_keys = [k for k in self.deduplicator.find_new(list(by_key.keys())) if k not in self.__pending]
+                self.__pending.update(new_keys)
+            try:
+                new = [by_key[k] for k in new_keys]
+                self.sink.write(new)
+                # the page has to be on disk before the cursor moves past it
+                self.sink.flush()
+                checkpoint = {'cursor': cursor, 'done': cursor is None, 'count': checkpoint['count'] + len(new)}
+                self.checkpoint_store.save(key, checkpoint)
+                # only remember the follows once they are safely stored, a crash before would lose them otherwise
+                self.deduplicator.mark_seen(new_keys)
+            finally:
+                with self.__pending_lock:
+                    self.__pending.difference_update(new_keys)
+            written += len(new)
+        return written
+
+    def crawl(self,
+              to_ids: Optional[List[str]] = None,
+              from_ids: Optional[List[str]] = None) -> Dict[Tuple[str, str], int]:
+        """Crawls the followers of all to_ids and the followings of all from_ids and blocks until done.
+
+        Users that fail, e.g. because of a exception raised by the Twitch API, are logged and keep their checkpoint,
+        call crawl again to retry them.
+
+        :param list[str] to_ids: users whose followers should be crawled |default| :code:`None`
+        :param list[str] from_ids: users whose followings should be crawled |default| :code:`None`
+        :return: dict of (:code:`to_id` or :code:`from_id`, user id) to the amount of newly written follows of all
+                successfully crawled users
+        :rtype: dict
+        """
+        jobs = [('to_id', u) for u in (to_ids or [])] + [('from_id', u) for u in (from_ids or [])]
+        result = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {job: executor.submit(self.__crawl_user, *job) for job in jobs}
+            for job, future in futures.items():
+                try:
+                    result[job] = future.result()
+                except Exception:
+                    logging.exception(f'crawling the follows of {job[0]}={job[1]} failed')
+        return result
+
+    def reset(self,
+              to_ids: Optional[List[str]] = None,
+              from_ids: Optional[List[str]] = None) -> None:
+        """Removes the checkpoints of the given users, so that the next crawl starts at their first page again.
+
+        The deduplicator is not reset, follows that were already written are not written again.
+
+        :param list[str] to_ids: users whose followers checkpoint should be removed |default| :code:`None`
+        :param list[str] from_ids: users whose followings checkpoint should be removed |default| :code:`None`
+        :rtype: None
+        """
+        for user_id in to_ids or []:
+            self.checkpoint_store.delete(self.__checkpoint_key('to_id', user_id))
+        for user_id in from_ids or []:
+            self.checkpoint_store.delete(self.__checkpoint_key('from_id', user_id))
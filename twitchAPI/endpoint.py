@@ -0,0 +1,130 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Request Descriptors
+-------------------
+
+Every API call of :class:`~twitchAPI.twitch.Twitch` is defined once as a function that validates its parameters and
+returns a :class:`HelixRequest` describing the request: the HTTP method, the path, the query parameters, the body, the
+required authentication and scopes and how the response is turned into the result.
+
+The :func:`helix_endpoint` decorator turns such a function into the method you call, which hands the descriptor to
+:meth:`~twitchAPI.twitch.Twitch.execute`. That way the same descriptors can be run by different transports:
+
+- synchronous through :attr:`~twitchAPI.twitch.Twitch.transport`, which is what every method of
+  :class:`~twitchAPI.twitch.Twitch` does
+- asynchronous through :class:`~twitchAPI.transport.AsyncExecutor`
+- replayed from recordings by any :class:`~twitchAPI.transport.Transport` that returns stored responses
+
+Use :meth:`~twitchAPI.twitch.Twitch.build_request` to get the descriptor of a call without sending it.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.twitch import Twitch
+
+    twitch = Twitch('my_app_id', 'my_app_secret')
+    twitch.authenticate_app([])
+    request = twitch.build_request('get_users', logins=['teekeks'])
+    print(request.method, request.path, request.params)
+    # the same as twitch.get_users(logins=['teekeks'])
+    users = twitch.execute(request)
+
+********************
+Class Documentation:
+********************
+"""
+
+import functools
+from typing import Any, Callable, List, NamedTuple, Optional, Type
+from enum import Enum
+
+from .helper import make_fields_datetime, fields_to_enum
+from .types import AuthScope, AuthType
+
+
+class HelixRequest(NamedTuple):
+    """Description of a single request to the Twitch API
+
+    :var str method: the HTTP method
+    :var str path: the path relative to :attr:`~twitchAPI.twitch.Twitch.base_url`, e.g. :code:`users/follows`
+    :var dict params: the query parameters
+    :var ~twitchAPI.types.AuthType auth_type: the required authentication
+    :var list[~twitchAPI.types.AuthScope] required_scope: the required scopes
+    :var dict body: sent as JSON body if not None
+    :var bool remove_none: remove query parameters that are None
+    :var bool split_lists: send list parameters as one query parameter per entry
+    :var transform: called with the response to get the result, the parsed JSON body is returned if None
+    """
+    method: str
+    path: str
+    params: dict
+    auth_type: AuthType
+    required_scope: List[AuthScope]
+    body: Optional[dict] = None
+    remove_none: bool = False
+    split_lists: bool = False
+    transform: Optional[Callable[[Any], Any]] = None
+
+
+def helix_endpoint(func: Callable[..., HelixRequest]) -> Callable:
+    """Turns a method of :class:`~twitchAPI.twitch.Twitch` that returns a :class:`HelixRequest` into a method that
+    executes that request and returns its result.
+
+    The undecorated function is available as :code:`build` of the returned method."""
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        return self.execute(func(self, *args, **kwargs))
+
+    wrapper.build = func
+    return wrapper
+
+
+def parse_json(*transforms: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Returns a transform that parses the JSON body of the response and passes it through the given functions
+
+    :param transforms: functions that get the data and return the changed data, applied in order
+    """
+
+    def transform(response):
+        data = response.json()
+        for t in transforms:
+            data = t(data)
+        return data
+    return transform
+
+
+def datetime_fields(*fields: str) -> Callable[[Any], Any]:
+    """Returns a function that converts the given fields of the data, see
+    :func:`~twitchAPI.helper.make_fields_datetime`
+
+    :param fields: the names of the fields
+    """
+    return functools.partial(make_fields_datetime, fields=list(fields))
+
+
+def enum_fields(fields: List[str], _enum: Type[Enum], default: Optional[Enum]) -> Callable[[Any], Any]:
+    """Returns a function that converts the given fields of the data to the enum, see
+    :func:`~twitchAPI.helper.fields_to_enum`
+
+    :param list[str] fields: the names of the fields
+    :param _enum: the enum
+    :param default: used for values that are not in the enum
+    """
+    return functools.partial(fields_to_enum, fields=fields, _enum=_enum, default=default)
+
+
+def status_equals(status: int) -> Callable[[Any], bool]:
+    """Returns a transform that returns whether the response has the given status code
+
+    :param int status: the expected status code
+    """
+    return lambda response: response.status_code == status
+
+
+def ignore_body(response) -> dict:
+    """Transform for endpoints that return nothing, always returns a empty dict"""
+    return {}
@@ -0,0 +1,249 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Bulk Export
+-----------
+
+:class:`Exporter` pages through a endpoint of :class:`~twitchAPI.twitch.Twitch` and writes every record to a
+:class:`~twitchAPI.sinks.RecordSink` as it arrives, so the memory usage stays the same no matter how big the export
+gets.
+
+The following endpoints can be exported, the records are converted to the schema in :const:`EXPORT_SCHEMAS`:
+
+=================== ==================================================== =========================================
+Endpoint            Method                                               Required parameters
+=================== ==================================================== =========================================
+:code:`top_games`   :meth:`~twitchAPI.twitch.Twitch.get_top_games`
+:code:`streams`     :meth:`~twitchAPI.twitch.Twitch.get_streams`
+:code:`clips`       :meth:`~twitchAPI.twitch.Twitch.get_clips`           :code:`broadcaster_id` or :code:`game_id`
+:code:`videos`      :meth:`~twitchAPI.twitch.Twitch.get_videos`          :code:`user_id` or :code:`game_id`
+=================== ==================================================== =========================================
+
+Every :attr:`~Exporter.checkpoint_every` pages, the sink is flushed and the pagination cursor is stored in a
+:class:`~twitchAPI.storage.CheckpointStore`. Running the same export again with the same checkpoint store continues
+after the last stored cursor. Records written after the last checkpoint of a interrupted export are written again
+when it is resumed.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.twitch import Twitch
+    from twitchAPI.export import Exporter
+    from twitchAPI.storage import SQLiteCheckpointStore
+    from twitchAPI.types import ExportFormat
+
+    twitch = Twitch('my_app_id', 'my_app_secret')
+    twitch.authenticate_app([])
+    exporter = Exporter(twitch, SQLiteCheckpointStore('export.db'))
+    exporter.export_to_file('streams', 'streams.jsonl')
+    # requires pyarrow
+    exporter.export_to_file('clips', 'clips_of_game', ExportFormat.PARQUET, game_id='33214')
+
+********************
+Class Documentation:
+********************
+"""
+
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional
+
+from dateutil import parser as du_parser
+
+from .helper import iterate_pages
+from .sinks import RecordSink, JSONLSink, CSVSink, ParquetSink
+from .storage import CheckpointStore, MemoryCheckpointStore
+from .twitch import Twitch
+from .types import ExportFormat
+
+EXPORT_SCHEMAS: Dict[str, Dict[str, type]] = {
+    'top_games': {
+        'id': str,
+        'name': str,
+        'box_art_url': str
+    },
+    'streams': {
+        'id': str,
+        'user_id': str,
+        'user_name': str,
+        'game_id': str,
+        'type': str,
+        'title': str,
+        'viewer_count': int,
+        'started_at': datetime,
+        'language': str,
+        'thumbnail_url': str,
+        'tag_ids': list
+    },
+    'clips': {
+        'id': str,
+        'url': str,
+        'embed_url': str,
+        'broadcaster_id': str,
+        'broadcaster_name': str,
+        'creator_id': str,
+        'creator_name': str,
+        'video_id': str,
+        'game_id': str,
+        'language': str,
+        'title': str,
+        'view_count': int,
+        'created_at': datetime,
+        'thumbnail_url': str
+    },
+    'videos': {
+        'id': str,
+        'user_id': str,
+        'user_name': str,
+        'title': str,
+        'description': str,
+        'created_at': datetime,
+        'published_at': datetime,
+        'url': str,
+        'thumbnail_url': str,
+        'viewable': str,
+        'view_count': int,
+        'language': str,
+        'type': str,
+        'duration': str
+    }
+}
+"""Dict of endpoint to the schema of its records, a schema is a dict of field name to python type"""
+
+_METHODS = {
+    'top_games': 'get_top_games',
+    'streams': 'get_streams',
+    'clips': 'get_clips',
+    'videos': 'get_videos'
+}
+
+
+def _convert(value, target: type):
+    if value is None or isinstance(value, target):
+        return value
+    if isinstance(value, Enum):
+        value = value.value
+    if target == datetime:
+        return du_parser.isoparse(value) if value != '' else None
+    if target == list:
+        return [value]
+    return target(value)
+
+
+def apply_schema(record: dict, schema: Dict[str, type]) -> dict:
+    """Converts a record to the given schema.
+
+    Fields that are not in the schema are dropped and missing fields are set to None. Enums are replaced with their
+    value, :class:`~datetime.datetime` fields are parsed from their ISO 8601 string or set to None if empty.
+
+    :param dict record: the record
+    :param dict schema: dict of field name to python type
+    :rtype: dict
+    """
+    return {name: _convert(record.get(name), target) for name, target in schema.items()}
+
+
+def create_sink(path: str, schema: Dict[str, type], file_format: ExportFormat = ExportFormat.JSONL) -> RecordSink:
+    """Creates a file sink for the given schema
+
+    :param str path: path of the file, for :const:`~twitchAPI.types.ExportFormat.PARQUET` of the directory
+    :param dict schema: the schema of the records
+    :param ~twitchAPI.types.ExportFormat file_format: the file format |default| :code:`ExportFormat.JSONL`
+    :rtype: ~twitchAPI.sinks.RecordSink
+    :raises RuntimeError: if the format is Parquet and pyarrow is not installed
+    """
+    if file_format == ExportFormat.CSV:
+        return CSVSink(path, list(schema.keys()))
+    if file_format == ExportFormat.PARQUET:
+        return ParquetSink(path, schema)
+    return JSONLSink(path)
+
+
+class Exporter:
+    """Exports endpoints page by page into sinks
+
+    :param ~twitchAPI.twitch.Twitch twitch: a authenticated instance of :class:`~twitchAPI.twitch.Twitch`
+    :param ~twitchAPI.storage.CheckpointStore checkpoint_store: stores the progress of the exports,
+            |default| :class:`~twitchAPI.storage.MemoryCheckpointStore`
+    :var int checkpoint_every: amount of pages after which the sink is flushed and the cursor is stored
+            |default| :code:`10`
+    """
+
+    def __init__(self, twitch: Twitch, checkpoint_store: Optional[CheckpointStore] = None):
+        self.twitch = twitch
+        self.checkpoint_store = checkpoint_store if checkpoint_store is not None else MemoryCheckpointStore()
+        self.checkpoint_every: int = 10
+
+    @staticmethod
+    def __checkpoint_key(endpoint: str, params: dict) -> str:
+        return f'export:{endpoint}:{json.dumps(params, sort_keys=True, default=str)}'
+
+    def export(self, endpoint: str, sink: RecordSink, restart: bool = False, **params) -> int:
+        """Exports all records of the endpoint into the sink
+
+        An export is identified by the endpoint and its parameters, a finished export is not run again unless
+        restart is set.
+
+        :param str endpoint: the endpoint, one of the keys of :const:`EXPORT_SCHEMAS`
+        :param ~twitchAPI.sinks.RecordSink sink: the sink the records are written to
+        :param bool restart: ignore the checkpoint of a earlier run and start at the first page |default| :code:`False`
+        :param params: parameters passed to the method of the endpoint
+        :return: the amount of records written in this run
+        :rtype: int
+        :raises ValueError: if the endpoint is not supported
+        :raises ~twitchAPI.types.TwitchAPIException: if the Twitch API returns a invalid page
+        """
+        if endpoint not in EXPORT_SCHEMAS:
+            raise ValueError(f'endpoint has to be one of {", ".join(EXPORT_SCHEMAS.keys())}')
+        schema = EXPORT_SCHEMAS[endpoint]
+        key = self.__checkpoint_key(endpoint, params)
+        checkpoint = None if restart else self.checkpoint_store.get(key)
+        if checkpoint is None:
+            checkpoint = {'cursor': None, 'done': False, 'count': 0}
+        if checkpoint['done']:
+            return 0
+        written = 0
+        written_at_checkpoint = 0
+        pages_since_checkpoint = 0
+        pages = iterate_pages(getattr(self.twitch, _METHODS[endpoint]), cursor=checkpoint['cursor'], first=100,
+                              **params)
+        for records, cursor in pages:
+            sink.write([apply_schema(r, schema) for r in records])
+            written += len(records)
+            pages_since_checkpoint += 1
+            if cursor is None or pages_since_checkpoint >= self.checkpoint_every:
+                sink.flush()
+                checkpoint = {'cursor': cursor,
+                              'done': cursor is None,
+                              'count': checkpoint['count'] + written - written_at_checkpoint}
+                self.checkpoint_store.save(key, checkpoint)
+                written_at_checkpoint = written
+                pages_since_checkpoint = 0
+        return written
+
+    def export_to_file(self,
+                       endpoint: str,
+                       path: str,
+                       file_format: ExportFormat = ExportFormat.JSONL,
+                       restart: bool = False,
+                       **params) -> int:
+        """Exports all records of the endpoint into a file, see :meth:`export` and :func:`create_sink`
+
+        :param str endpoint: the endpoint, one of the keys of :const:`EXPORT_SCHEMAS`
+        :param str path: path of the file, for :const:`~twitchAPI.types.ExportFormat.PARQUET` of the directory
+        :param ~twitchAPI.types.ExportFormat file_format: the file format |default| :code:`ExportFormat.JSONL`
+        :param bool restart: ignore the checkpoint of a earlier run and start at the first page |default| :code:`False`
+        :param params: parameters passed to the method of the endpoint
+        :return: the amount of records written in this run
+        :rtype: int
+        :raises ValueError: if the endpoint is not supported
+        :raises RuntimeError: if the format is Parquet and pyarrow is not installed
+        :raises ~twitchAPI.types.TwitchAPIException: if the Twitch API returns a invalid page
+        """
+        if endpoint not in EXPORT_SCHEMAS:
+            raise ValueError(f'endpoint has to be one of {", ".join(EXPORT_SCHEMAS.keys())}')
+        with create_sink(path, EXPORT_SCHEMAS[endpoint], file_format) as sink:
+            return self.export(endpoint, sink, restart, **params)
@@ -1,16 +1,23 @@
 #  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
 """Helper functions"""
 
+import logging
+import threading
+import time
 import urllib.parse
 import uuid
-from typing import Union, List, Type, Optional
+import hmac
+import hashlib
+from typing import Union, List, Type, Optional, Dict, Callable, Iterator, Tuple, TYPE_CHECKING
 from json import JSONDecodeError
-from aiohttp.web import Request
-from dateutil import parser as du_parser
 from enum import Enum
-from .types import AuthScope
+from .types import AuthScope, HookEvent, TwitchAPIException
 from urllib.parse import urlparse, parse_qs
 
+if TYPE_CHECKING:
+    # only needed for annotations, importing aiohttp.web at runtime is slow
+    from aiohttp.web import Request
+
 
 TWITCH_API_BASE_URL = "https://api.twitch.tv/helix/"
 TWITCH_AUTH_BASE_URL = "https://id.twitch.tv/"
@@ -69,7 +76,8 @@ async def get_json(request: 'Request') -> Union[list, dict, None]:
     :param request: the request
     :return: the object in the body or None
     """
-    if not request.can_read_body:
+    # body_exists instead of can_read_body since the body might already be read and cached
+    if not request.body_exists:
         return None
     try:
         data = await request.json()
@@ -78,6 +86,163 @@ async def get_json(request: 'Request') -> Union[list, dict, None]:
         return None
 
 
+def verify_signature(secret: str, body: bytes, signature: Union[str, None]) -> bool:
+    """Verifies the signature of a webhook notification in constant time
+
+    :param str secret: the secret used when subscribing to the topic
+    :param bytes body: the raw request body
+    :param str signature: the value of the :code:`X-Hub-Signature` header, e.g. :code:`sha256=...`
+    :return: True if the signature is valid, otherwise False
+    :rtype: bool
+    """
+    if signature is None:
+        return False
+    algorithm, _, digest = signature.partition('=')
+    if algorithm not in ('sha1', 'sha256', 'sha384', 'sha512'):
+        return False
+    expected = hmac.new(secret.encode('utf-8'), body, getattr(hashlib, algorithm)).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+
+def run_hooks(hooks: Dict[Enum, List[Callable[[dict], None]]], event: Enum, context: dict) -> None:
+    """Calls all hooks registered for the given event with the context.
+
+    Exceptions raised by a hook are logged and do not interrupt the request.
+
+    :param dict hooks: dict of event to list of hooks
+    :param event: the event that happened
+    :param dict context: the context passed to the hooks
+    :rtype: None
+    """
+    for hook in hooks.get(event, ()):
+        try:
+            hook(context)
+        except Exception:
+            logging.exception(f'hook {hook} for {event} raised a exception')
+
+
+class RateLimitTracker:
+    """Follows the rate limit bucket of a :class:`~twitchAPI.twitch.Twitch` instance through the
+    :code:`Ratelimit-Remaining` and :code:`Ratelimit-Reset` headers of its responses, so helpers that send a lot of
+    requests can wait for the bucket to refill instead of running into 429 responses.
+
+    Only responses received between :meth:`start` and :meth:`stop` are followed, including the ones of requests made
+    by other threads with the same client.
+
+    :param ~twitchAPI.twitch.Twitch twitch: the client
+    """
+
+    def __init__(self, twitch):
+        self.twitch = twitch
+        self.__lock = threading.Lock()
+        # None while the state of the bucket is unknown
+        self.__remaining: Optional[int] = None
+        self.__reset: float = 0.0
+
+    def __on_receive(self, context: dict) -> None:
+        self.update(context['status'], context['response'].headers)
+
+    def start(self) -> None:
+        """Starts following the responses of the client
+
+        :rtype: None
+        """
+        self.twitch.register_hook(HookEvent.AFTER_RECEIVE, self.__on_receive)
+
+    def stop(self) -> None:
+        """Stops following the responses of the client
+
+        :rtype: None
+        """
+        self.twitch.remove_hook(HookEvent.AFTER_RECEIVE, self.__on_receive)
+
+    def update(self, status: int, headers) -> None:
+        """Updates the state of the bucket from a response
+
+        :param int status: the status code of the response
+        :param headers: the headers of the response
+        :rtype: None
+        """
+        remaining = headers.get('Ratelimit-Remaining')
+        reset = headers.get('Ratelimit-Reset')
+        with self.__lock:
+            if remaining is not None and remaining.isdigit():
+                self.__remaining = int(remaining)
+            try:
+                # dont trust a clock skew for longer than a full bucket refill
+                self.__reset = min(float(reset), time.time() + 60) if reset is not None else self.__reset
+            except ValueError:
+                pass
+            if status == 429:
+                self.__remaining = 0
+                # dont retry right away if the reset is unknown
+                self.__reset = max(self.__reset, time.time() + 1)
+
+    def get_wait_time(self) -> float:
+        """Returns how many seconds to wait till the bucket is refilled, 0 if requests can be sent right away
+
+        :rtype: float
+        """
+        with self.__lock:
+            if self.__remaining is None or self.__remaining > 0:
+                return 0.0
+            return max(self.__reset - time.time(), 0.0)
+
+    def acquire(self, stop: Optional[threading.Event] = None) -> bool:
+        """Blocks till the bucket has room for another request and takes that room
+
+        :param ~threading.Event stop: stop waiting once this is set |default| :code:`None`
+        :return: False if stop was set while waiting
+        :rtype: bool
+        """
+        while True:
+            with self.__lock:
+                now = time.time()
+                if self.__remaining is not None and self.__remaining <= 0 and now >= self.__reset:
+                    # the bucket got refilled, the next response tells how far
+                    self.__remaining = None
+                if self.__remaining is None or self.__remaining > 0:
+                    if self.__remaining is not None:
+                        self.__remaining -= 1
+                    return True
+                wait = self.__reset - now
+            if stop is None:
+                time.sleep(wait)
+            elif stop.wait(wait):
+                return False
+
+
+def iterate_pages(func: Callable[..., dict],
+                  cursor: Optional[str] = None,
+                  cursor_param: str = 'after',
+                  **kwargs) -> Iterator[Tuple[list, Optional[str]]]:
+    """Pages through a paginated endpoint of :class:`~twitchAPI.twitch.Twitch`
+
+    Only one page is kept in memory at a time. The yielded cursor points to the page after the yielded one, store it
+    to resume later on by passing it as cursor.
+
+    :param func: the method of the endpoint, e.g. :meth:`~twitchAPI.twitch.Twitch.get_users_follows`
+    :param str cursor: the cursor to start from, None to start at the first page |default| :code:`None`
+    :param str cursor_param: the name of the cursor parameter of func |default| :code:`after`
+    :param kwargs: all other parameters of func
+    :return: iterator of the data of a page and the cursor of the next page, which is None after the last page
+    :rtype: Iterator[tuple[list, str]]
+    :raises ~twitchAPI.types.TwitchAPIException: if a page contains no data, e.g. because of a error response
+    """
+    while True:
+        kwargs[cursor_param] = cursor
+        result = func(**kwargs)
+        if 'data' not in result:
+            raise TwitchAPIException(f'invalid response while paging: {result}')
+        data = result['data']
+        cursor = result.get('pagination', {}).get('cursor')
+        if len(data) == 0:
+            cursor = None
+        yield data, cursor
+        if cursor is None:
+            return
+
+
 def make_fields_datetime(data: Union[dict, list], fields: List[str]):
     """Itterates over dict or list recursivly to replace string fields with datetime
 
@@ -92,6 +257,7 @@ def make_fields_datetime(data: Union[dict, list], fields: List[str]):
                 if data == "":
                     return None
                 else:
+                    from dateutil import parser as du_parser
                     return du_parser.isoparse(data)
         return data
 
@@ -0,0 +1,250 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Metrics
+-------
+
+Instrumentation of the :class:`~twitchAPI.twitch.Twitch` client.
+
+Set :attr:`~twitchAPI.twitch.Twitch.metrics` to one of the sinks below to record the following metrics.
+All of them are labeled with :code:`endpoint` (e.g. :code:`users/follows`) and :code:`method` where it applies:
+
+=============================================== ===========================================================
+Name                                            Description
+=============================================== ===========================================================
+:code:`twitch_api_requests_total`               counter of requests, also labeled with :code:`status`
+:code:`twitch_api_request_duration_seconds`     histogram of the request latency
+:code:`twitch_api_response_bytes_total`         counter of received bytes
+:code:`twitch_api_retries_total`                counter of retries, labeled with the :code:`reason`
+:code:`twitch_api_token_refreshes_total`        counter of token refreshes
+:code:`twitch_api_ratelimit_waits_total`        counter of waits because the rate limit was hit
+:code:`twitch_api_ratelimit_wait_seconds`       histogram of the time spent waiting for the rate limit
+:code:`twitch_api_ratelimit_remaining`          gauge of the remaining points of the rate limit bucket
+=============================================== ===========================================================
+
+When no sink is set, no timings are taken and nothing is recorded.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.twitch import Twitch
+    from twitchAPI.metrics import PrometheusMetrics
+
+    metrics = PrometheusMetrics()
+    twitch = Twitch('my_app_id', 'my_app_secret')
+    twitch.metrics = metrics
+    twitch.authenticate_app([])
+    twitch.get_users(logins=['teekeks'])
+    # the metrics in the Prometheus text format
+    print(metrics.render())
+
+********************
+Class Documentation:
+********************
+"""
+
+import logging
+import socket
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""Default upper bounds of the histogram buckets in seconds"""
+
+
+class MetricsSink:
+    """Base class of all metric sinks.
+
+    Tags are passed as a dict of label name to value."""
+
+    def increment(self, name: str, value: float = 1, tags: Optional[Dict[str, str]] = None) -> None:
+        """Increments a counter
+
+        :param str name: name of the metric
+        :param float value: the amount to increment by |default| :code:`1`
+        :param dict tags: labels of the metric |default| :code:`None`
+        :rtype: None
+        """
+        raise NotImplementedError()
+
+    def observe(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        """Records a value of a histogram, e.g. a duration in seconds
+
+        :param str name: name of the metric
+        :param float value: the observed value
+        :param dict tags: labels of the metric |default| :code:`None`
+        :rtype: None
+        """
+        raise NotImplementedError()
+
+    def gauge(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        """Sets a gauge to the given value
+
+        :param str name: name of the metric
+        :param float value: the new value
+        :param dict tags: labels of the metric |default| :code:`None`
+        :rtype: None
+        """
+        raise NotImplementedError()
+
+
+def _key(name: str, tags: Optional[Dict[str, str]]) -> Tuple[str, tuple]:
+    return name, tuple(sorted(tags.items())) if tags else ()
+
+
+def _format_labels(labels: tuple) -> str:
+    if len(labels) == 0:
+        return ''
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')) for k, v in labels]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+class PrometheusMetrics(MetricsSink):
+    """Keeps all metrics in memory and renders them in the Prometheus text exposition format
+
+    :param tuple[float] buckets: upper bounds of the histogram buckets |default| :const:`DEFAULT_BUCKETS`
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.__lock = threading.Lock()
+        self.__counters: Dict[tuple, float] = {}
+        self.__gauges: Dict[tuple, float] = {}
+        self.__histograms: Dict[tuple, list] = {}
+
+    def increment(self, name: str, value: float = 1, tags: Optional[Dict[str, str]] = None) -> None:
+        key = _key(name, tags)
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        key = _key(name, tags)
+        with self.__lock:
+            hist = self.__histograms.get(key)
+            if hist is None:
+                # bucket counts, sum, count
+                hist = [[0] * len(self.buckets), 0.0, 0]
+                self.__histograms[key] = hist
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist[0][i] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def gauge(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        with self.__lock:
+            self.__gauges[_key(name, tags)] = value
+
+    def get_counter(self, name: str, tags: Optional[Dict[str, str]] = None) -> float:
+        """Returns the current value of a counter
+
+        :param str name: name of the metric
+        :param dict tags: labels of the metric |default| :code:`None`
+        :rtype: float
+        """
+        with self.__lock:
+            return self.__counters.get(_key(name, tags), 0)
+
+    def render(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format
+
+        :rtype: str
+        """
+        with self.__lock:
+            counters = dict(self.__counters)
+            gauges = dict(self.__gauges)
+            histograms = {k: (list(v[0]), v[1], v[2]) for k, v in self.__histograms.items()}
+        lines: List[str] = []
+        for kind, values in (('counter', counters), ('gauge', gauges)):
+            for name in sorted(set(k[0] for k in values.keys())):
+                lines.append(f'# TYPE {name} {kind}')
+                for (n, labels), value in sorted(values.items()):
+                    if n == name:
+                        lines.append(f'{name}{_format_labels(labels)} {value}')
+        for name in sorted(set(k[0] for k in histograms.keys())):
+            lines.append(f'# TYPE {name} histogram')
+            for (n, labels), (counts, total, count) in sorted(histograms.items()):
+                if n != name:
+                    continue
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {bucket_count}')
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+class StatsDMetrics(MetricsSink):
+    """Sends all metrics via UDP to a StatsD server.
+
+    Histograms are send as timers in milliseconds. Tags are send in the DogStatsD format, set :code:`tags_in_name` to
+    append them to the metric name instead.
+
+    :param str host: host of the StatsD server |default| :code:`localhost`
+    :param int port: port of the StatsD server |default| :code:`8125`
+    :param str prefix: prefix of all metric names |default| :code:`None`
+    :param bool tags_in_name: if true, add the tags to the name instead of using DogStatsD tags |default| :code:`False`
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 8125, prefix: Optional[str] = None,
+                 tags_in_name: bool = False):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.tags_in_name = tags_in_name
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__socket.setblocking(False)
+
+    def __send(self, name: str, value: str, kind: str, tags: Optional[Dict[str, str]]):
+        if self.prefix is not None:
+            name = f'{self.prefix}.{name}'
+        suffix = ''
+        if tags:
+            if self.tags_in_name:
+                name += ''.join(f'.{k}.{str(v).replace(".", "_")}' for k, v in sorted(tags.items()))
+            else:
+                suffix = '|#' + ','.join(f'{k}:{v}' for k, v in sorted(tags.items()))
+        try:
+            self.__socket.sendto(f'{name}:{value}|{kind}{suffix}'.encode('utf-8'), self.address)
+        except OSError as e:
+            # metrics should never break the actual request
+            logging.debug(f'could not send metric {name}: {e}')
+
+    def increment(self, name: str, value: float = 1, tags: Optional[Dict[str, str]] = None) -> None:
+        self.__send(name, f'{value:g}', 'c', tags)
+
+    def observe(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        self.__send(name, f'{value * 1000:.3f}', 'ms', tags)
+
+    def gauge(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        self.__send(name, f'{value:g}', 'g', tags)
+
+    def close(self) -> None:
+        """Closes the socket
+
+        :rtype: None
+        """
+        self.__socket.close()
+
+
+class CallbackMetrics(MetricsSink):
+    """Passes every metric to a function.
+
+    The function is called with the kind of the metric (:code:`counter`, :code:`histogram` or :code:`gauge`), the
+    name, the value and the tags.
+
+    :param callback: the function to call
+    """
+
+    def __init__(self, callback: Callable[[str, str, float, Dict[str, str]], None]):
+        self.callback = callback
+
+    def increment(self, name: str, value: float = 1, tags: Optional[Dict[str, str]] = None) -> None:
+        self.callback('counter', name, value, tags or {})
+
+    def observe(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        self.callback('histogram', name, value, tags or {})
+
+    def gauge(self, name: str, value: float, tags: Optional[Dict[str, str]] = None) -> None:
+        self.callback('gauge', name, value, tags or {})
@@ -0,0 +1,802 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Mock Helix Server
+-----------------
+
+A local stand in for the Twitch API, intended for benchmarking and offline development.
+
+It serves generated but realistic fixtures for every endpoint :class:`~twitchAPI.twitch.Twitch` uses, issues tokens
+through :code:`oauth2/token` and answers subscription requests on the webhook hub.
+
+The following behaviour of the real API is emulated:
+
+- pagination with :code:`first`, :code:`after` and :code:`before` cursors
+- the :code:`Ratelimit-Limit`, :code:`Ratelimit-Remaining` and :code:`Ratelimit-Reset` headers, including a 429
+  response once the bucket is empty
+- expired or invalid tokens result in a 401 response
+- configurable latency and randomly or explicitly injected 401, 429 and 503 responses
+- the CSV reports linked by the analytics endpoints are served by the mock server itself
+- clips can be filtered by :code:`started_at` and :code:`ended_at`, but only a limited amount can be paged through
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.twitch import Twitch
+    from twitchAPI.mock_server import MockHelixServer
+
+    server = MockHelixServer(latency=0.02, seed=1)
+    server.error_rates = {503: 0.01}
+    server.start()
+
+    twitch = Twitch('my_app_id', 'my_app_secret')
+    twitch.base_url = server.base_url
+    twitch.auth_base_url = server.auth_base_url
+    twitch.authenticate_app([])
+    print(twitch.get_users(logins=['teekeks']))
+    # let all tokens expire, the next call will have to refresh its token
+    server.expire_tokens()
+    print(twitch.get_streams(first=100))
+    print(server.stats)
+    server.stop()
+
+To test the :class:`~twitchAPI.webhook.TwitchWebHook` against the mock server, set its
+:attr:`~twitchAPI.webhook.TwitchWebHook.hub_url` to :attr:`MockHelixServer.hub_url`.
+
+The server can also be started from the command line:
+
+.. code-block:: bash
+
+    python -m twitchAPI.mock_server --port 8090 --latency 0.05
+
+********************
+Class Documentation:
+********************
+"""
+
+import asyncio
+import base64
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from typing import Callable, Dict, List, Optional, Union
+
+from aiohttp import web, ClientSession
+from dateutil import parser as du_parser
+
+from .helper import get_uuid
+
+_BASE_TIME = datetime(2020, 9, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _ts(i: int, minutes: int = 17) -> str:
+    return (_BASE_TIME - timedelta(minutes=i * minutes)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _id(i: int, offset: int = 10000000) -> str:
+    return str(offset + i)
+
+
+def _date_range(i: int) -> dict:
+    return {'started_at': _ts(i + 30 * 24 * 60, 1), 'ended_at': _ts(i)}
+
+
+def _user(i: int) -> dict:
+    return {
+        'id': _id(i),
+        'login': f'user_{i}',
+        'display_name': f'User_{i}',
+        'type': '',
+        'broadcaster_type': ['', 'affiliate', 'partner'][i % 3],
+        'description': f'Just a generated user number {i}',
+        'profile_image_url': f'https://static-cdn.jtvnw.net/jtv_user_pictures/user_{i}-profile_image-300x300.png',
+        'offline_image_url': f'https://static-cdn.jtvnw.net/jtv_user_pictures/user_{i}-channel_offline_image.png',
+        'view_count': (i * 7919) % 1000000,
+        'email': f'user_{i}@example.com'
+    }
+
+
+def _game(i: int) -> dict:
+    return {'id': _id(i, 20000), 'name': f'Game {i}',
+            'box_art_url': f'https://static-cdn.jtvnw.net/ttv-boxart/Game%20{i}-{{width}}x{{height}}.jpg'}
+
+
+def _stream(i: int) -> dict:
+    return {
+        'id': _id(i, 30000000000),
+        'user_id': _id(i),
+        'user_name': f'User_{i}',
+        'game_id': _id(i % 50, 20000),
+        'type': 'live',
+        'title': f'Generated stream {i}',
+        'viewer_count': max(0, 50000 - i * 37),
+        'started_at': _ts(i, 3),
+        'language': ['en', 'de', 'es', 'fr'][i % 4],
+        'thumbnail_url': f'https://static-cdn.jtvnw.net/previews-ttv/live_user_user_{i}-{{width}}x{{height}}.jpg',
+        'tag_ids': ['6ea6bca4-4712-4ab9-a906-e3336a9d8039']
+    }
+
+
+def _clip(i: int) -> dict:
+    return {
+        'id': f'GeneratedClip{i}',
+        'url': f'https://clips.twitch.tv/GeneratedClip{i}',
+        'embed_url': f'https://clips.twitch.tv/embed?clip=GeneratedClip{i}',
+        'broadcaster_id': _id(i % 100),
+        'broadcaster_name': f'User_{i % 100}',
+        'creator_id': _id(i + 1000),
+        'creator_name': f'User_{i + 1000}',
+        'video_id': _id(i, 700000000),
+        'game_id': _id(i % 50, 20000),
+        'language': 'en',
+        'title': f'Generated clip {i}',
+        'view_count': max(0, 100000 - i * 11),
+        'created_at': _ts(i),
+        'thumbnail_url': f'https://clips-media-assets2.twitch.tv/{i}-preview-480x272.jpg'
+    }
+
+
+def _video(i: int) -> dict:
+    return {
+        'id': _id(i, 700000000),
+        'user_id': _id(i % 100),
+        'user_name': f'User_{i % 100}',
+        'title': f'Generated video {i}',
+        'description': '',
+        'created_at': _ts(i, 60),
+        'published_at': _ts(i, 60),
+        'url': f'https://www.twitch.tv/videos/{_id(i, 700000000)}',
+        'thumbnail_url': f'https://static-cdn.jtvnw.net/s3_vods/{i}/thumb/thumb0-%{{width}}x%{{height}}.jpg',
+        'viewable': 'public',
+        'view_count': (i * 613) % 50000,
+        'language': 'en',
+        'type': ['archive', 'highlight', 'upload'][i % 3],
+        'duration': f'{1 + i % 5}h{i % 60}m{i % 60}s'
+    }
+
+
+def _follow(i: int) -> dict:
+    return {'from_id': _id(i + 1), 'from_name': f'User_{i + 1}', 'to_id': _id(0), 'to_name': 'User_0',
+            'followed_at': _ts(i)}
+
+
+def _moderation_event(event_type: str, data: dict) -> Callable[[int], dict]:
+    def make(i: int) -> dict:
+        return {
+            'id': f'1{i:026d}',
+            'event_type': event_type,
+            'event_timestamp': _ts(i),
+            'version': '1.0',
+            'event_data': dict(data, user_id=_id(i + 1), user_name=f'User_{i + 1}')
+        }
+    return make
+
+
+def _tag(i: int) -> dict:
+    return {
+        'tag_id': f'{i:08x}-0000-4000-8000-000000000000',
+        'is_auto': i % 5 == 0,
+        'localization_names': {'en-us': f'Tag {i}'},
+        'localization_descriptions': {'en-us': f'Generated tag number {i}'}
+    }
+
+
+def _hype_train_event(i: int) -> dict:
+    return {
+        'id': f'1b0AsbInCHZW2SQFQkCzqN07Ib{i}',
+        'event_type': 'hypetrain.progression',
+        'event_timestamp': _ts(i),
+        'version': '1.0',
+        'event_data': {
+            'broadcaster_id': _id(0),
+            'cooldown_end_time': _ts(i - 60),
+            'expires_at': _ts(i - 5),
+            'goal': 1800,
+            'id': f'70f0c7d8-ff60-4c50-b138-f3a352833b{i % 100:02d}',
+            'last_contribution': {'total': 200, 'type': 'BITS', 'user': _id(i + 1)},
+            'level': 1 + i % 5,
+            'started_at': _ts(i),
+            'top_contributions': [{'total': 600, 'type': 'BITS', 'user': _id(i + 2)}],
+            'total': 600
+        }
+    }
+
+
+_TEMPLATES = {
+    'analytics/extensions': lambda i: {'extension_id': f'ext{i}', 'URL': f'https://example.com/ext{i}.csv',
+                                       'type': 'overview_v2', 'date_range': _date_range(i)},
+    'analytics/games': lambda i: {'game_id': _id(i, 20000), 'URL': f'https://example.com/game{i}.csv',
+                                  'type': 'overview_v2', 'date_range': _date_range(i)},
+    'bits/leaderboard': lambda i: {'user_id': _id(i), 'user_name': f'User_{i}', 'rank': i + 1,
+                                   'score': max(1, 100000 - i * 97)},
+    'bits/cheermotes': lambda i: {'prefix': f'Cheer{i}', 'type': 'global_first_party', 'order': i + 1,
+                                  'last_updated': _ts(i), 'is_charitable': False, 'tiers': [
+                                      {'min_bits': 1, 'id': '1', 'color': '#979797', 'can_cheer': True,
+                                       'show_in_bits_card': True, 'images': {}}]},
+    'extensions/transactions': lambda i: {
+        'id': f'74c52265-e214-48a6-91b9-{i:012d}', 'timestamp': _ts(i), 'broadcaster_id': _id(0),
+        'broadcaster_name': 'User_0', 'user_id': _id(i + 1), 'user_name': f'User_{i + 1}',
+        'product_type': 'BITS_IN_EXTENSION',
+        'product_data': {'domain': 'twitch.ext.ext0', 'sku': f'sku{i % 10}',
+                         'cost': {'amount': 100, 'type': 'bits'}, 'inDevelopment': False,
+                         'displayName': f'Product {i % 10}', 'expiration': '', 'broadcast': True}},
+    'clips': _clip,
+    'games/top': _game,
+    'games': _game,
+    'moderation/banned/events': _moderation_event('moderation.user.ban', {
+        'broadcaster_id': _id(0), 'broadcaster_name': 'User_0', 'expires_at': ''}),
+    'moderation/banned': lambda i: {'user_id': _id(i + 1), 'user_name': f'User_{i + 1}', 'expires_at': ''},
+    'moderation/moderators': lambda i: {'user_id': _id(i + 1), 'user_name': f'User_{i + 1}'},
+    'moderation/moderators/events': _moderation_event('moderation.moderator.add', {
+        'broadcaster_id': _id(0), 'broadcaster_name': 'User_0'}),
+    'streams': _stream,
+    'streams/markers': lambda i: {'user_id': _id(0), 'user_name': 'User_0', 'videos': [
+        {'video_id': _id(i, 700000000), 'markers': [
+            {'id': f'marker{i}', 'created_at': _ts(i), 'description': f'Marker {i}', 'position_seconds': 60 * i,
+             'URL': f'https://twitch.tv/videos/{_id(i, 700000000)}?t=1m'}]}]},
+    'subscriptions': lambda i: {'broadcaster_id': _id(0), 'broadcaster_name': 'User_0', 'is_gift': i % 4 == 0,
+                                'tier': ['1000', '2000', '3000'][i % 3], 'plan_name': 'Channel Subscription',
+                                'user_id': _id(i + 1), 'user_name': f'User_{i + 1}'},
+    'tags/streams': _tag,
+    'streams/tags': _tag,
+    'users': _user,
+    'users/follows': _follow,
+    'users/extensions/list': lambda i: {'id': f'ext{i}', 'version': '1.0.0', 'name': f'Extension {i}',
+                                        'can_activate': True, 'type': ['component', 'panel', 'overlay'][i % 3:]},
+    'videos': _video,
+    'webhooks/subscriptions': lambda i: {'topic': f'https://api.twitch.tv/helix/streams?user_id={_id(i)}',
+                                         'callback': f'https://example.com/streams?uuid={get_uuid()}',
+                                         'expires_at': _ts(-24 * 60 - i, 1)},
+    'channels': lambda i: {'broadcaster_id': _id(i), 'broadcaster_name': f'User_{i}', 'broadcaster_language': 'en',
+                           'game_id': _id(i % 50, 20000), 'game_name': f'Game {i % 50}',
+                           'title': f'Generated stream {i}'},
+    'search/channels': lambda i: {'broadcaster_language': 'en', 'display_name': f'User_{i}', 'game_id': _id(i, 20000),
+                                  'id': _id(i), 'is_live': i % 2 == 0, 'tags_ids': [],
+                                  'thumbnail_url': f'https://static-cdn.jtvnw.net/user_{i}-300x300.png',
+                                  'title': f'Generated stream {i}', 'started_at': _ts(i) if i % 2 == 0 else ''},
+    'search/categories': _game,
+    'streams/key': lambda i: {'stream_key': f'live_{i}_generatedstreamkey'},
+    'hypetrain/events': _hype_train_event,
+    'entitlements/drops': lambda i: {'id': f'fb78259e-fb81-4d1b-8333-{i:012d}', 'user_id': _id(i + 1),
+                                     'game_id': _id(0, 20000), 'timestamp': _ts(i)}
+}
+
+_LOOKUPS = {
+    'users': {'id': 'id', 'login': 'login'},
+    'games': {'id': 'id', 'name': 'name'},
+    'channels': {'broadcaster_id': 'broadcaster_id'},
+    'clips': {'id': 'id'},
+    'videos': {'id': 'id'}
+}
+"""query parameters that look up specific items, the mock creates matching items for every requested value"""
+
+_FILTERS = {
+    'streams': ['user_id', 'game_id', 'language'],
+    'users/follows': ['from_id', 'to_id'],
+    'moderation/moderators': ['user_id'],
+    'moderation/banned': ['user_id'],
+    'subscriptions': ['user_id'],
+    'entitlements/drops': ['user_id'],
+    'clips': ['broadcaster_id', 'game_id'],
+    'videos': ['user_id', 'game_id']
+}
+"""query parameters that filter the fixtures by an equal field"""
+
+_TOTALS = ['users/follows', 'webhooks/subscriptions', 'bits/leaderboard']
+"""endpoints that return a total field"""
+
+
+class MockHelixServer:
+    """A local mock of the Twitch Helix API
+
+    :param str host: the host to listen on |default| :code:`localhost`
+    :param int port: the port to listen on, 0 picks a free port |default| :code:`0`
+    :param float latency: seconds every response is delayed |default| :code:`0.0`
+    :param int fixture_size: amount of generated items for every endpoint |default| :code:`1000`
+    :param int seed: seed of the random generator used for jitter and error injection |default| :code:`None`
+    :var float latency: seconds every response is delayed
+    :var float latency_jitter: random extra delay of up to this amount of seconds |default| :code:`0.0`
+    :var dict[int,float] error_rates: probability of answering a request with the given status instead,
+                    supports 401, 429 and 503 |default| :code:`{}`
+    :var int ratelimit_limit: size of the rate limit bucket |default| :code:`800`
+    :var int ratelimit_window: seconds after which the rate limit bucket is refilled |default| :code:`60`
+    :var bool require_auth: if true, all Helix requests need a valid token |default| :code:`True`
+    :var bool hub_handshake: if true, the webhook hub sends the subscription challenge to the callback
+                    |default| :code:`True`
+    :var int hub_lease_seconds: the lease seconds send with the challenge |default| :code:`864000`
+    :var int report_rows: amount of rows of the generated analytics CSV reports |default| :code:`1000`
+    :var int clip_result_cap: maximum amount of clips that can be paged through per query |default| :code:`1000`
+    :var ~collections.Counter stats: count of handled requests by :code:`METHOD path` and by status code and the
+            amount of client :code:`connections` that sent Helix requests
+    """
+
+    def __init__(self,
+                 host: str = 'localhost',
+                 port: int = 0,
+                 latency: float = 0.0,
+                 fixture_size: int = 1000,
+                 seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_jitter: float = 0.0
+        self.error_rates: Dict[int, float] = {}
+        self.ratelimit_limit: int = 800
+        self.ratelimit_window: int = 60
+        self.require_auth: bool = True
+        self.hub_handshake: bool = True
+        self.hub_lease_seconds: int = 864000
+        self.report_rows: int = 1000
+        self.clip_result_cap: int = 1000
+        self.stats = Counter()
+        self.__peers = set()
+        self.__random = random.Random(seed)
+        self.__fixtures: Dict[str, list] = {path: [make(i) for i in range(fixture_size)]
+                                            for path, make in _TEMPLATES.items()}
+        self.__hub_subscriptions: Dict[str, dict] = {}
+        self.__injected: List[list] = []
+        self.__access_tokens = set()
+        self.__refresh_tokens = set()
+        self.__buckets: Dict[str, list] = {}
+        self.__lock = threading.Lock()
+        self.__runner: Optional['web.AppRunner'] = None
+        self.__session: Optional['ClientSession'] = None
+        self.__loop: Optional['asyncio.AbstractEventLoop'] = None
+        self.__thread: Optional['threading.Thread'] = None
+        self.__tasks = set()
+
+    # ==================================================================================================================
+    # configuration
+    # ==================================================================================================================
+
+    @property
+    def url(self) -> str:
+        """The root URL of the running server"""
+        return f'http://{self.host}:{self.port}/'
+
+    @property
+    def base_url(self) -> str:
+        """The URL to use as :attr:`~twitchAPI.twitch.Twitch.base_url`"""
+        return self.url + 'helix/'
+
+    @property
+    def auth_base_url(self) -> str:
+        """The URL to use as :attr:`~twitchAPI.twitch.Twitch.auth_base_url`"""
+        return self.url
+
+    @property
+    def hub_url(self) -> str:
+        """The URL to use as :attr:`~twitchAPI.webhook.TwitchWebHook.hub_url`"""
+        return self.base_url + 'webhooks/hub'
+
+    def set_fixture(self, path: str, data: List[dict]) -> None:
+        """Replaces the generated fixture of a endpoint
+
+        :param str path: the path of the endpoint relative to the Helix root, e.g. :code:`users/follows`
+        :param list[dict] data: the items this endpoint should return
+        :rtype: None
+        """
+        self.__fixtures[path] = data
+
+    def inject_error(self, status: int, count: int = 1, path: Optional[str] = None) -> None:
+        """Answers the next requests with the given status code
+
+        :param int status: the status code to respond with, e.g. 401, 429 or 503
+        :param int count: how many requests should receive this status |default| :code:`1`
+        :param str path: only affect requests to this endpoint, None affects all |default| :code:`None`
+        :rtype: None
+        """
+        with self.__lock:
+            self.__injected.append([status, count, path])
+
+    def issue_token(self) -> tuple:
+        """Creates a new valid user access and refresh token
+
+        :return: access_token, refresh_token
+        :rtype: (str, str)
+        """
+        access_token = get_uuid().hex
+        refresh_token = get_uuid().hex
+        with self.__lock:
+            self.__access_tokens.add(access_token)
+            self.__refresh_tokens.add(refresh_token)
+        return access_token, refresh_token
+
+    def expire_tokens(self) -> None:
+        """Invalidates all issued access tokens, refresh tokens stay valid
+
+        :rtype: None
+        """
+        with self.__lock:
+            self.__access_tokens.clear()
+
+    # ==================================================================================================================
+    # request handling
+    # ==================================================================================================================
+
+    def __take_injected(self, path: str) -> Optional[int]:
+        with self.__lock:
+            for entry in self.__injected:
+                if entry[2] is None or entry[2] == path:
+                    entry[1] -= 1
+                    if entry[1] <= 0:
+                        self.__injected.remove(entry)
+                    return entry[0]
+        for status, rate in self.error_rates.items():
+            if self.__random.random() < rate:
+                return status
+        return None
+
+    def __ratelimit(self, key: str) -> tuple:
+        """takes a point from the bucket of key, returns the rate limit headers and if the request is allowed"""
+        now = time.time()
+        with self.__lock:
+            bucket = self.__buckets.get(key)
+            if bucket is None or bucket[1] <= now:
+                bucket = [self.ratelimit_limit, now + self.ratelimit_window]
+                self.__buckets[key] = bucket
+            allowed = bucket[0] > 0
+            if allowed:
+                bucket[0] -= 1
+            return {'Ratelimit-Limit': str(self.ratelimit_limit),
+                    'Ratelimit-Remaining': str(bucket[0]),
+                    'Ratelimit-Reset': str(math.ceil(bucket[1]))}, allowed
+
+    @staticmethod
+    def __error(status: int, message: str, headers: Optional[dict] = None) -> 'web.Response':
+        return web.json_response({'error': HTTPStatus(status).phrase,
+                                  'status': status,
+                                  'message': message},
+                                 status=status,
+                                 headers=headers)
+
+    async def __delay(self):
+        delay = self.latency + (self.__random.random() * self.latency_jitter if self.latency_jitter > 0 else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def __encode_cursor(offset: int) -> str:
+        return base64.urlsafe_b64encode(f'offset:{offset}'.encode('utf-8')).decode('utf-8')
+
+    @staticmethod
+    def __decode_cursor(cursor: str) -> int:
+        return int(base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8').split(':')[1])
+
+    @staticmethod
+    def __lookup_index(value: str) -> int:
+        return int(hashlib.md5(value.encode('utf-8')).hexdigest()[:6], 16) % 1000
+
+    @staticmethod
+    def __timestamp(value: str) -> str:
+        return du_parser.isoparse(value).astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def __select(self, path: str, query) -> list:
+        lookups = _LOOKUPS.get(path, {})
+        requested = [(param, value) for param in lookups.keys() for value in query.getall(param, [])]
+        if len(requested) > 0:
+            items = []
+            for param, value in requested:
+                item = _TEMPLATES[path](self.__lookup_index(value))
+                item[lookups[param]] = value
+                items.append(item)
+            return items
+        items = self.__fixtures.get(path, [])
+        if path == 'webhooks/subscriptions' and len(self.__hub_subscriptions) > 0:
+            items = list(self.__hub_subscriptions.values())
+        for field in _FILTERS.get(path, []):
+            values = query.getall(field, [])
+            if len(values) > 0:
+                matching = [dict(i) for i in items if i.get(field) in values]
+                if len(matching) == 0 and path == 'users/follows':
+                    # make every user follow and be followed by someone
+                    matching = [dict(i, **{field: values[0]}) for i in items]
+                items = matching
+        if path == 'clips':
+            # the generated timestamps are all in the same format and can be compared as string
+            if query.get('started_at') is not None:
+                started_at = self.__timestamp(query.get('started_at'))
+                items = [i for i in items if i['created_at'] >= started_at]
+            if query.get('ended_at') is not None:
+                ended_at = self.__timestamp(query.get('ended_at'))
+                items = [i for i in items if i['created_at'] < ended_at]
+            # like the real API, only a limited amount of clips can be paged through per query
+            items = items[:self.clip_result_cap]
+        return items
+
+    def __paginate(self, items: list, query) -> Union[dict, 'web.Response']:
+        try:
+            first = int(query.get('first', 20))
+            if query.get('after') is not None:
+                offset = self.__decode_cursor(query.get('after'))
+            elif query.get('before') is not None:
+                offset = max(0, self.__decode_cursor(query.get('before')) - 2 * first)
+            else:
+                offset = 0
+        except (ValueError, IndexError):
+            return self.__error(400, 'invalid pagination parameter')
+        if first < 1 or first > 100:
+            return self.__error(400, 'first must be between 1 and 100')
+        page = items[offset:offset + first]
+        pagination = {}
+        if offset + first < len(items):
+            pagination['cursor'] = self.__encode_cursor(offset + first)
+        return {'data': page, 'pagination': pagination}
+
+    def __build_get_response(self, path: str, request: 'web.Request') -> Union[dict, 'web.Response']:
+        query = request.rel_url.query
+        if path == 'entitlements/codes':
+            return {'data': [{'code': c, 'status': 'UNUSED'} for c in query.getall('code', [])]}
+        if path == 'users/extensions':
+            return {'data': {'panel': {'1': {'active': True, 'id': 'ext0', 'version': '1.0.0', 'name': 'Extension 0'}},
+                             'overlay': {'1': {'active': False}},
+                             'component': {'1': {'active': False}, '2': {'active': False}}}}
+        items = self.__select(path, query)
+        if path.startswith('analytics/'):
+            # link to the reports served by this server instead of the placeholder URL of the fixture
+            items = [dict(i, URL=f'{self.url}reports/{i.get("game_id", i.get("extension_id"))}.csv') for i in items]
+        if path in _LOOKUPS.keys() and any(query.get(p) is not None for p in _LOOKUPS[path].keys()):
+            return {'data': items}
+        result = self.__paginate(items, query)
+        if isinstance(result, web.Response):
+            return result
+        if path in _TOTALS:
+            result['total'] = len(items)
+        if path == 'bits/leaderboard':
+            result['date_range'] = _date_range(0)
+            result.pop('pagination', None)
+        return result
+
+    async def __build_write_response(self, method: str, path: str, request: 'web.Request') -> 'web.Response':
+        query = request.rel_url.query
+        body = None
+        if request.body_exists and request.content_type == 'application/json':
+            body = await request.json()
+        if method == 'POST' and path == 'clips':
+            clip_id = f'GeneratedClip{self.__random.randint(0, 1000000)}'
+            return web.json_response({'data': [{'id': clip_id,
+                                                'edit_url': f'https://clips.twitch.tv/{clip_id}/edit'}]},
+                                     status=202)
+        if method == 'POST' and path == 'entitlements/upload':
+            return web.json_response({'data': [{'url': f'https://example.com/upload/{get_uuid()}'}]})
+        if method == 'POST' and path == 'entitlements/code':
+            return web.json_response({'data': [{'code': c, 'status': 'SUCCESSFULLY_REDEEMED'}
+                                               for c in query.getall('code', [])]})
+        if method == 'POST' and path == 'moderation/enforcements/status':
+            return web.json_response({'data': [{'msg_id': m.get('msg_id'),
+                                                'is_permitted': self.__lookup_index(m.get('msg_text', '')) % 10 != 0}
+                                               for m in (body or {}).get('data', [])]})
+        if method == 'POST' and path == 'streams/markers':
+            return web.json_response({'data': [{'id': f'marker{self.__random.randint(0, 1000000)}',
+                                                'created_at': _ts(0),
+                                                'description': (body or {}).get('description', ''),
+                                                'position_seconds': 244}]})
+        if method == 'POST' and path == 'channels/commercial':
+            return web.json_response({'data': [{'length': int(query.get('length', 30)),
+                                                'message': '',
+                                                'retry_after': 480}]})
+        if method == 'PUT' and path == 'users':
+            user = _user(0)
+            user['description'] = query.get('description', '')
+            return web.json_response({'data': [user]})
+        if method == 'PUT' and path == 'users/extensions':
+            return web.json_response(body or {'data': {}})
+        if (method, path) in (('PUT', 'streams/tags'), ('PATCH', 'channels'), ('POST', 'users/follows'),
+                              ('DELETE', 'users/follows')):
+            return web.Response(status=204)
+        return self.__error(404, 'Not Found')
+
+    def __check_auth(self, request: 'web.Request') -> bool:
+        if not self.require_auth:
+            return True
+        auth = request.headers.get('Authorization', '')
+        if not auth.startswith('Bearer '):
+            return False
+        with self.__lock:
+            return auth[len('Bearer '):] in self.__access_tokens
+
+    async def __handle_helix(self, request: 'web.Request') -> 'web.Response':
+        path = request.match_info['path'].strip('/')
+        method = request.method
+        self.stats[f'{method} {path}'] += 1
+        peer = request.transport.get_extra_info('peername') if request.transport is not None else None
+        if peer is not None and peer not in self.__peers:
+            self.__peers.add(peer)
+            self.stats['connections'] += 1
+        await self.__delay()
+        response = await self.__respond(method, path, request)
+        self.stats[response.status] += 1
+        return response
+
+    async def __respond(self, method: str, path: str, request: 'web.Request') -> 'web.Response':
+        if path == 'webhooks/hub' and method == 'POST':
+            return await self.__handle_hub(request)
+        if request.headers.get('Client-ID') is None:
+            return self.__error(400, 'Client-ID header required')
+        if not self.__check_auth(request):
+            return self.__error(401, 'Invalid OAuth token')
+        headers, allowed = self.__ratelimit(request.headers.get('Authorization', request.headers.get('Client-ID')))
+        injected = self.__take_injected(path)
+        if injected == 429 or not allowed:
+            return self.__error(429, 'Too Many Requests', dict(headers, **{'Ratelimit-Remaining': '0'}))
+        if injected is not None:
+            return self.__error(injected, HTTPStatus(injected).phrase, headers)
+        if method == 'GET':
+            result = self.__build_get_response(path, request)
+            if isinstance(result, web.Response):
+                return result
+            if path not in _TEMPLATES.keys() and path not in ('entitlements/codes', 'users/extensions'):
+                return self.__error(404, 'Not Found', headers)
+            return web.json_response(result, headers=headers)
+        response = await self.__build_write_response(method, path, request)
+        response.headers.update(headers)
+        return response
+
+    async def __handle_token(self, request: 'web.Request') -> 'web.Response':
+        self.stats['POST oauth2/token'] += 1
+        await self.__delay()
+        params = dict(request.rel_url.query)
+        if request.body_exists:
+            params.update(await request.post())
+        grant_type = params.get('grant_type')
+        if grant_type == 'refresh_token':
+            with self.__lock:
+                valid = params.get('refresh_token') in self.__refresh_tokens
+                if valid:
+                    self.__refresh_tokens.discard(params.get('refresh_token'))
+            if not valid:
+                return self.__error(400, 'Invalid refresh token')
+        elif grant_type not in ('client_credentials', 'authorization_code'):
+            return self.__error(400, 'Invalid grant type')
+        access_token, refresh_token = self.issue_token()
+        data = {'access_token': access_token,
+                'expires_in': 14400,
+                'scope': params.get('scope', '').split(' ') if params.get('scope') else [],
+                'token_type': 'bearer'}
+        if grant_type != 'client_credentials':
+            data['refresh_token'] = refresh_token
+        return web.json_response(data)
+
+    async def __handle_report(self, request: 'web.Request') -> 'web.StreamResponse':
+        self.stats['GET report'] += 1
+        await self.__delay()
+        response = web.StreamResponse(headers={'Content-Type': 'text/csv'})
+        await response.prepare(request)
+        name = request.match_info['name']
+        await response.write(b'Date,ID,Live Views,Unique Viewers,Minutes Watched,Average Rating,Notes\n')
+        for start in range(0, self.report_rows, 100):
+            chunk = ''.join(f'{_ts(i, 24 * 60)},{name},{(i * 37) % 5000},{(i * 13) % 900},{(i * 211) % 90000},'
+                            f'{(i % 50) / 10},"row {i}, generated"\n'
+                            for i in range(start, min(start + 100, self.report_rows)))
+            await response.write(chunk.encode('utf-8'))
+        await response.write_eof()
+        return response
+
+    async def __hub_handshake(self, callback: str, mode: str, topic: str):
+        challenge = get_uuid().hex
+        params = {'hub.challenge': challenge, 'hub.mode': mode, 'hub.topic': topic,
+                  'hub.lease_seconds': str(self.hub_lease_seconds)}
+        try:
+            async with self.__session.get(callback, params=params) as response:
+                if await response.text() != challenge:
+                    logging.warning(f'mock hub: wrong challenge response from {callback}')
+                    return
+        except Exception as e:
+            logging.warning(f'mock hub: challenge to {callback} failed: {e}')
+            return
+        if mode == 'subscribe':
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.hub_lease_seconds)
+            self.__hub_subscriptions[callback] = {'topic': topic,
+                                                  'callback': callback,
+                                                  'expires_at': expires_at.strftime('%Y-%m-%dT%H:%M:%SZ')}
+        else:
+            self.__hub_subscriptions.pop(callback, None)
+
+    async def __handle_hub(self, request: 'web.Request') -> 'web.Response':
+        data = await request.json() if request.content_type == 'application/json' else await request.post()
+        if data.get('hub.callback') is None or data.get('hub.mode') not in ('subscribe', 'unsubscribe'):
+            return self.__error(400, 'hub.callback and hub.mode are required')
+        if self.hub_handshake:
+            task = asyncio.ensure_future(self.__hub_handshake(data['hub.callback'],
+                                                              data['hub.mode'],
+                                                              data.get('hub.topic')))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+        return web.Response(status=202)
+
+    # ==================================================================================================================
+    # running the server
+    # ==================================================================================================================
+
+    def __build_app(self) -> 'web.Application':
+        app = web.Application()
+        app.add_routes([web.post('/oauth2/token', self.__handle_token),
+                        web.get('/reports/{name}.csv', self.__handle_report),
+                        web.route('*', '/helix/{path:.*}', self.__handle_helix)])
+        return app
+
+    async def start_async(self) -> None:
+        """Starts the server on the current event loop
+
+        :rtype: None
+        """
+        self.__session = ClientSession()
+        self.__runner = web.AppRunner(self.__build_app())
+        await self.__runner.setup()
+        await web.TCPSite(self.__runner, self.host, self.port).start()
+        self.port = self.__runner.addresses[0][1]
+        logging.info(f'started mock helix server on {self.url}')
+
+    async def stop_async(self) -> None:
+        """Stops a server started with :meth:`start_async`
+
+        :rtype: None
+        """
+        if len(self.__tasks) > 0:
+            await asyncio.gather(*self.__tasks, return_exceptions=True)
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+        if self.__runner is not None:
+            await self.__runner.cleanup()
+            self.__runner = None
+
+    def __run(self, started: 'threading.Event'):
+        self.__loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.__loop)
+        self.__loop.run_until_complete(self.start_async())
+        started.set()
+        self.__loop.run_forever()
+        self.__loop.run_until_complete(self.stop_async())
+        self.__loop.close()
+
+    def start(self) -> None:
+        """Starts the server in its own thread
+
+        :rtype: None
+        """
+        started = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, args=(started,), daemon=True)
+        self.__thread.start()
+        started.wait()
+
+    def stop(self) -> None:
+        """Stops a server started with :meth:`start`
+
+        :rtype: None
+        """
+        if self.__loop is not None:
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.__thread.join()
+            self.__loop = None
+            self.__thread = None
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Local mock of the Twitch Helix API')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--fixture-size', type=int, default=1000)
+    parser.add_argument('--no-auth', action='store_true', help='do not require a valid token')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = MockHelixServer(args.host, args.port, args.latency, args.fixture_size)
+    server.require_auth = not args.no_auth
+    main_loop = asyncio.get_event_loop()
+    main_loop.run_until_complete(server.start_async())
+    try:
+        main_loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        main_loop.run_until_complete(server.stop_async())
@@ -41,9 +41,8 @@ Class Documentation:
 from .twitch import Twitch
 from .helper import build_url, build_scope, get_uuid, TWITCH_AUTH_BASE_URL
 from .types import AuthScope
-from typing import List, Union
+from typing import List, Union, TYPE_CHECKING
 import webbrowser
-from aiohttp import web
 import asyncio
 from threading import Thread
 from time import sleep
@@ -51,10 +50,15 @@ from os import path
 import requests
 from concurrent.futures._base import CancelledError
 
+if TYPE_CHECKING:
+    # aiohttp.web is slow to import and only needed for the local server of the user authentication flow
+    from aiohttp import web
+
 
 def refresh_access_token(refresh_token: str,
                          app_id: str,
-                         app_secret: str):
+                         app_secret: str,
+                         auth_base_url: str = TWITCH_AUTH_BASE_URL):
     """Simple helper function for refreshing a user access token.
 
     :param refresh_token: the current refresh_token
@@ -63,6 +67,8 @@ def refresh_access_token(refresh_token: str,
     :type app_id: str
     :param app_secret: the secret key of your app
     :type app_secret: str
+    :param auth_base_url: The URL of the Twitch authentication API |default| :code:`https://id.twitch.tv/`
+    :type auth_base_url: str
     :return: access_token, refresh_token
     :rtype: (str, str)
     """
@@ -72,7 +78,7 @@ def refresh_access_token(refresh_token: str,
         'grant_type': 'refresh_token',
         'client_secret': app_secret
     }
-    url = build_url(TWITCH_AUTH_BASE_URL + 'oauth2/token', {})
+    url = build_url(auth_base_url + 'oauth2/token', {})
     result = requests.post(url, data=param)
     data = result.json()
     return data['access_token'], data['refresh_token']
@@ -125,9 +131,10 @@ class UserAuthenticator:
             'force_verify': str(self.force_verify).lower(),
             'state': self.__state
         }
-        return build_url(TWITCH_AUTH_BASE_URL + 'oauth2/authorize', params)
+        return build_url(self.__twitch.auth_base_url + 'oauth2/authorize', params)
 
     def __build_runner(self):
+        from aiohttp import web
         app = web.Application()
         app.add_routes([web.get('/', self.__handle_callback)])
         return web.AppRunner(app)
@@ -146,6 +153,7 @@ class UserAuthenticator:
         self.__loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.__loop)
         self.__loop.run_until_complete(runner.setup())
+        from aiohttp import web
         site = web.TCPSite(runner, self.url, self.port)
         self.__loop.run_until_complete(site.start())
         self.__server_running = True
@@ -166,6 +174,7 @@ class UserAuthenticator:
         self.__can_close = True
 
     async def __handle_callback(self, request: 'web.Request'):
+        from aiohttp import web
         val = request.rel_url.query.get('state')
         # invalid state!
         if val != self.__state:
@@ -209,7 +218,7 @@ class UserAuthenticator:
             'grant_type': 'authorization_code',
             'redirect_uri': f'http://{self.url}:{self.port}'
         }
-        url = build_url(TWITCH_AUTH_BASE_URL + 'oauth2/token', param)
+        url = build_url(self.__twitch.auth_base_url + 'oauth2/token', param)
         response = requests.post(url)
         data = response.json()
         if callback_func is None:
@@ -0,0 +1,610 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Polling helpers
+---------------
+
+Helpers for efficiently polling the Twitch API for changes.
+
+*************
+Stream Change
+*************
+
+:class:`StreamTracker` polls :meth:`~twitchAPI.twitch.Twitch.get_streams` for a large number of broadcasters and only
+reports what changed: streams going online or offline and changes of the tracked fields of live streams.
+
+Broadcasters are polled in batches of 100 ids, so tracking 5000 broadcasters takes 50 requests per poll.
+The poll interval adapts to the amount of changes: it shrinks towards :code:`min_interval` while streams change and
+grows towards :code:`max_interval` while nothing happens.
+
+Only a small tuple of the tracked fields is kept per live broadcaster. Nothing is emitted or reallocated for streams
+that did not change.
+
+.. code-block:: python
+
+    from twitchAPI.twitch import Twitch
+    from twitchAPI.polling import StreamTracker
+    from twitchAPI.types import StreamChangeType
+
+    def on_change(change):
+        if change.type == StreamChangeType.ONLINE:
+            print(f'{change.user_id} went live: {change.stream["title"]}')
+        elif change.type == StreamChangeType.OFFLINE:
+            print(f'{change.user_id} went offline')
+        else:
+            print(f'{change.user_id} changed {change.changed_fields}')
+
+    twitch = Twitch('my_app_id', 'my_app_secret')
+    twitch.authenticate_app([])
+    tracker = StreamTracker(twitch, ['1234', '5678'], on_change)
+    tracker.start()
+    # do other things
+    tracker.stop()
+
+**************
+Poll Scheduler
+**************
+
+:class:`PollScheduler` polls streams and the hype train, ban and moderator events of channels. Instead of fixed
+sleeps, each resource gets its own interval depending on how often it changed recently and its priority, while the
+total amount of requests stays within a configurable budget.
+
+********************
+Class Documentation:
+********************
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from .helper import RateLimitTracker
+from .twitch import Twitch
+from .types import StreamChangeType, PollResourceType, TwitchAPIException
+
+DEFAULT_STREAM_FIELDS = ('id', 'game_id', 'title', 'viewer_count', 'tag_ids')
+"""Fields of a stream that are tracked for changes by default"""
+
+
+def _snapshot(stream: Optional[dict], fields: Tuple[str, ...]) -> Optional[tuple]:
+    """the tracked fields of a stream, lists are stored as tuples so the snapshot is immutable and compared by value"""
+    if stream is None:
+        return None
+    values = tuple(stream.get(f) for f in fields)
+    if any(isinstance(v, list) for v in values):
+        values = tuple(tuple(v) if isinstance(v, list) else v for v in values)
+    return values
+
+
+def _diff(fields: Tuple[str, ...], old: tuple, new: tuple, viewer_threshold: float) -> Dict[str, tuple]:
+    """dict of field name to old and new value of all fields that changed, ignoring small viewer count changes"""
+    changed = {}
+    for i, field in enumerate(fields):
+        if old[i] == new[i]:
+            continue
+        if field == 'viewer_count' and old[i] and new[i] is not None:
+            if abs(new[i] - old[i]) / old[i] < viewer_threshold:
+                continue
+        changed[field] = (old[i], new[i])
+    return changed
+
+
+class StreamChange(NamedTuple):
+    """A single change reported by :class:`StreamTracker`
+
+    :var str user_id: id of the broadcaster
+    :var ~twitchAPI.types.StreamChangeType type: what happened
+    :var dict stream: the stream as returned by :meth:`~twitchAPI.twitch.Twitch.get_streams`, None when offline
+    :var dict changed_fields: dict of field name to a tuple of old and new value, empty unless type is
+            :const:`~twitchAPI.types.StreamChangeType.CHANGED`
+    """
+    user_id: str
+    type: StreamChangeType
+    stream: Union[dict, None]
+    changed_fields: Dict[str, tuple]
+
+
+class StreamTracker:
+    """Tracks the live state of many broadcasters and reports only the changes
+
+    :param ~twitchAPI.twitch.Twitch twitch: a app authenticated instance of :class:`~twitchAPI.twitch.Twitch`
+    :param list[str] user_ids: ids of the broadcasters to track
+    :param callback: function called with each :class:`StreamChange` |default| :code:`None`
+    :param tuple[str] fields: fields of a stream that are tracked for changes |default| :const:`DEFAULT_STREAM_FIELDS`
+    :var float interval: the current poll interval in seconds
+    :var float min_interval: the shortest poll interval in seconds |default| :code:`15`
+    :var float max_interval: the longest poll interval in seconds |default| :code:`300`
+    :var float viewer_change_threshold: minimal relative change of the viewer count to report it, e.g. 0.1 for 10%.
+            The viewer count is the only tracked field that changes on almost every poll. |default| :code:`0.1`
+    :var bool emit_initial: if true, the first poll reports all live streams as online |default| :code:`True`
+    """
+
+    def __init__(self,
+                 twitch: Twitch,
+                 user_ids: Iterable[str],
+                 callback: Optional[Callable[[StreamChange], None]] = None,
+                 fields: Tuple[str, ...] = DEFAULT_STREAM_FIELDS):
+        self.twitch = twitch
+        self.callback = callback
+        self.fields = tuple(fields)
+        self.min_interval: float = 15
+        self.max_interval: float = 300
+        self.interval: float = 60
+        self.viewer_change_threshold: float = 0.1
+        self.emit_initial: bool = True
+        self.__user_ids: List[str] = []
+        self.__known = set()
+        # user id -> tuple of the tracked fields, only contains live broadcasters
+        self.__state: Dict[str, tuple] = {}
+        self.__initialized = False
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.add_user_ids(user_ids)
+
+    def add_user_ids(self, user_ids: Iterable[str]) -> None:
+        """Starts tracking the given broadcasters
+
+        :param list[str] user_ids: ids of the broadcasters
+        :rtype: None
+        """
+        with self.__lock:
+            for user_id in user_ids:
+                if user_id not in self.__known:
+                    self.__known.add(user_id)
+                    self.__user_ids.append(user_id)
+
+    def remove_user_ids(self, user_ids: Iterable[str]) -> None:
+        """Stops tracking the given broadcasters, no offline change is reported for them
+
+        :param list[str] user_ids: ids of the broadcasters
+        :rtype: None
+        """
+        with self.__lock:
+            removed = set(user_ids)
+            self.__known -= removed
+            self.__user_ids = [u for u in self.__user_ids if u not in removed]
+            for user_id in removed:
+                self.__state.pop(user_id, None)
+
+    def is_live(self, user_id: str) -> bool:
+        """Returns if the broadcaster was live during the last poll
+
+        :param str user_id: id of the broadcaster
+        :rtype: bool
+        """
+        return user_id in self.__state
+
+    def get_live_user_ids(self) -> List[str]:
+        """Returns the ids of all broadcasters that were live during the last poll
+
+        :rtype: list[str]
+        """
+        return list(self.__state.keys())
+
+    def __fetch_batch(self, batch: List[str]) -> List[dict]:
+        data = self.twitch.get_streams(first=100, user_id=batch)
+        if 'data' not in data:
+            raise TwitchAPIException(f'invalid response while polling streams: {data}')
+        return data['data']
+
+    def __apply_batch(self, batch: List[str], streams: List[dict], changes: List[StreamChange]) -> None:
+        live = set()
+        emit = self.__initialized or self.emit_initial
+        for stream in streams:
+            user_id = stream['user_id']
+            live.add(user_id)
+            values = _snapshot(stream, self.fields)
+            old = self.__state.get(user_id)
+            if old is None:
+                self.__state[user_id] = values
+                if emit:
+                    changes.append(StreamChange(user_id, StreamChangeType.ONLINE, stream, {}))
+            elif old != values:
+                changed = _diff(self.fields, old, values, self.viewer_change_threshold)
+                if len(changed) > 0:
+                    # only replace the state when something was reported, small viewer changes accumulate
+                    self.__state[user_id] = values
+                    changes.append(StreamChange(user_id, StreamChangeType.CHANGED, stream, changed))
+        for user_id in batch:
+            if user_id not in live and self.__state.pop(user_id, None) is not None:
+                changes.append(StreamChange(user_id, StreamChangeType.OFFLINE, None, {}))
+
+    def poll(self) -> List[StreamChange]:
+        """Polls all tracked broadcasters once, calls the callback for every change and adapts the interval
+
+        The state only changes if all batches could be polled. Exceptions raised by the callback are logged.
+
+        :return: all changes since the last poll
+        :rtype: list[~twitchAPI.polling.StreamChange]
+        :raises ~twitchAPI.types.TwitchAPIException: if the Twitch API returns a invalid response
+        """
+        with self.__lock:
+            user_ids = list(self.__user_ids)
+        # fetch everything first, a failing batch would otherwise lose the already applied changes of the others
+        batches = [user_ids[i:i + 100] for i in range(0, len(user_ids), 100)]
+        results = [(batch, self.__fetch_batch(batch)) for batch in batches]
+        changes: List[StreamChange] = []
+        for batch, streams in results:
+            self.__apply_batch(batch, streams, changes)
+        if self.__initialized:
+            self.__adapt_interval(len(changes), len(user_ids))
+        self.__initialized = True
+        if self.callback is not None:
+            for change in changes:
+                try:
+                    self.callback(change)
+                except Exception:
+                    logging.exception(f'stream change callback failed for {change.user_id}')
+        return changes
+
+    def __adapt_interval(self, change_count: int, tracked: int) -> None:
+        if change_count == 0:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        else:
+            # the more broadcasters changed, the faster we poll again
+            rate = change_count / max(tracked, 1)
+            factor = max(0.25, 1 - math.sqrt(rate))
+            self.interval = max(self.min_interval, self.interval * factor)
+
+    def __run(self):
+        while not self.__stop.is_set():
+            try:
+                self.poll()
+            except TwitchAPIException as e:
+                logging.warning(f'polling streams failed: {e}')
+            except Exception:
+                logging.exception('polling streams failed')
+            self.__stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Starts polling in its own thread
+
+        :rtype: None
+        :raises RuntimeError: if the tracker is already running
+        """
+        if self.__thread is not None:
+            raise RuntimeError('tracker is already running')
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stops polling
+
+        :rtype: None
+        """
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+
+class _PolledResource:
+    __slots__ = ('type', 'key', 'callback', 'priority', 'change_rate', 'interval', 'next_due', 'last_value',
+                 'snapshot', 'polled', 'failures')
+
+    def __init__(self, resource_type: PollResourceType, key: str, callback: Callable, priority: float, now: float):
+        self.type = resource_type
+        self.key = key
+        self.callback = callback
+        self.priority = priority
+        self.change_rate = 0.0
+        self.interval = 0.0
+        self.next_due = now
+        self.last_value = None
+        # tracked fields of the last reported stream
+        self.snapshot = None
+        self.polled = False
+        # failed polls in a row
+        self.failures = 0
+
+    def weight(self) -> float:
+        return self.priority * (1 + 4 * self.change_rate)
+
+
+class PollScheduler:
+    """Polls many resources with intervals that follow how often each of them changes
+
+    Every resource gets a interval between :attr:`min_interval` and :attr:`max_interval`, based on a moving average of
+    how often it changed in recent polls and divided by its priority.
+    Due streams are packed into requests of up to 100 user ids, free slots of a request are filled with the streams
+    that are due next. The amount of requests is limited to :attr:`requests_per_minute`, when more requests are due,
+    the resources with the highest priority and change rate are polled first. While started, polling also pauses
+    whenever the rate limit bucket of the client is empty or a request got a 429 response.
+    A resource that can not be polled, e.g. because of a missing scope, is polled again with a exponential backoff of
+    up to :attr:`max_interval`.
+
+    The callback of a resource is called with the :class:`~twitchAPI.types.PollResourceType`, the key and the new
+    value whenever the value changed. The value of a stream is None when it is offline, the value of the event
+    resources is the most recent event. Like :class:`StreamTracker`, a live stream only counts as changed if one of
+    :attr:`stream_fields` changed, small changes of the viewer count are ignored.
+
+    .. code-block:: python
+
+        from twitchAPI.polling import PollScheduler
+        from twitchAPI.types import PollResourceType
+
+        def on_change(resource_type, key, value):
+            print(resource_type, key, value)
+
+        scheduler = PollScheduler(twitch)
+        for user_id in user_ids:
+            scheduler.add_resource(PollResourceType.STREAM, user_id, on_change)
+        # my own channel is more important
+        scheduler.add_resource(PollResourceType.HYPE_TRAIN_EVENTS, my_user_id, on_change, priority=5)
+        scheduler.start()
+
+    :param ~twitchAPI.twitch.Twitch twitch: a authenticated instance of :class:`~twitchAPI.twitch.Twitch`, the event
+            resources need user authentication with the correct scopes
+    :var float min_interval: the shortest interval in seconds |default| :code:`10`
+    :var float max_interval: the longest interval in seconds |default| :code:`300`
+    :var float requests_per_minute: the request budget of the scheduler, keep this below the rate limit of your
+            client to leave room for other calls |default| :code:`400`
+    :var float smoothing: weight of the latest poll in the moving average of the change rate |default| :code:`0.3`
+    :var tuple[str] stream_fields: fields of a stream that are compared |default| :const:`DEFAULT_STREAM_FIELDS`
+    :var float viewer_change_threshold: minimal relative change of the viewer count to count it as change
+            |default| :code:`0.1`
+    """
+
+    def __init__(self, twitch: Twitch):
+        self.twitch = twitch
+        self.min_interval: float = 10
+        self.max_interval: float = 300
+        self.requests_per_minute: float = 400
+        self.smoothing: float = 0.3
+        self.stream_fields: Tuple[str, ...] = DEFAULT_STREAM_FIELDS
+        self.viewer_change_threshold: float = 0.1
+        self.__resources: Dict[Tuple[PollResourceType, str], _PolledResource] = {}
+        self.__lock = threading.Lock()
+        self.__tokens = 0.0
+        self.__last_refill: Optional[float] = None
+        self.__ratelimit = RateLimitTracker(twitch)
+        self.__paused_until = 0.0
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.__fetchers = {
+            PollResourceType.STREAM: self.__fetch_streams,
+            PollResourceType.HYPE_TRAIN_EVENTS: self.__fetch_hype_train_events,
+            PollResourceType.BANNED_EVENTS: self.__fetch_banned_events,
+            PollResourceType.MODERATOR_EVENTS: self.__fetch_moderator_events
+        }
+
+    # ==================================================================================================================
+    # fetchers, return a dict of key to value
+    # ==================================================================================================================
+
+    def __fetch_streams(self, keys: List[str]) -> Dict[str, Any]:
+        data = self.twitch.get_streams(first=100, user_id=keys)
+        if 'data' not in data:
+            raise TwitchAPIException(f'invalid response while polling streams: {data}')
+        result = dict.fromkeys(keys)
+        for stream in data['data']:
+            result[stream['user_id']] = stream
+        return result
+
+    @staticmethod
+    def __latest(key: str, data: dict) -> Dict[str, Any]:
+        if 'data' not in data:
+            raise TwitchAPIException(f'invalid response while polling {key}: {data}')
+        return {key: data['data'][0] if len(data['data']) > 0 else None}
+
+    def __fetch_hype_train_events(self, keys: List[str]) -> Dict[str, Any]:
+        return self.__latest(keys[0], self.twitch.get_hype_train_events(keys[0], first=1))
+
+    def __fetch_banned_events(self, keys: List[str]) -> Dict[str, Any]:
+        return self.__latest(keys[0], self.twitch.get_banned_events(keys[0], first=1))
+
+    def __fetch_moderator_events(self, keys: List[str]) -> Dict[str, Any]:
+        return self.__latest(keys[0], self.twitch.get_moderator_events(keys[0]))
+
+    # ==================================================================================================================
+    # resources
+    # ==================================================================================================================
+
+    def add_resource(self,
+                     resource_type: PollResourceType,
+                     key: str,
+                     callback: Callable[[PollResourceType, str, Any], None],
+                     priority: float = 1.0) -> None:
+        """Adds a resource to poll, it is polled on the next run.
+
+        :param ~twitchAPI.types.PollResourceType resource_type: the type of the resource
+        :param str key: the user or broadcaster id
+        :param callback: function called with the type, key and new value when the resource changed
+        :param float priority: higher priorities are polled more often, 2 means twice as often as 1 |default| :code:`1`
+        :rtype: None
+        :raises ValueError: if priority is not positive
+        """
+        if priority <= 0:
+            raise ValueError('priority has to be positive')
+        with self.__lock:
+            self.__resources[(resource_type, key)] = _PolledResource(resource_type, key, callback, priority,
+                                                                     time.monotonic())
+
+    def remove_resource(self, resource_type: PollResourceType, key: str) -> None:
+        """Stops polling a resource
+
+        :param ~twitchAPI.types.PollResourceType resource_type: the type of the resource
+        :param str key: the user or broadcaster id
+        :rtype: None
+        """
+        with self.__lock:
+            self.__resources.pop((resource_type, key), None)
+
+    def get_interval(self, resource_type: PollResourceType, key: str) -> Optional[float]:
+        """Returns the current poll interval of a resource in seconds or None if it was not polled yet
+
+        :param ~twitchAPI.types.PollResourceType resource_type: the type of the resource
+        :param str key: the user or broadcaster id
+        :rtype: float or None
+        """
+        resource = self.__resources.get((resource_type, key))
+        return resource.interval if resource is not None and resource.polled else None
+
+    # ==================================================================================================================
+    # scheduling
+    # ==================================================================================================================
+
+    def __refill(self, now: float) -> None:
+        per_second = self.requests_per_minute / 60
+        # allow a small burst, but never more than 10 seconds worth of budget
+        burst = max(per_second * 10, 1)
+        if self.__last_refill is None:
+            self.__tokens = burst
+        else:
+            self.__tokens = min(burst, self.__tokens + (now - self.__last_refill) * per_second)
+        self.__last_refill = now
+
+    def __plan(self, now: float) -> List[List[_PolledResource]]:
+        """packs all due resources into batches, ordered by importance"""
+        due_by_type: Dict[PollResourceType, List[_PolledResource]] = {}
+        upcoming_streams: List[_PolledResource] = []
+        for resource in self.__resources.values():
+            if resource.next_due <= now:
+                due_by_type.setdefault(resource.type, []).append(resource)
+            elif resource.type == PollResourceType.STREAM:
+                upcoming_streams.append(resource)
+        batches = []
+        for resource_type, due in due_by_type.items():
+            due.sort(key=lambda r: r.weight(), reverse=True)
+            if resource_type != PollResourceType.STREAM:
+                batches.extend([r] for r in due)
+                continue
+            for i in range(0, len(due), 100):
+                batches.append(due[i:i + 100])
+            # use the free slots of the last request for the streams that are due next
+            free = 100 - len(batches[-1])
+            if free > 0 and len(upcoming_streams) > 0:
+                upcoming_streams.sort(key=lambda r: r.next_due)
+                batches[-1] = batches[-1] + upcoming_streams[:free]
+        batches.sort(key=lambda b: max(r.weight() for r in b), reverse=True)
+        return batches
+
+    def __has_changed(self, resource: _PolledResource, value: Any) -> bool:
+        if resource.type != PollResourceType.STREAM:
+            return value != resource.last_value
+        snapshot = _snapshot(value, self.stream_fields)
+        if snapshot is None or resource.snapshot is None:
+            changed = snapshot is not resource.snapshot
+        else:
+            changed = len(_diff(self.stream_fields, resource.snapshot, snapshot, self.viewer_change_threshold)) > 0
+        if changed or not resource.polled:
+            # only replace the snapshot when something was reported, small viewer changes accumulate
+            resource.snapshot = snapshot
+        return changed
+
+    def __update(self, resource: _PolledResource, value: Any, now: float) -> bool:
+        changed = self.__has_changed(resource, value) and resource.polled
+        resource.change_rate = (1 - self.smoothing) * resource.change_rate + self.smoothing * (1 if changed else 0)
+        # no changes: max interval, changes on every poll: min interval
+        interval = self.max_interval - (self.max_interval - self.min_interval) * resource.change_rate
+        resource.interval = max(self.min_interval, min(self.max_interval, interval / resource.priority))
+        resource.next_due = now + resource.interval
+        resource.last_value = value
+        resource.polled = True
+        resource.failures = 0
+        return changed
+
+    def __back_off(self, resource: _PolledResource, now: float) -> None:
+        resource.failures += 1
+        interval = resource.interval if resource.polled else self.min_interval
+        resource.next_due = now + min(self.max_interval, interval * 2 ** resource.failures)
+
+    def __pause_on_ratelimit(self) -> bool:
+        """pauses polling till the rate limit bucket of the client is refilled, returns False if it is not empty"""
+        wait = self.__ratelimit.get_wait_time()
+        if wait <= 0:
+            return False
+        self.__paused_until = time.monotonic() + wait
+        return True
+
+    def run_pending(self) -> int:
+        """Polls all due resources as far as the request budget allows and calls the callbacks of changed resources
+
+        :return: the amount of requests made
+        :rtype: int
+        """
+        now = time.monotonic()
+        with self.__lock:
+            self.__refill(now)
+            batches = self.__plan(now)
+        request_count = 0
+        for batch in batches:
+            # over budget, the remaining resources stay due and are polled first next time
+            if self.__tokens < 1 or self.__pause_on_ratelimit():
+                break
+            self.__tokens -= 1
+            request_count += 1
+            try:
+                values = self.__fetchers[batch[0].type]([r.key for r in batch])
+            except Exception as e:
+                if self.__pause_on_ratelimit():
+                    # not a problem of the resources, poll them again once the bucket is refilled
+                    logging.warning(f'polling {batch[0].type.value} hit the rate limit, pausing')
+                    break
+                if isinstance(e, TwitchAPIException):
+                    logging.warning(f'polling {batch[0].type.value} failed: {e}')
+                else:
+                    logging.exception(f'polling {batch[0].type.value} failed')
+                now = time.monotonic()
+                with self.__lock:
+                    for resource in batch:
+                        self.__back_off(resource, now)
+                continue
+            now = time.monotonic()
+            changed = []
+            with self.__lock:
+                for resource in batch:
+                    if self.__update(resource, values.get(resource.key), now):
+                        changed.append(resource)
+            for resource in changed:
+                try:
+                    resource.callback(resource.type, resource.key, resource.last_value)
+                except Exception:
+                    logging.exception(f'callback of {resource.type.value} {resource.key} failed')
+        return request_count
+
+    def __time_till_next(self) -> float:
+        with self.__lock:
+            if len(self.__resources) == 0:
+                return self.min_interval
+            next_due = min(r.next_due for r in self.__resources.values())
+        wait = next_due - time.monotonic()
+        if self.__tokens < 1:
+            wait = max(wait, (1 - self.__tokens) * 60 / self.requests_per_minute)
+        wait = max(wait, self.__paused_until - time.monotonic())
+        return max(wait, 0.05)
+
+    def __run(self):
+        while not self.__stop.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                logging.exception('polling failed')
+            self.__stop.wait(self.__time_till_next())
+
+    def start(self) -> None:
+        """Starts polling in its own thread
+
+        :rtype: None
+        :raises RuntimeError: if the scheduler is already running
+        """
+        if self.__thread is not None:
+            raise RuntimeError('scheduler is already running')
+        self.__stop.clear()
+        self.__ratelimit.start()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stops polling
+
+        :rtype: None
+        """
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+            self.__ratelimit.stop()
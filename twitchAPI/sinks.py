@@ -0,0 +1,239 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Record sinks
+------------
+
+Sinks receive the records produced by long running jobs like the :class:`~twitchAPI.crawler.FollowCrawler` and write
+them out as they arrive, so that the job runs in constant memory no matter how many records it produces.
+
+Records are buffered and written in chunks of :code:`buffer_size`. Files are opened in append mode, so a resumed job
+continues the file of the previous run.
+
+All sinks are thread safe and can be used as context manager, which closes them on exit.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.sinks import JSONLSink, CSVSink, CallbackSink
+
+    with JSONLSink('follows.jsonl') as sink:
+        sink.write([{'from_id': '1234', 'to_id': '5678'}])
+
+    with CSVSink('follows.csv', ['from_id', 'to_id']) as sink:
+        sink.write([{'from_id': '1234', 'to_id': '5678'}])
+
+    sink = CallbackSink(lambda records: print(len(records)))
+
+*******
+Parquet
+*******
+
+:class:`ParquetSink` needs :code:`pyarrow`, install it with :code:`pip install twitchAPI[parquet]`.
+Since Parquet files can not be appended to, every run writes a new part file into the target directory, read all of
+them at once with :code:`pyarrow.dataset.dataset(path)`.
+
+********************
+Class Documentation:
+********************
+"""
+
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List
+
+
+def _to_str(value) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+class RecordSink:
+    """Base class of all sinks
+
+    :param int buffer_size: amount of records to buffer before writing them out |default| :code:`1000`
+    """
+
+    def __init__(self, buffer_size: int = 1000):
+        self.buffer_size = buffer_size
+        self.__lock = threading.Lock()
+        self.__buffer: List[dict] = []
+
+    def _write_records(self, records: List[dict]) -> None:
+        """Writes out the given records, called while holding the lock of the sink"""
+        raise NotImplementedError()
+
+    def _flush_output(self) -> None:
+        """Flushes the underlying output, called while holding the lock of the sink"""
+        pass
+
+    def write(self, records: List[dict]) -> None:
+        """Adds records to the sink, they are written once the buffer is full
+
+        :param list[dict] records: the records to add
+        :rtype: None
+        """
+        with self.__lock:
+            self.__buffer.extend(records)
+            if len(self.__buffer) >= self.buffer_size:
+                self._write_records(self.__buffer)
+                self.__buffer = []
+
+    def flush(self) -> None:
+        """Writes out all buffered records
+
+        :rtype: None
+        """
+        with self.__lock:
+            if len(self.__buffer) > 0:
+                self._write_records(self.__buffer)
+                self.__buffer = []
+            self._flush_output()
+
+    def close(self) -> None:
+        """Writes out all buffered records and closes the sink
+
+        :rtype: None
+        """
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class JSONLSink(RecordSink):
+    """Writes one JSON object per line.
+
+    :class:`~datetime.datetime` values are written in the ISO 8601 format, all other values that are not JSON
+    serializable are written as string.
+
+    :param str path: path of the file
+    :param int buffer_size: amount of records to buffer before writing them out |default| :code:`1000`
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1000):
+        super().__init__(buffer_size)
+        self.path = path
+        self.__file = open(path, 'a', encoding='utf-8')
+
+    def _write_records(self, records: List[dict]) -> None:
+        self.__file.write(''.join(json.dumps(r, default=_to_str) + '\n' for r in records))
+
+    def _flush_output(self) -> None:
+        self.__file.flush()
+
+    def close(self) -> None:
+        super().close()
+        self.__file.close()
+
+
+class CSVSink(RecordSink):
+    """Writes records as CSV with the given columns.
+
+    The header is only written if the file is new or empty. Keys that are not in fields are ignored, missing keys are
+    written as empty value. Lists are joined with :code:`,`, :class:`~datetime.datetime` values are written in the
+    ISO 8601 format and all other values are written as string.
+
+    :param str path: path of the file
+    :param list[str] fields: the columns
+    :param int buffer_size: amount of records to buffer before writing them out |default| :code:`1000`
+    """
+
+    def __init__(self, path: str, fields: List[str], buffer_size: int = 1000):
+        super().__init__(buffer_size)
+        self.path = path
+        self.fields = fields
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.__file = open(path, 'a', encoding='utf-8', newline='')
+        self.__writer = csv.DictWriter(self.__file, fields, extrasaction='ignore')
+        if write_header:
+            self.__writer.writeheader()
+
+    @staticmethod
+    def __format(value):
+        if isinstance(value, list):
+            return ','.join(str(v) for v in value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def _write_records(self, records: List[dict]) -> None:
+        self.__writer.writerows({k: self.__format(v) for k, v in r.items()} for r in records)
+
+    def _flush_output(self) -> None:
+        self.__file.flush()
+
+    def close(self) -> None:
+        super().close()
+        self.__file.close()
+
+
+class CallbackSink(RecordSink):
+    """Passes the records to a function.
+
+    The buffer size defaults to 1, so the function gets called for every :meth:`write` with all records of that call.
+
+    :param callback: function called with a list of records
+    :param int buffer_size: amount of records to buffer before calling the function |default| :code:`1`
+    """
+
+    def __init__(self, callback: Callable[[List[dict]], None], buffer_size: int = 1):
+        super().__init__(buffer_size)
+        self.callback = callback
+
+    def _write_records(self, records: List[dict]) -> None:
+        self.callback(records)
+
+
+class ParquetSink(RecordSink):
+    """Writes records to Parquet files with the given schema, every write of the buffer is a row group.
+
+    The schema is a dict of column name to python type, supported are :code:`str`, :code:`int`, :code:`float`,
+    :code:`bool`, :class:`~datetime.datetime` and :code:`list` (of strings). The values of the records have to be of
+    these types, use :func:`~twitchAPI.export.apply_schema` to convert them.
+
+    :param str path: path of the directory the part files are written to
+    :param dict schema: the schema of the records
+    :param int buffer_size: amount of records per row group |default| :code:`10000`
+    :raises RuntimeError: if pyarrow is not installed
+    """
+
+    def __init__(self, path: str, schema: Dict[str, type], buffer_size: int = 10000):
+        # imported here since pyarrow is optional and slow to import
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError('ParquetSink requires pyarrow, install it with pip install twitchAPI[parquet]')
+        self.__pyarrow = pyarrow
+        super().__init__(buffer_size)
+        self.path = path
+        self.schema = schema
+        types = {
+            str: pyarrow.string(),
+            int: pyarrow.int64(),
+            float: pyarrow.float64(),
+            bool: pyarrow.bool_(),
+            datetime: pyarrow.timestamp('us', tz='UTC'),
+            list: pyarrow.list_(pyarrow.string())
+        }
+        self.__arrow_schema = pyarrow.schema([(name, types[t]) for name, t in schema.items()])
+        os.makedirs(path, exist_ok=True)
+        part = len([f for f in os.listdir(path) if f.startswith('part-') and f.endswith('.parquet')])
+        self.__writer = pyarrow.parquet.ParquetWriter(os.path.join(path, f'part-{part:05d}.parquet'),
+                                                      self.__arrow_schema)
+
+    def _write_records(self, records: List[dict]) -> None:
+        columns = {name: [r.get(name) for r in records] for name in self.schema.keys()}
+        self.__writer.write_table(self.__pyarrow.table(columns, schema=self.__arrow_schema))
+
+    def close(self) -> None:
+        super().close()
+        self.__writer.close()
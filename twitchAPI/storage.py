@@ -0,0 +1,483 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Persistent storage backends
+---------------------------
+
+Storage backends used to persist state between restarts of your application.
+
+A :class:`~twitchAPI.webhook.TwitchWebHook` keeps track of its subscriptions in a :class:`SubscriptionStore`.
+By default this is a :class:`MemorySubscriptionStore`, use :class:`SQLiteSubscriptionStore` or
+:class:`JSONSubscriptionStore` if you want to be able to restore your subscriptions after a restart using
+:meth:`~twitchAPI.webhook.TwitchWebHook.restore_subscriptions`.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.webhook import TwitchWebHook
+    from twitchAPI.storage import SQLiteSubscriptionStore
+
+    def callback_for_topic(topic):
+        return callback_stream_changed
+
+    hook = TwitchWebHook("https://my.cool.domain.net:8080", 'my_app_id', 8080)
+    hook.subscription_store = SQLiteSubscriptionStore('subscriptions.db')
+    hook.authenticate(twitch)
+    hook.start()
+    # reuses all still valid subscriptions of the last run and only re creates the expired or missing ones
+    reattached, recreated = hook.restore_subscriptions(twitch, callback_for_topic)
+
+:meth:`~twitchAPI.webhook.TwitchWebHook.stop` keeps the subscriptions in the store, only
+:meth:`~twitchAPI.webhook.TwitchWebHook.unsubscribe` removes them. With the default
+:attr:`~twitchAPI.webhook.TwitchWebHook.unsubscribe_on_stop`, stopping the webhook still unsubscribes at Twitch, so
+the next start recreates all subscriptions. Set :code:`hook.unsubscribe_on_stop = False` to keep them running at Twitch
+while your application restarts, so they can be reattached without a new subscription.
+
+Long running jobs like the :class:`~twitchAPI.crawler.FollowCrawler` remember their progress in a
+:class:`CheckpointStore`, use :class:`SQLiteCheckpointStore` or :class:`JSONCheckpointStore` to be able to resume
+them after a crash.
+
+********************
+Class Documentation:
+********************
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+from uuid import UUID
+
+
+class SubscriptionStore:
+    """Base class of all subscription stores.
+
+    A subscription is represented by a dict with the keys :code:`url` (the topic URL), :code:`callback_path` and
+    :code:`expires_at` (unix timestamp)."""
+
+    def load(self) -> Dict[str, dict]:
+        """Returns all stored subscriptions
+
+        :return: dict of UUID string to subscription
+        :rtype: dict
+        """
+        raise NotImplementedError()
+
+    def get(self, uuid: UUID) -> Union[dict, None]:
+        """Returns the stored subscription with the given UUID
+
+        :param ~uuid.UUID uuid: UUID of the subscription
+        :return: the subscription or None if not stored
+        :rtype: dict or None
+        """
+        return self.load().get(str(uuid))
+
+    def save(self, uuid: UUID, subscription: dict) -> None:
+        """Stores or updates the given subscription
+
+        :param ~uuid.UUID uuid: UUID of the subscription
+        :param dict subscription: the subscription
+        :rtype: None
+        """
+        raise NotImplementedError()
+
+    def delete(self, uuid: UUID) -> None:
+        """Removes the subscription with the given UUID
+
+        :param ~uuid.UUID uuid: UUID of the subscription
+        :rtype: None
+        """
+        raise NotImplementedError()
+
+    @staticmethod
+    def _to_record(subscription: dict) -> dict:
+        return {
+            'url': subscription.get('url'),
+            'callback_path': subscription.get('callback_path'),
+            'expires_at': subscription.get('expires_at')
+        }
+
+
+class MemorySubscriptionStore(SubscriptionStore):
+    """Keeps subscriptions in memory only, this is the default"""
+
+    def __init__(self):
+        self.__data = {}
+
+    def load(self) -> Dict[str, dict]:
+        return dict(self.__data)
+
+    def get(self, uuid: UUID) -> Union[dict, None]:
+        return self.__data.get(str(uuid))
+
+    def save(self, uuid: UUID, subscription: dict) -> None:
+        self.__data[str(uuid)] = self._to_record(subscription)
+
+    def delete(self, uuid: UUID) -> None:
+        self.__data.pop(str(uuid), None)
+
+
+class JSONSubscriptionStore(SubscriptionStore):
+    """Persists subscriptions in a JSON file.
+
+    The whole file is rewritten on every change, use :class:`SQLiteSubscriptionStore` for a large amount of
+    subscriptions.
+
+    :param str path: path of the JSON file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__data = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.__data = json.load(f)
+
+    def __write(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.__data, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> Dict[str, dict]:
+        with self.__lock:
+            return dict(self.__data)
+
+    def get(self, uuid: UUID) -> Union[dict, None]:
+        with self.__lock:
+            return self.__data.get(str(uuid))
+
+    def save(self, uuid: UUID, subscription: dict) -> None:
+        with self.__lock:
+            self.__data[str(uuid)] = self._to_record(subscription)
+            self.__write()
+
+    def delete(self, uuid: UUID) -> None:
+        with self.__lock:
+            if self.__data.pop(str(uuid), None) is not None:
+                self.__write()
+
+
+class SQLiteSubscriptionStore(SubscriptionStore):
+    """Persists subscriptions in a SQLite database.
+
+    :param str path: path of the database file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock, self.__db:
+            self.__db.execute('CREATE TABLE IF NOT EXISTS subscriptions ('
+                              'uuid TEXT PRIMARY KEY, url TEXT, callback_path TEXT, expires_at REAL)')
+
+    def load(self) -> Dict[str, dict]:
+        with self.__lock:
+            rows = self.__db.execute('SELECT uuid, url, callback_path, expires_at FROM subscriptions').fetchall()
+        return {r[0]: {'url': r[1], 'callback_path': r[2], 'expires_at': r[3]} for r in rows}
+
+    def get(self, uuid: UUID) -> Union[dict, None]:
+        with self.__lock:
+            row = self.__db.execute('SELECT url, callback_path, expires_at FROM subscriptions WHERE uuid = ?',
+                                    (str(uuid),)).fetchone()
+        return None if row is None else {'url': row[0], 'callback_path': row[1], 'expires_at': row[2]}
+
+    def save(self, uuid: UUID, subscription: dict) -> None:
+        record = self._to_record(subscription)
+        with self.__lock, self.__db:
+            self.__db.execute('INSERT OR REPLACE INTO subscriptions (uuid, url, callback_path, expires_at) '
+                              'VALUES (?, ?, ?, ?)',
+                              (str(uuid), record['url'], record['callback_path'], record['expires_at']))
+
+    def delete(self, uuid: UUID) -> None:
+        with self.__lock, self.__db:
+            self.__db.execute('DELETE FROM subscriptions WHERE uuid = ?', (str(uuid),))
+
+    def close(self) -> None:
+        """Closes the database connection
+
+        :rtype: None
+        """
+        with self.__lock:
+            self.__db.close()
+
+
+class DeliveryDeduplicator:
+    """Base class of all deduplicators.
+
+    Twitch might deliver the same notification more than once, a deduplicator remembers the ids of already handled
+    notifications. Crawlers use them the same way to only emit every item once."""
+
+    def is_duplicate(self, notification_id: str) -> bool:
+        """Checks if the given notification was already seen and remembers it otherwise
+
+        :param str notification_id: the id of the notification
+        :return: True if the notification was already seen, otherwise False
+        :rtype: bool
+        """
+        raise NotImplementedError()
+
+    def filter_new(self, ids: List[str]) -> List[str]:
+        """Returns the ids that were not seen yet and remembers them
+
+        :param list[str] ids: the ids to check
+        :return: the ids that were not seen yet, in the given order
+        :rtype: list[str]
+        """
+        return [i for i in ids if not self.is_duplicate(i)]
+
+    def find_new(self, ids: List[str]) -> List[str]:
+        """Returns the ids that were not seen yet without remembering them, use :meth:`mark_seen` once they are
+        handled
+
+        :param list[str] ids: the ids to check
+        :return: the ids that were not seen yet, in the given order
+        :rtype: list[str]
+        """
+        raise NotImplementedError()
+
+    def mark_seen(self, ids: List[str]) -> None:
+        """Remembers the given ids
+
+        :param list[str] ids: the ids
+        :rtype: None
+        """
+        for i in ids:
+            self.is_duplicate(i)
+
+
+class MemoryDeduplicator(DeliveryDeduplicator):
+    """Remembers the most recent notification ids in memory
+
+    :param int max_size: the amount of notification ids to remember, None to remember all of them
+                |default| :code:`10000`
+    """
+
+    def __init__(self, max_size: Optional[int] = 10000):
+        self.max_size = max_size
+        self.__lock = threading.Lock()
+        self.__seen = OrderedDict()
+
+    def is_duplicate(self, notification_id: str) -> bool:
+        with self.__lock:
+            if notification_id in self.__seen:
+                return True
+            self.__seen[notification_id] = None
+            if self.max_size is not None and len(self.__seen) > self.max_size:
+                self.__seen.popitem(last=False)
+            return False
+
+    def find_new(self, ids: List[str]) -> List[str]:
+        with self.__lock:
+            return [i for i in ids if i not in self.__seen]
+
+    def mark_seen(self, ids: List[str]) -> None:
+        with self.__lock:
+            for i in ids:
+                self.__seen[i] = None
+            while self.max_size is not None and len(self.__seen) > self.max_size:
+                self.__seen.popitem(last=False)
+
+
+class SQLiteDeduplicator(DeliveryDeduplicator):
+    """Remembers notification ids in a SQLite database, this can be shared between multiple processes
+
+    :param str path: path of the database file
+    :param int ttl: time in seconds for how long a notification id is remembered, None to remember them forever
+                |default| :code:`600`
+    """
+
+    def __init__(self, path: str, ttl: Optional[int] = 600):
+        self.path = path
+        self.ttl = ttl
+        self.__lock = threading.Lock()
+        self.__inserts = 0
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock, self.__db:
+            self.__db.execute('CREATE TABLE IF NOT EXISTS deliveries (id TEXT PRIMARY KEY, seen_at REAL)')
+
+    def is_duplicate(self, notification_id: str) -> bool:
+        now = time.time()
+        with self.__lock, self.__db:
+            cursor = self.__db.execute('INSERT OR IGNORE INTO deliveries (id, seen_at) VALUES (?, ?)',
+                                       (notification_id, now))
+            self.__inserts += 1
+            self.__expire(now)
+            return cursor.rowcount == 0
+
+    def filter_new(self, ids: List[str]) -> List[str]:
+        now = time.time()
+        new = []
+        with self.__lock, self.__db:
+            for notification_id in ids:
+                cursor = self.__db.execute('INSERT OR IGNORE INTO deliveries (id, seen_at) VALUES (?, ?)',
+                                           (notification_id, now))
+                if cursor.rowcount > 0:
+                    new.append(notification_id)
+                self.__inserts += 1
+                self.__expire(now)
+        return new
+
+    def find_new(self, ids: List[str]) -> List[str]:
+        with self.__lock:
+            seen = set()
+            # stay below the default limit of 999 variables per statement
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                rows = self.__db.execute(f'SELECT id FROM deliveries WHERE id IN ({",".join("?" * len(chunk))})',
+                                         chunk)
+                seen.update(row[0] for row in rows)
+        return [i for i in ids if i not in seen]
+
+    def mark_seen(self, ids: List[str]) -> None:
+        now = time.time()
+        with self.__lock, self.__db:
+            for notification_id in ids:
+                self.__db.execute('INSERT OR IGNORE INTO deliveries (id, seen_at) VALUES (?, ?)',
+                                  (notification_id, now))
+                self.__inserts += 1
+                self.__expire(now)
+
+    def __expire(self, now: float):
+        if self.ttl is not None and self.__inserts % 1000 == 0:
+            self.__db.execute('DELETE FROM deliveries WHERE seen_at < ?', (now - self.ttl,))
+
+    def close(self) -> None:
+        """Closes the database connection
+
+        :rtype: None
+        """
+        with self.__lock:
+            self.__db.close()
+
+
+class CheckpointStore:
+    """Base class of all checkpoint stores.
+
+    A checkpoint is a JSON serializable dict describing the progress of a job, e.g. the pagination cursor of a crawl.
+    Checkpoints are identified by a key chosen by the job."""
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the checkpoint with the given key
+
+        :param str key: the key of the checkpoint
+        :return: the checkpoint or None if not stored
+        :rtype: dict or None
+        """
+        raise NotImplementedError()
+
+    def save(self, key: str, checkpoint: dict) -> None:
+        """Stores or updates the checkpoint with the given key
+
+        :param str key: the key of the checkpoint
+        :param dict checkpoint: the checkpoint
+        :rtype: None
+        """
+        raise NotImplementedError()
+
+    def delete(self, key: str) -> None:
+        """Removes the checkpoint with the given key
+
+        :param str key: the key of the checkpoint
+        :rtype: None
+        """
+        raise NotImplementedError()
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """Keeps checkpoints in memory only, this is the default"""
+
+    def __init__(self):
+        self.__data = {}
+
+    def get(self, key: str) -> Optional[dict]:
+        checkpoint = self.__data.get(key)
+        return None if checkpoint is None else dict(checkpoint)
+
+    def save(self, key: str, checkpoint: dict) -> None:
+        self.__data[key] = dict(checkpoint)
+
+    def delete(self, key: str) -> None:
+        self.__data.pop(key, None)
+
+
+class JSONCheckpointStore(CheckpointStore):
+    """Persists checkpoints in a JSON file.
+
+    The whole file is rewritten on every change, use :class:`SQLiteCheckpointStore` for a large amount of
+    checkpoints.
+
+    :param str path: path of the JSON file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__data = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.__data = json.load(f)
+
+    def __write(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.__data, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.__lock:
+            checkpoint = self.__data.get(key)
+            return None if checkpoint is None else dict(checkpoint)
+
+    def save(self, key: str, checkpoint: dict) -> None:
+        with self.__lock:
+            self.__data[key] = dict(checkpoint)
+            self.__write()
+
+    def delete(self, key: str) -> None:
+        with self.__lock:
+            if self.__data.pop(key, None) is not None:
+                self.__write()
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Persists checkpoints in a SQLite database.
+
+    :param str path: path of the database file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock, self.__db:
+            self.__db.execute('CREATE TABLE IF NOT EXISTS checkpoints (key TEXT PRIMARY KEY, data TEXT)')
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.__lock:
+            row = self.__db.execute('SELECT data FROM checkpoints WHERE key = ?', (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def save(self, key: str, checkpoint: dict) -> None:
+        with self.__lock, self.__db:
+            self.__db.execute('INSERT OR REPLACE INTO checkpoints (key, data) VALUES (?, ?)',
+                              (key, json.dumps(checkpoint)))
+
+    def delete(self, key: str) -> None:
+        with self.__lock, self.__db:
+            self.__db.execute('DELETE FROM checkpoints WHERE key = ?', (key,))
+
+    def close(self) -> None:
+        """Closes the database connection
+
+        :rtype: None
+        """
+        with self.__lock:
+            self.__db.close()
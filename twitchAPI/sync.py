@@ -0,0 +1,186 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Incremental Sync
+----------------
+
+:class:`IncrementalSync` keeps a local copy of :meth:`~twitchAPI.twitch.Twitch.get_drops_entitlements` and
+:meth:`~twitchAPI.twitch.Twitch.get_extension_transactions` up to date without paging through the whole history on
+every run.
+
+After every run, the newest timestamp and id seen and the last pagination cursor are stored in a
+:class:`~twitchAPI.storage.CheckpointStore`. The next run only fetches the records after that point, with pages of 100
+records, and writes them to a :class:`~twitchAPI.sinks.RecordSink`.
+
+How the new records are found depends on the order the endpoint returns them in, see
+:attr:`~IncrementalSync.newest_first`:
+
+- newest first: paging stops at the first record older than the stored timestamp
+- oldest first: paging continues at the stored cursor, skipping the records up to the stored id
+
+The checkpoint is only moved after the sink was flushed. When a run is interrupted, the next run writes the records
+since the last checkpoint again.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from twitchAPI.sync import IncrementalSync
+    from twitchAPI.sinks import JSONLSink
+    from twitchAPI.storage import SQLiteCheckpointStore
+
+    sync = IncrementalSync(twitch, SQLiteCheckpointStore('sync.db'))
+    with JSONLSink('transactions.jsonl') as sink:
+        new = sync.sync_extension_transactions(sink, 'my_extension_id')
+    print(f'{new} new transactions')
+
+********************
+Class Documentation:
+********************
+"""
+
+from typing import Callable, Dict, Optional
+
+from dateutil import parser as du_parser
+
+from .helper import iterate_pages
+from .sinks import RecordSink
+from .storage import CheckpointStore, MemoryCheckpointStore
+from .twitch import Twitch
+
+
+def _timestamp_str(timestamp) -> str:
+    return timestamp if isinstance(timestamp, str) else timestamp.isoformat()
+
+
+class IncrementalSync:
+    """Fetches only the records that were added since the last run
+
+    :param ~twitchAPI.twitch.Twitch twitch: a app authenticated instance of :class:`~twitchAPI.twitch.Twitch`
+    :param ~twitchAPI.storage.CheckpointStore checkpoint_store: stores the last seen timestamp, id and cursor of every
+            sync, |default| :class:`~twitchAPI.storage.MemoryCheckpointStore`
+    :var dict newest_first: dict of endpoint (:code:`entitlements/drops` or :code:`extensions/transactions`) to
+            whether the endpoint returns the newest records first |default| :code:`True` for both
+    """
+
+    def __init__(self, twitch: Twitch, checkpoint_store: Optional[CheckpointStore] = None):
+        self.twitch = twitch
+        self.checkpoint_store = checkpoint_store if checkpoint_store is not None else MemoryCheckpointStore()
+        self.newest_first: Dict[str, bool] = {
+            'entitlements/drops': True,
+            'extensions/transactions': True
+        }
+
+    def __sync_newest_first(self, key: str, func: Callable[..., dict], params: dict, sink: RecordSink) -> int:
+        checkpoint = self.checkpoint_store.get(key) or {}
+        watermark = checkpoint.get('timestamp')
+        watermark_time = du_parser.isoparse(watermark) if watermark is not None else None
+        known_ids = set(checkpoint.get('ids', []))
+        newest = None
+        newest_ids = []
+        written = 0
+        for records, _ in iterate_pages(func, first=100, **params):
+            new = []
+            reached_known = False
+            for record in records:
+                timestamp = _timestamp_str(record['timestamp'])
+                if watermark is not None:
+                    if du_parser.isoparse(timestamp) < watermark_time:
+                        reached_known = True
+                        break
+                    # records with the same timestamp as the watermark might be new or already written
+                    if timestamp == watermark and record['id'] in known_ids:
+                        continue
+                if newest is None:
+                    newest = timestamp
+                if timestamp == newest:
+                    newest_ids.append(record['id'])
+                new.append(record)
+            sink.write(new)
+            written += len(new)
+            if reached_known:
+                break
+        sink.flush()
+        if newest is not None:
+            if newest == watermark:
+                newest_ids.extend(known_ids)
+            self.checkpoint_store.save(key, {'timestamp': newest, 'ids': newest_ids})
+        return written
+
+    def __sync_oldest_first(self, key: str, func: Callable[..., dict], params: dict, sink: RecordSink) -> int:
+        checkpoint = self.checkpoint_store.get(key) or {}
+        page_cursor = checkpoint.get('cursor')
+        last_id = checkpoint.get('last_id')
+        written = 0
+        first_page = True
+        for records, next_cursor in iterate_pages(func, cursor=page_cursor, first=100, **params):
+            new = records
+            if first_page and last_id is not None:
+                # the page of the last run is fetched again, skip what was already written
+                ids = [r['id'] for r in records]
+                if last_id in ids:
+                    new = records[ids.index(last_id) + 1:]
+            first_page = False
+            sink.write(new)
+            written += len(new)
+            if len(records) > 0:
+                sink.flush()
+                self.checkpoint_store.save(key, {'cursor': page_cursor,
+                                                 'last_id': records[-1]['id'],
+                                                 'timestamp': _timestamp_str(records[-1]['timestamp'])})
+            page_cursor = next_cursor
+        return written
+
+    @staticmethod
+    def __checkpoint_key(endpoint: str, params: dict) -> str:
+        return f'sync:{endpoint}:' + ':'.join(f'{k}={v}' for k, v in sorted(params.items()) if v is not None)
+
+    def __sync(self, endpoint: str, func: Callable[..., dict], params: dict, sink: RecordSink) -> int:
+        key = self.__checkpoint_key(endpoint, params)
+        if self.newest_first.get(endpoint, True):
+            return self.__sync_newest_first(key, func, params, sink)
+        return self.__sync_oldest_first(key, func, params, sink)
+
+    def sync_drops_entitlements(self,
+                                sink: RecordSink,
+                                game_id: Optional[str] = None,
+                                user_id: Optional[str] = None) -> int:
+        """Writes all drops entitlements that were added since the last sync with the same parameters to the sink,
+        see :meth:`~twitchAPI.twitch.Twitch.get_drops_entitlements`
+
+        The first sync writes all entitlements.
+
+        :param ~twitchAPI.sinks.RecordSink sink: the sink the new entitlements are written to
+        :param str game_id: A Twitch Game ID |default| :code:`None`
+        :param str user_id: A Twitch User ID |default| :code:`None`
+        :return: the amount of new entitlements
+        :rtype: int
+        :raises ~twitchAPI.types.TwitchAPIException: if the Twitch API returns a invalid page
+        """
+        return self.__sync('entitlements/drops', self.twitch.get_drops_entitlements,
+                           {'game_id': game_id, 'user_id': user_id}, sink)
+
+    def sync_extension_transactions(self, sink: RecordSink, extension_id: str) -> int:
+        """Writes all transactions of the extension that were added since the last sync to the sink,
+        see :meth:`~twitchAPI.twitch.Twitch.get_extension_transactions`
+
+        The first sync writes all transactions.
+
+        :param ~twitchAPI.sinks.RecordSink sink: the sink the new transactions are written to
+        :param str extension_id: ID of the extension
+        :return: the amount of new transactions
+        :rtype: int
+        :raises ~twitchAPI.types.TwitchAPIException: if the Twitch API returns a invalid page
+        """
+        return self.__sync('extensions/transactions', self.twitch.get_extension_transactions,
+                           {'extension_id': extension_id}, sink)
+
+    def reset(self, endpoint: str, **params) -> None:
+        """Removes the checkpoint of a sync, the next sync with the same parameters writes all records again
+
+        :param str endpoint: :code:`entitlements/drops` or :code:`extensions/transactions`
+        :param params: the parameters of the sync, e.g. :code:`extension_id`
+        :rtype: None
+        """
+        self.checkpoint_store.delete(self.__checkpoint_key(endpoint, params))
@@ -0,0 +1,364 @@
+#  Copyright (c) 2020. Lena "Teekeks" During <info@teawork.de>
+"""
+Transports
+----------
+
+The transport sends the requests of the :class:`~twitchAPI.twitch.Twitch` API helpers. Set
+:attr:`~twitchAPI.twitch.Twitch.transport` to change how requests are sent.
+
+- :class:`RequestsTransport` is the default and sends all requests through :attr:`~twitchAPI.twitch.Twitch.session`.
+  Every concurrent request needs its own HTTP/1.1 connection.
+- :class:`HTTPXTransport` uses :code:`httpx` with HTTP/2, so a lot of concurrent requests share a few multiplexed
+  connections. Install it with :code:`pip install twitchAPI[http2]`.
+
+:meth:`~twitchAPI.twitch.Twitch.warm_up` and :meth:`~twitchAPI.twitch.Twitch.enable_dns_cache` only affect
+:attr:`~twitchAPI.twitch.Twitch.session` and with that :class:`RequestsTransport`.
+
+A transport returns a response object that provides :code:`status_code`, :code:`headers`, :code:`content`,
+:code:`text` and :code:`json()` like :class:`requests.Response` does.
+
+:class:`AsyncExecutor` runs the same request descriptors (see :mod:`twitchAPI.endpoint`) with aiohttp, so API calls
+can be awaited. It refreshes tokens, retries, records metrics and runs hooks like the synchronous client.
+
+:class:`RecordingTransport` records the responses of another transport to a fixture file and :class:`ReplayTransport`
+answers requests from such a file without any network access, e.g. to benchmark the client side overhead of the API
+calls (see :code:`benchmarks/endpoint_benchmark.py`) or to test against real responses.
+
+************
+Code example
+************
+
+.. code-block:: python
+
+    from concurrent.futures import ThreadPoolExecutor
+    from twitchAPI.twitch import Twitch
+    from twitchAPI.transport import HTTPXTransport, AsyncExecutor, RecordingTransport, ReplayTransport, \
+        RequestsTransport
+
+    twitch = Twitch('my_app_id', 'my_app_secret')
+    twitch.transport = HTTPXTransport(max_connections=4)
+    twitch.authenticate_app([])
+    with ThreadPoolExecutor(max_workers=200) as executor:
+        users = list(executor.map(lambda i: twitch.get_users(user_ids=[i]), user_ids))
+    twitch.transport.close()
+
+    # the same API calls from async code
+    executor = AsyncExecutor(twitch)
+    users = await executor.call('get_users', logins=['teekeks'])
+    await executor.close()
+
+    # record real responses once ...
+    twitch.transport = RecordingTransport(RequestsTransport(twitch.session))
+    twitch.get_users(logins=['teekeks'])
+    twitch.transport.save('fixture.json.gz')
+    # ... and replay them with the original latency
+    twitch.transport = ReplayTransport('fixture.json.gz', speed=1.0)
+    users = twitch.get_users(logins=['teekeks'])
+
+********************
+Class Documentation:
+********************
+"""
+
+import asyncio
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
+    from .endpoint import HelixRequest
+    from .twitch import Twitch
+
+
+class Transport:
+    """Base class of all transports"""
+
+    def request(self, method: str, url: str, headers: dict, data: Optional[dict] = None):
+        """Sends a request and returns the response
+
+        :param str method: the HTTP method
+        :param str url: the full URL including the query
+        :param dict headers: the request headers
+        :param dict data: sent as JSON body if not None |default| :code:`None`
+        :return: the response, with :code:`status_code`, :code:`headers`, :code:`content`, :code:`text` and
+                :code:`json()`
+        """
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        """Closes all open connections
+
+        :rtype: None
+        """
+        pass
+
+
+class RequestsTransport(Transport):
+    """Sends requests through a :class:`requests.Session`
+
+    :param ~requests.Session session: the session to use
+    """
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def request(self, method: str, url: str, headers: dict, data: Optional[dict] = None) -> requests.Response:
+        if data is None:
+            return self.session.request(method, url, headers=headers)
+        return self.session.request(method, url, headers=headers, json=data)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class HTTPXTransport(Transport):
+    """Sends requests through a :class:`httpx.Client`, can be used by multiple threads at once
+
+    :param bool http2: use HTTP/2 for hosts that support it, requires :code:`h2` |default| :code:`True`
+    :param int max_connections: the maximum amount of open connections |default| :code:`10`
+    :param float timeout: timeout of every request in seconds |default| :code:`30`
+    :raises RuntimeError: if httpx is not installed
+    """
+
+    def __init__(self, http2: bool = True, max_connections: int = 10, timeout: float = 30.0):
+        # imported here since httpx is optional and slow to import
+        try:
+            import httpx
+        except ImportError:
+            raise RuntimeError('HTTPXTransport requires httpx, install it with pip install twitchAPI[http2]')
+        self.client = httpx.Client(http2=http2,
+                                   timeout=timeout,
+                                   limits=httpx.Limits(max_connections=max_connections,
+                                                       max_keepalive_connections=max_connections))
+
+    def request(self, method: str, url: str, headers: dict, data: Optional[dict] = None):
+        return self.client.request(method, url, headers=headers, json=data)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class BufferedResponse:
+    """A completely read response
+
+    :param int status_code: the status code
+    :param headers: the response headers
+    :param bytes content: the body
+    """
+
+    def __init__(self, status_code: int, headers, content: bytes):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncExecutor:
+    """Runs API calls of a :class:`~twitchAPI.twitch.Twitch` instance with aiohttp
+
+    The authentication, :attr:`~twitchAPI.twitch.Twitch.base_url` and retry settings of the client are used.
+
+    :param ~twitchAPI.twitch.Twitch twitch: the client
+    :param ~aiohttp.ClientSession session: the session to send the requests with, a new one is created on first use
+            if None |default| :code:`None`
+    """
+
+    def __init__(self, twitch: 'Twitch', session: Optional['ClientSession'] = None):
+        self.twitch = twitch
+        self.__session = session
+
+    async def __send(self, request: 'HelixRequest', url: str, headers: dict) -> BufferedResponse:
+        if self.__session is None:
+            # imported here since aiohttp is slow to import
+            from aiohttp import ClientSession
+            self.__session = ClientSession()
+        async with self.__session.request(request.method, url, headers=headers, json=request.body) as response:
+            return BufferedResponse(response.status, response.headers, await response.read())
+
+    async def execute(self, request: 'HelixRequest', retries: int = 1, ratelimit_retries: int = 1):
+        """Sends the request and returns its result, see :meth:`~twitchAPI.twitch.Twitch.execute`
+
+        :param ~twitchAPI.endpoint.HelixRequest request: the request
+        :param int retries: how often the request is retried after a 401 or 503 response |default| :code:`1`
+        :param int ratelimit_retries: how often the request is retried after a 429 response if
+                :attr:`~twitchAPI.twitch.Twitch.wait_on_ratelimit` is set |default| :code:`1`
+        :return: the result of the transform of the request or the parsed JSON body
+        :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
+        """
+        url, headers = self.twitch.prepare_request(request)
+        context, start = self.twitch._before_send(request.method, url)
+        response = await self.__send(request, url, headers)
+        self.twitch._after_receive(request.method, url, response, start, context)
+        retry = self.twitch._get_retry(response, retries, ratelimit_retries)
+        if retry is not None:
+            reason, retries, ratelimit_retries = retry
+            self.twitch._record_retry(request.method, url, reason, context)
+            if reason == 'ratelimit':
+                await asyncio.sleep(self.twitch._get_ratelimit_wait(response))
+            elif reason == 'unauthorized':
+                # the refresh is blocking, dont stall the event loop with it
+                await asyncio.get_running_loop().run_in_executor(None, self.twitch.refresh_used_token)
+            return await self.execute(request, retries, ratelimit_retries)
+        if request.transform is None:
+            return response.json()
+        return request.transform(response)
+
+    async def call(self, name: str, *args, **kwargs):
+        """Runs a API call of the client, e.g. :code:`await executor.call('get_users', logins=['teekeks'])`
+
+        :param str name: name of the API call
+        :param args: the arguments of the API call
+        :param kwargs: the keyword arguments of the API call
+        :return: the same result as the API call of the client
+        :raises ValueError: if name is not a API call or the arguments are invalid
+        """
+        return await self.execute(self.twitch.build_request(name, *args, **kwargs))
+
+    async def close(self) -> None:
+        """Closes the session
+
+        :rtype: None
+        """
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+
+def _request_key(method: str, url: str, data: Optional[dict]) -> Tuple[str, str, Optional[str]]:
+    # only path and query are used, so fixtures work with any base url
+    parsed = urlparse(url)
+    path = parsed.path + ('?' + parsed.query if parsed.query else '')
+    return method, path, json.dumps(data, sort_keys=True) if data is not None else None
+
+
+class RecordingTransport(Transport):
+    """Sends requests through another transport and records them to save them as fixture for
+    :class:`ReplayTransport`
+
+    A fixture file is a JSON object with a :code:`entries` list. Every entry is a list of method, path with query,
+    JSON body, status code, the kept response headers, response time in milliseconds, unix time of the recording and
+    the response body. Files ending with :code:`.gz` are compressed.
+
+    :param ~twitchAPI.transport.Transport transport: the transport that sends the requests
+    :var list[str] keep_headers: the response headers that are recorded |default|
+            :code:`['Content-Type', 'Ratelimit-Limit', 'Ratelimit-Remaining', 'Ratelimit-Reset']`
+    """
+
+    def __init__(self, transport: Transport):
+        self.transport = transport
+        self.keep_headers: List[str] = ['Content-Type', 'Ratelimit-Limit', 'Ratelimit-Remaining', 'Ratelimit-Reset']
+        self.__entries: List[list] = []
+        self.__lock = threading.Lock()
+
+    def request(self, method: str, url: str, headers: dict, data: Optional[dict] = None):
+        start = time.perf_counter()
+        response = self.transport.request(method, url, headers, data=data)
+        elapsed = round((time.perf_counter() - start) * 1000, 1)
+        kept = {h: response.headers[h] for h in self.keep_headers if h in response.headers}
+        method, path, _ = _request_key(method, url, data)
+        with self.__lock:
+            self.__entries.append([method, path, data, response.status_code, kept, elapsed, int(time.time()),
+                                   response.content.decode('utf-8')])
+        return response
+
+    @property
+    def entries(self) -> List[list]:
+        """A copy of the recorded requests, can be passed to :class:`ReplayTransport`
+
+        :rtype: list[list]
+        """
+        with self.__lock:
+            return list(self.__entries)
+
+    def save(self, path: str) -> None:
+        """Writes all recorded requests to a fixture file
+
+        :param str path: the file, compressed with gzip if it ends with :code:`.gz`
+        :rtype: None
+        """
+        with self.__lock:
+            data = json.dumps({'entries': self.__entries}, separators=(',', ':')).encode('utf-8')
+        if path.endswith('.gz'):
+            data = gzip.compress(data)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def clear(self) -> None:
+        """Removes all recorded requests
+
+        :rtype: None
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """Answers requests with the responses of a fixture recorded by :class:`RecordingTransport`, can be used by
+    multiple threads at once
+
+    Requests are matched by method, path, query and body. If a request was recorded multiple times, the responses are
+    returned in the recorded order and start over after the last one. :code:`Ratelimit-Reset` is moved by the time
+    passed since the recording, so the rate limit handling of the client behaves like it did back then.
+
+    :param path_or_entries: the fixture file or the already loaded entries
+    :param float speed: replay the recorded response times this many times faster, e.g. :code:`1.0` for the original
+            latency, respond immediately if None |default| :code:`None`
+    :raises ValueError: from :meth:`request` if no response was recorded for the request
+    """
+
+    def __init__(self, path_or_entries: Union[str, List[list]], speed: Optional[float] = None):
+        if isinstance(path_or_entries, str):
+            path_or_entries = self.load(path_or_entries)
+        self.speed: Optional[float] = speed
+        self.__responses: Dict[tuple, List[list]] = defaultdict(list)
+        self.__positions: Dict[tuple, int] = defaultdict(int)
+        self.__lock = threading.Lock()
+        for entry in path_or_entries:
+            self.__responses[_request_key(entry[0], entry[1], entry[2])].append(entry)
+
+    @staticmethod
+    def load(path: str) -> List[list]:
+        """Reads the entries of a fixture file
+
+        :param str path: the file, decompressed with gzip if it ends with :code:`.gz`
+        :rtype: list[list]
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if path.endswith('.gz'):
+            data = gzip.decompress(data)
+        return json.loads(data)['entries']
+
+    def request(self, method: str, url: str, headers: dict, data: Optional[dict] = None) -> BufferedResponse:
+        key = _request_key(method, url, data)
+        with self.__lock:
+            responses = self.__responses.get(key)
+            if responses is None:
+                raise ValueError(f'no recorded response for {method} {key[1]}')
+            entry = responses[self.__positions[key] % len(responses)]
+            self.__positions[key] += 1
+        _, _, _, status, recorded_headers, elapsed, recorded_at, content = entry
+        headers = dict(recorded_headers)
+        reset = headers.get('Ratelimit-Reset')
+        if reset is not None and reset.isdigit():
+            headers['Ratelimit-Reset'] = str(int(reset) + int(time.time()) - recorded_at)
+        if self.speed is not None and self.speed > 0:
+            time.sleep(elapsed / 1000 / self.speed)
+        return BufferedResponse(status, headers, content.encode('utf-8'))
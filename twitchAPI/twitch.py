@@ -57,13 +57,27 @@ See :obj:`twitchAPI.oauth` for more info.
 Class Documentation:
 ********************
 """
+import logging
 import requests
-from typing import Union, List, Optional
-from .helper import build_url, TWITCH_API_BASE_URL, TWITCH_AUTH_BASE_URL, make_fields_datetime, build_scope, \
-    fields_to_enum
+import time
+from typing import Union, List, Optional, Callable, Tuple, TYPE_CHECKING
+from urllib.parse import urlparse
+from .helper import build_url, TWITCH_API_BASE_URL, TWITCH_AUTH_BASE_URL, build_scope, run_hooks
+from .endpoint import HelixRequest, helix_endpoint, parse_json, datetime_fields, enum_fields, status_equals, ignore_body
 from datetime import datetime
+from .metrics import MetricsSink
+from .transport import Transport, RequestsTransport
 from .types import *
 
+if TYPE_CHECKING:
+    from .connection import DNSCache
+
+AUTOMOD_BATCH_SIZE = 100
+"""Maximum amount of messages per request of :meth:`Twitch.check_automod_status_batch`"""
+
+CODE_BATCH_SIZE = 20
+"""Maximum amount of codes per request of :meth:`Twitch.get_code_status` and :meth:`Twitch.redeem_code`"""
+
 
 class Twitch:
     """
@@ -72,6 +86,20 @@ class Twitch:
     :param str app_id: Your app id
     :param str app_secret: Your app secret
     :var bool auto_refresh_auth: If set to true, auto refresh the auth token once it expires. |default| :code:`True`
+    :var str base_url: The URL of the Twitch API, only change this for testing, e.g. against
+                    :class:`~twitchAPI.mock_server.MockHelixServer`. |default| :code:`https://api.twitch.tv/helix/`
+    :var str auth_base_url: The URL of the Twitch authentication API, only change this for testing.
+                    |default| :code:`https://id.twitch.tv/`
+    :var bool wait_on_ratelimit: If set to true, wait till the rate limit bucket is refilled and retry once when the
+                    rate limit was hit, otherwise the 429 response is returned. |default| :code:`False`
+    :var ~twitchAPI.metrics.MetricsSink metrics: If set, latency, error and rate limit metrics of every request are
+                    recorded in this sink, see :mod:`twitchAPI.metrics` |default| :code:`None`
+    :var ~requests.Session session: The session used for all requests, it keeps connections to the Twitch API open
+                    between requests. Can be used by multiple threads at once.
+    :var ~twitchAPI.transport.Transport transport: Sends the requests of all API calls, see :mod:`twitchAPI.transport`
+                    |default| :class:`~twitchAPI.transport.RequestsTransport` using :attr:`session`
+    :var bool warm_up_on_auth: If set to true, :meth:`authenticate_app` calls :meth:`warm_up` before requesting the
+                    token. |default| :code:`False`
     """
     app_id: Optional[str] = None
     app_secret: Optional[str] = None
@@ -85,10 +113,54 @@ class Twitch:
     __has_user_auth: bool = False
 
     auto_refresh_auth: bool = True
+    base_url: str = TWITCH_API_BASE_URL
+    auth_base_url: str = TWITCH_AUTH_BASE_URL
+    wait_on_ratelimit: bool = False
+    metrics: Optional[MetricsSink] = None
+    warm_up_on_auth: bool = False
 
     def __init__(self, app_id: str, app_secret: str):
         self.app_id = app_id
         self.app_secret = app_secret
+        self.session = requests.Session()
+        self.transport: Transport = RequestsTransport(self.session)
+        self.__hooks = {}
+
+    def register_hook(self, event: HookEvent, hook: Callable[[dict], None]) -> None:
+        """Registers a function that gets called at the given point of the lifecycle of every request.
+
+        The hook is called with a context dict that contains at least :code:`endpoint` (e.g. :code:`users/follows`),
+        :code:`method` and :code:`start` (:func:`time.perf_counter` at the start of the request).
+        The same dict is passed to all hooks of a single request attempt, so a tracer can store its span in it.
+
+        - :const:`~twitchAPI.types.HookEvent.BEFORE_SEND` also gets :code:`url`
+        - :const:`~twitchAPI.types.HookEvent.AFTER_RECEIVE` also gets :code:`status`, :code:`response` and
+          :code:`duration` in seconds
+        - :const:`~twitchAPI.types.HookEvent.ON_RETRY` also gets the :code:`reason` of the retry
+        - :const:`~twitchAPI.types.HookEvent.ON_REFRESH` gets :code:`auth_type` and the :code:`duration` of the refresh
+
+        Exceptions raised by hooks are logged and ignored.
+
+        :param ~twitchAPI.types.HookEvent event: the lifecycle event
+        :param hook: the function to call
+        :rtype: None
+        :raises ValueError: if the event is a webhook only event
+        """
+        if event in (HookEvent.BEFORE_DISPATCH, HookEvent.AFTER_DISPATCH):
+            raise ValueError(f'{event} is only available for TwitchWebHook')
+        self.__hooks.setdefault(event, []).append(hook)
+
+    def remove_hook(self, event: HookEvent, hook: Callable[[dict], None]) -> None:
+        """Removes a hook registered with :meth:`register_hook`
+
+        :param ~twitchAPI.types.HookEvent event: the lifecycle event
+        :param hook: the registered function
+        :rtype: None
+        :raises ValueError: if the hook is not registered for this event
+        """
+        self.__hooks.get(event, []).remove(hook)
+        if len(self.__hooks[event]) == 0:
+            self.__hooks.pop(event)
 
     def __generate_header(self, auth_type: 'AuthType', required_scope: List[AuthScope]) -> dict:
         header = {"Client-ID": self.app_id}
@@ -114,138 +186,175 @@ class Twitch:
 
     def refresh_used_token(self):
         """Refreshes the currently used token"""
+        auth_type = 'user' if self.__has_user_auth else 'app'
+        if self.metrics is not None:
+            self.metrics.increment('twitch_api_token_refreshes_total', tags={'auth_type': auth_type})
+        start = time.perf_counter()
         if self.__has_user_auth:
             from .oauth import refresh_access_token
             self.__user_auth_token,\
                 self.__user_auth_refresh_token = refresh_access_token(self.__user_auth_refresh_token,
                                                                       self.app_id,
-                                                                      self.app_secret)
+                                                                      self.app_secret,
+                                                                      auth_base_url=self.auth_base_url)
         else:
             self.__generate_app_token()
-
-    def __api_post_request(self,
-                           url: str,
-                           auth_type: 'AuthType',
-                           required_scope: List[AuthScope],
-                           data: Optional[dict] = None,
-                           retries: int = 1) -> requests.Response:
-        """Make POST request with authorization"""
-        headers = self.__generate_header(auth_type, required_scope)
-        req = None
-        if data is None:
-            req = requests.post(url, headers=headers)
-        else:
-            req = requests.post(url, headers=headers, json=data)
-        if self.auto_refresh_auth and retries > 0:
-            if req.status_code == 401:
-                # unauthorized, lets try to refresh the token once
-                self.refresh_used_token()
-                return self.__api_post_request(url, auth_type, required_scope, data=data, retries=retries - 1)
-            elif req.status_code == 503:
-                # service unavailable, retry exactly once as recommended by twitch documentation
-                return self.__api_post_request(url, auth_type, required_scope, data=data, retries=0)
-        elif self.auto_refresh_auth and retries <= 0:
-            if req.status_code == 503:
-                raise TwitchBackendException('The Twitch API returns a server error')
-        return req
-
-    def __api_put_request(self,
-                          url: str,
-                          auth_type: 'AuthType',
-                          required_scope: List[AuthScope],
-                          data: Optional[dict] = None,
-                          retries: int = 1) -> requests.Response:
-        """Make PUT request with authorization"""
-        headers = self.__generate_header(auth_type, required_scope)
-        req = None
-        if data is None:
-            req = requests.put(url, headers=headers)
-        else:
-            req = requests.put(url, headers=headers, json=data)
-        if self.auto_refresh_auth and retries > 0:
-            if req.status_code == 401:
-                # unauthorized, lets try to refresh the token once
-                self.refresh_used_token()
-                return self.__api_put_request(url, auth_type, required_scope, data=data, retries=retries - 1)
-            elif req.status_code == 503:
-                # service unavailable, retry exactly once as recommended by twitch documentation
-                return self.__api_put_request(url, auth_type, required_scope, data=data, retries=0)
-        elif self.auto_refresh_auth and retries <= 0:
-            if req.status_code == 503:
-                raise TwitchBackendException('The Twitch API returns a server error')
-        return req
-
-    def __api_patch_request(self,
-                            url: str,
-                            auth_type: 'AuthType',
-                            required_scope: List[AuthScope],
-                            data: Optional[dict] = None,
-                            retries: int = 1) -> requests.Response:
-        """Make PATCH request with authorization"""
-        headers = self.__generate_header(auth_type, required_scope)
-        req = None
-        if data is None:
-            req = requests.patch(url, headers=headers)
-        else:
-            req = requests.patch(url, headers=headers, json=data)
+        if HookEvent.ON_REFRESH in self.__hooks:
+            run_hooks(self.__hooks, HookEvent.ON_REFRESH, {'endpoint': 'oauth2/token',
+                                                           'method': 'POST',
+                                                           'start': start,
+                                                           'auth_type': auth_type,
+                                                           'duration': time.perf_counter() - start})
+
+    def __get_endpoint(self, url: str) -> str:
+        if url.startswith(self.base_url):
+            return url[len(self.base_url):].split('?', 1)[0]
+        return urlparse(url).path.strip('/')
+
+    def __record_response(self, method: str, endpoint: str, req: requests.Response, duration: float) -> None:
+        tags = {'endpoint': endpoint, 'method': method}
+        self.metrics.increment('twitch_api_requests_total', tags=dict(tags, status=str(req.status_code)))
+        self.metrics.observe('twitch_api_request_duration_seconds', duration, tags=tags)
+        self.metrics.increment('twitch_api_response_bytes_total', len(req.content), tags=tags)
+        remaining = req.headers.get('Ratelimit-Remaining')
+        if remaining is not None and remaining.isdigit():
+            self.metrics.gauge('twitch_api_ratelimit_remaining', int(remaining))
+
+    # the following methods are shared with AsyncExecutor, so both send and report requests the same way
+
+    def _before_send(self, method: str, url: str) -> Tuple[Optional[dict], float]:
+        """runs the BEFORE_SEND hooks, returns the hook context (None without hooks) and the start of the request"""
+        context = None
+        # only build the context when it is actually used
+        if len(self.__hooks) > 0:
+            context = {'endpoint': self.__get_endpoint(url), 'method': method, 'url': url,
+                       'start': time.perf_counter()}
+            run_hooks(self.__hooks, HookEvent.BEFORE_SEND, context)
+        return context, time.perf_counter()
+
+    def _after_receive(self, method: str, url: str, req, start: float, context: Optional[dict]) -> None:
+        """records the metrics of a response and runs the AFTER_RECEIVE hooks"""
+        if self.metrics is not None:
+            self.__record_response(method, self.__get_endpoint(url), req, time.perf_counter() - start)
+        if context is not None:
+            context.update(status=req.status_code, response=req, duration=time.perf_counter() - context['start'])
+            run_hooks(self.__hooks, HookEvent.AFTER_RECEIVE, context)
+
+    def _get_retry(self, req, retries: int, ratelimit_retries: int) -> Optional[Tuple[str, int, int]]:
+        """decides if a response is retried, returns the reason and the remaining retries or None
+
+        :raises ~twitchAPI.types.TwitchBackendException: on a 503 that is not retried anymore
+        """
+        if req.status_code == 429 and self.wait_on_ratelimit and ratelimit_retries > 0:
+            # has its own budget, so waiting for the rate limit does not use up the token refresh
+            return 'ratelimit', retries, ratelimit_retries - 1
         if self.auto_refresh_auth and retries > 0:
             if req.status_code == 401:
                 # unauthorized, lets try to refresh the token once
-                self.refresh_used_token()
-                return self.__api_patch_request(url, auth_type, required_scope, data=data, retries=retries - 1)
+                return 'unauthorized', retries - 1, ratelimit_retries
             elif req.status_code == 503:
                 # service unavailable, retry exactly once as recommended by twitch documentation
-                return self.__api_patch_request(url, auth_type, required_scope, data=data, retries=0)
+                return 'unavailable', 0, ratelimit_retries
         elif self.auto_refresh_auth and retries <= 0:
             if req.status_code == 503:
                 raise TwitchBackendException('The Twitch API returns a server error')
-        return req
-
-    def __api_delete_request(self,
-                             url: str,
-                             auth_type: 'AuthType',
-                             required_scope: List[AuthScope],
-                             data: Optional[dict] = None,
-                             retries: int = 1) -> requests.Response:
-        """Make DELETE request with authorization"""
+        return None
+
+    def _record_retry(self, method: str, url: str, reason: str, context: Optional[dict]) -> None:
+        """records the retry metric and runs the ON_RETRY hooks"""
+        if self.metrics is not None:
+            self.metrics.increment('twitch_api_retries_total',
+                                   tags={'endpoint': self.__get_endpoint(url), 'method': method, 'reason': reason})
+        if context is not None:
+            context['reason'] = reason
+            run_hooks(self.__hooks, HookEvent.ON_RETRY, context)
+
+    def _get_ratelimit_wait(self, req) -> float:
+        """returns the seconds till the rate limit bucket given by the Ratelimit-Reset header is refilled"""
+        try:
+            wait = float(req.headers.get('Ratelimit-Reset', 0)) - time.time()
+        except ValueError:
+            wait = 0
+        # dont trust a clock skew for longer than a full bucket refill
+        wait = min(max(wait, 0), 60)
+        if self.metrics is not None:
+            self.metrics.increment('twitch_api_ratelimit_waits_total')
+            self.metrics.observe('twitch_api_ratelimit_wait_seconds', wait)
+        return wait
+
+    def __api_request(self,
+                      method: str,
+                      url: str,
+                      auth_type: 'AuthType',
+                      required_scope: List[AuthScope],
+                      data: Optional[dict] = None,
+                      retries: int = 1,
+                      ratelimit_retries: int = 1) -> requests.Response:
+        """Make request with authorization, refreshes the token on a 401 and retries on a 503 or 429"""
         headers = self.__generate_header(auth_type, required_scope)
-        req = None
-        if data is None:
-            req = requests.delete(url, headers=headers)
-        else:
-            req = requests.delete(url, headers=headers, json=data)
-        if self.auto_refresh_auth and retries > 0:
-            if req.status_code == 401:
-                # unauthorized, lets try to refresh the token once
-                self.refresh_used_token()
-                return self.__api_delete_request(url, auth_type, required_scope, data=data, retries=retries - 1)
-            elif req.status_code == 503:
-                # service unavailable, retry exactly once as recommended by twitch documentation
-                return self.__api_delete_request(url, auth_type, required_scope, data=data, retries=0)
-        elif self.auto_refresh_auth and retries <= 0:
-            if req.status_code == 503:
-                raise TwitchBackendException('The Twitch API returns a server error')
-        return req
+        context, start = self._before_send(method, url)
+        req = self.transport.request(method, url, headers, data=data)
+        self._after_receive(method, url, req, start, context)
+        retry = self._get_retry(req, retries, ratelimit_retries)
+        if retry is None:
+            return req
+        reason, retries, ratelimit_retries = retry
+        self._record_retry(method, url, reason, context)
+        if reason == 'ratelimit':
+            wait = self._get_ratelimit_wait(req)
+            if wait > 0:
+                time.sleep(wait)
+        elif reason == 'unauthorized':
+            self.refresh_used_token()
+        return self.__api_request(method, url, auth_type, required_scope, data=data, retries=retries,
+                                  ratelimit_retries=ratelimit_retries)
+
+    def __build_request_url(self, request: HelixRequest) -> str:
+        """the URL of a request, shared by execute and prepare_request so all transports send the same request"""
+        return build_url(self.base_url + request.path, request.params,
+                         remove_none=request.remove_none, split_lists=request.split_lists)
+
+    def prepare_request(self, request: HelixRequest) -> Tuple[str, dict]:
+        """Builds the URL and the headers of a request, used by transports that send requests on their own
+
+        :param ~twitchAPI.endpoint.HelixRequest request: the request
+        :return: the URL and the headers
+        :rtype: tuple[str, dict]
+        :raises ~twitchAPI.types.UnauthorizedException: if the required authentication is not set
+        :raises ~twitchAPI.types.MissingScopeException: if the authentication is missing a required scope
+        """
+        return self.__build_request_url(request), self.__generate_header(request.auth_type, request.required_scope)
 
-    def __api_get_request(self, url: str,
-                          auth_type: 'AuthType',
-                          required_scope: List[AuthScope],
-                          retries: int = 1) -> requests.Response:
-        """Make GET request with authorization"""
-        headers = self.__generate_header(auth_type, required_scope)
-        req = requests.get(url, headers=headers)
-        if self.auto_refresh_auth and retries > 0:
-            if req.status_code == 401:
-                # unauthorized, lets try to refresh the token once
-                self.refresh_used_token()
-                return self.__api_get_request(url,  auth_type, required_scope, retries - 1)
-            elif req.status_code == 503:
-                # service unavailable, retry exactly once as recommended by twitch documentation
-                return self.__api_get_request(url, auth_type, required_scope, 0)
-        elif self.auto_refresh_auth and retries <= 0:
-            if req.status_code == 503:
-                raise TwitchBackendException('The Twitch API returns a server error')
-        return req
+    def execute(self, request: HelixRequest):
+        """Sends a request through :attr:`transport` and returns its result, this is what every API call does
+
+        :param ~twitchAPI.endpoint.HelixRequest request: the request
+        :return: the result of the transform of the request or the parsed JSON body
+        :raises ~twitchAPI.types.UnauthorizedException: if the required authentication is not set
+        :raises ~twitchAPI.types.MissingScopeException: if the authentication is missing a required scope
+        :raises ~twitchAPI.types.TwitchAuthorizationException: if the used authentication token became invalid
+                        and a re authentication failed
+        :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
+        """
+        response = self.__api_request(request.method, self.__build_request_url(request), request.auth_type,
+                                      request.required_scope, data=request.body)
+        if request.transform is None:
+            return response.json()
+        return request.transform(response)
+
+    def build_request(self, name: str, *args, **kwargs) -> HelixRequest:
+        """Returns the request a API call would send, without sending it
+
+        :param str name: name of the API call, e.g. :code:`get_users`
+        :param args: the arguments of the API call
+        :param kwargs: the keyword arguments of the API call
+        :rtype: ~twitchAPI.endpoint.HelixRequest
+        :raises ValueError: if name is not a API call or the arguments are invalid
+        """
+        build = getattr(getattr(type(self), name, None), 'build', None)
+        if build is None:
+            raise ValueError(f'{name} is not a API call')
+        return build(self, *args, **kwargs)
 
     def __generate_app_token(self) -> None:
         params = {
@@ -254,8 +363,8 @@ class Twitch:
             'grant_type': 'client_credentials',
             'scope': build_scope(self.__app_auth_scope)
         }
-        url = build_url(TWITCH_AUTH_BASE_URL + 'oauth2/token', params)
-        result = requests.post(url)
+        url = build_url(self.auth_base_url + 'oauth2/token', params)
+        result = self.session.post(url)
         if result.status_code != 200:
             raise TwitchAuthorizationException(f'Authentication failed with code {result.status_code} ({result.text})')
         try:
@@ -266,6 +375,45 @@ class Twitch:
         except KeyError:
             raise TwitchAuthorizationException('Authentication response did not contain access_token')
 
+    def enable_dns_cache(self, ttl: float = 300.0) -> 'DNSCache':
+        """Resolves the host names of all requests of :attr:`session` through a cache, see
+        :class:`~twitchAPI.connection.DNSCache`
+
+        :param float ttl: seconds a resolved address is used |default| :code:`300`
+        :return: the cache
+        :rtype: ~twitchAPI.connection.DNSCache
+        """
+        from .connection import DNSCache, CachedDNSAdapter
+        cache = DNSCache(ttl)
+        for prefix in ('https://', 'http://'):
+            self.session.mount(prefix, CachedDNSAdapter(cache))
+        return cache
+
+    def warm_up(self, connections: int = 2) -> None:
+        """Opens pooled connections to the Twitch API and the Twitch authentication API, so the next requests do not
+        have to resolve the host and open a new connection first.
+
+        Every connection is opened by a :code:`HEAD` request without authorization. Failed requests are logged.
+
+        :param int connections: the amount of connections opened per host |default| :code:`2`
+        :rtype: None
+        :raises ValueError: if connections is smaller than 1
+        """
+        if connections < 1:
+            raise ValueError('connections has to be at least 1')
+        from concurrent.futures import ThreadPoolExecutor
+
+        def ping(url: str):
+            try:
+                self.session.head(url, timeout=10).close()
+            except requests.RequestException:
+                logging.exception(f'warm up request to {url} failed')
+
+        urls = [self.base_url, self.auth_base_url] * connections
+        # concurrent requests, otherwise the same connection would be used over and over
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            list(executor.map(ping, urls))
+
     def authenticate_app(self, scope: List[AuthScope]) -> None:
         """Authenticate with a fresh generated app token
 
@@ -273,6 +421,8 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchAuthorizationException: if the authentication fails
         :return: None
         """
+        if self.warm_up_on_auth:
+            self.warm_up()
         self.__app_auth_scope = scope
         self.__generate_app_token()
         self.__has_app_auth = True
@@ -320,6 +470,7 @@ class Twitch:
     # API calls
     # ======================================================================================================================
 
+    @helix_endpoint
     def get_extension_analytics(self,
                                 after: Optional[str] = None,
                                 extension_id: Optional[str] = None,
@@ -367,13 +518,12 @@ class Twitch:
             'started_at': started_at.isoformat() if started_at is not None else None,
             'type': report_type.value if report_type is not None else None
         }
-        url = build_url(TWITCH_API_BASE_URL + 'analytics/extensions',
-                        url_params,
-                        remove_none=True)
-        response = self.__api_get_request(url, AuthType.USER, required_scope=[AuthScope.ANALYTICS_READ_EXTENSION])
-        data = response.json()
-        return make_fields_datetime(data, ['started_at', 'ended_at'])
+        return HelixRequest('GET', 'analytics/extensions', url_params,
+                            AuthType.USER, [AuthScope.ANALYTICS_READ_EXTENSION],
+                            remove_none=True,
+                            transform=parse_json(datetime_fields('started_at', 'ended_at')))
 
+    @helix_endpoint
     def get_game_analytics(self,
                            after: Optional[str] = None,
                            first: int = 20,
@@ -419,13 +569,11 @@ class Twitch:
             'started_at': started_at.isoformat() if started_at is not None else None,
             'type': report_type.value if report_type is not None else None
         }
-        url = build_url(TWITCH_API_BASE_URL + 'analytics/games',
-                        url_params,
-                        remove_none=True)
-        response = self.__api_get_request(url, AuthType.USER, [AuthScope.ANALYTICS_READ_GAMES])
-        data = response.json()
-        return make_fields_datetime(data, ['ended_at', 'started_at'])
+        return HelixRequest('GET', 'analytics/games', url_params, AuthType.USER, [AuthScope.ANALYTICS_READ_GAMES],
+                            remove_none=True,
+                            transform=parse_json(datetime_fields('ended_at', 'started_at')))
 
+    @helix_endpoint
     def get_bits_leaderboard(self,
                              count: int = 10,
                              period: TimePeriod = TimePeriod.ALL,
@@ -457,11 +605,11 @@ class Twitch:
             'started_at': started_at.isoformat() if started_at is not None else None,
             'user_id': user_id
         }
-        url = build_url(TWITCH_API_BASE_URL + 'bits/leaderboard', url_params, remove_none=True)
-        response = self.__api_get_request(url, AuthType.USER, [AuthScope.BITS_READ])
-        data = response.json()
-        return make_fields_datetime(data, ['ended_at', 'started_at'])
+        return HelixRequest('GET', 'bits/leaderboard', url_params, AuthType.USER, [AuthScope.BITS_READ],
+                            remove_none=True,
+                            transform=parse_json(datetime_fields('ended_at', 'started_at')))
 
+    @helix_endpoint
     def get_extension_transactions(self,
                                    extension_id: str,
                                    transaction_id: Optional[str] = None,
@@ -491,13 +639,13 @@ class Twitch:
             'extension_id': extension_id,
             'id': transaction_id,
             'after': after,
-            first: first
+            'first': first
         }
-        url = build_url(TWITCH_API_BASE_URL + 'extensions/transactions', url_param, remove_none=True)
-        result = self.__api_get_request(url, AuthType.APP, [])
-        data = result.json()
-        return make_fields_datetime(data, ['timestamp'])
+        return HelixRequest('GET', 'extensions/transactions', url_param, AuthType.APP, [],
+                            remove_none=True,
+                            transform=parse_json(datetime_fields('timestamp')))
 
+    @helix_endpoint
     def create_clip(self,
                     broadcaster_id: str,
                     has_delay: bool = False) -> dict:
@@ -521,10 +669,9 @@ class Twitch:
             'broadcaster_id': broadcaster_id,
             'has_delay': str(has_delay).lower()
         }
-        url = build_url(TWITCH_API_BASE_URL + 'clips', param)
-        result = self.__api_post_request(url, AuthType.USER, [AuthScope.CLIPS_EDIT])
-        return result.json()
+        return HelixRequest('POST', 'clips', param, AuthType.USER, [AuthScope.CLIPS_EDIT])
 
+    @helix_endpoint
     def get_clips(self,
                   broadcaster_id: Optional[str] = None,
                   game_id: Optional[str] = None,
@@ -573,11 +720,12 @@ class Twitch:
             'ended_at': ended_at.astimezone().isoformat() if ended_at is not None else None,
             'started_at': started_at.astimezone().isoformat() if started_at is not None else None
         }
-        url = build_url(TWITCH_API_BASE_URL + 'clips', param, split_lists=True, remove_none=True)
-        result = self.__api_get_request(url, AuthType.APP, [])
-        data = result.json()
-        return make_fields_datetime(data, ['created_at'])
+        return HelixRequest('GET', 'clips', param, AuthType.APP, [],
+                            remove_none=True,
+                            split_lists=True,
+                            transform=parse_json(datetime_fields('created_at')))
 
+    @helix_endpoint
     def create_entitlement_grants_upload_url(self,
                                              manifest_id: str) -> dict:
         """Creates a URL where you can upload a manifest file and notify users that they have an entitlement.
@@ -602,10 +750,9 @@ class Twitch:
             'manifest_id': manifest_id,
             'type': 'bulk_drops_grant'
         }
-        url = build_url(TWITCH_API_BASE_URL + 'entitlements/upload', param)
-        result = self.__api_post_request(url, AuthType.APP, [])
-        return result.json()
+        return HelixRequest('POST', 'entitlements/upload', param, AuthType.APP, [])
 
+    @helix_endpoint
     def get_code_status(self,
                         code: List[str],
                         user_id: int) -> dict:
@@ -614,6 +761,8 @@ class Twitch:
         Requires App authentication\n
         For detailed documentation, see here: https://dev.twitch.tv/docs/api/reference#get-code-status
 
+        Use :func:`~twitchAPI.bulk.get_code_status_bulk` for more than :const:`~twitchAPI.twitch.CODE_BATCH_SIZE` codes.
+
         :param list[str] code: The code to get the status of. Maximum of 20 entries
         :param int user_id: Represents the numeric Twitch user ID of the account which is going to receive the
                         entitlement associated with the code.
@@ -624,17 +773,17 @@ class Twitch:
         :raises ValueError: if length of code is not in range 1 to 20
         :rtype: dict
         """
-        if len(code) > 20 or len(code) < 1:
-            raise ValueError('only between 1 and 20 codes are allowed')
+        if len(code) > CODE_BATCH_SIZE or len(code) < 1:
+            raise ValueError(f'only between 1 and {CODE_BATCH_SIZE} codes are allowed')
         param = {
             'code': code,
             'user_id': user_id
         }
-        url = build_url(TWITCH_API_BASE_URL + 'entitlements/codes', param, split_lists=True)
-        result = self.__api_get_request(url, AuthType.APP, [])
-        data = result.json()
-        return fields_to_enum(data, ['status'], CodeStatus, CodeStatus.UNKNOWN_VALUE)
+        return HelixRequest('GET', 'entitlements/codes', param, AuthType.APP, [],
+                            split_lists=True,
+                            transform=parse_json(enum_fields(['status'], CodeStatus, CodeStatus.UNKNOWN_VALUE)))
 
+    @helix_endpoint
     def redeem_code(self,
                     code: List[str],
                     user_id: int) -> dict:
@@ -643,6 +792,8 @@ class Twitch:
         Requires App authentication\n
         For detailed documentation, see here: https://dev.twitch.tv/docs/api/reference#redeem-code
 
+        Use :func:`~twitchAPI.bulk.redeem_code_bulk` for more than :const:`~twitchAPI.twitch.CODE_BATCH_SIZE` codes.
+
         :param list[str] code: The code to redeem to the authenticated user’s account. Maximum of 20 entries
         :param int user_id: Represents the numeric Twitch user ID of the account which  is going to receive the
                         entitlement associated with the code.
@@ -653,17 +804,17 @@ class Twitch:
         :raises ValueError: if length of code is not in range 1 to 20
         :rtype: dict
         """
-        if len(code) > 20 or len(code) < 1:
-            raise ValueError('only between 1 and 20 codes are allowed')
+        if len(code) > CODE_BATCH_SIZE or len(code) < 1:
+            raise ValueError(f'only between 1 and {CODE_BATCH_SIZE} codes are allowed')
         param = {
             'code': code,
             'user_id': user_id
         }
-        url = build_url(TWITCH_API_BASE_URL + 'entitlements/code', param, split_lists=True)
-        result = self.__api_post_request(url, AuthType.APP, [])
-        data = result.json()
-        return fields_to_enum(data, ['status'], CodeStatus, CodeStatus.UNKNOWN_VALUE)
+        return HelixRequest('POST', 'entitlements/code', param, AuthType.APP, [],
+                            split_lists=True,
+                            transform=parse_json(enum_fields(['status'], CodeStatus, CodeStatus.UNKNOWN_VALUE)))
 
+    @helix_endpoint
     def get_top_games(self,
                       after: Optional[str] = None,
                       before: Optional[str] = None,
@@ -690,10 +841,9 @@ class Twitch:
             'before': before,
             'first': first
         }
-        url = build_url(TWITCH_API_BASE_URL + 'games/top', param, remove_none=True)
-        result = self.__api_get_request(url, AuthType.APP, [])
-        return result.json()
+        return HelixRequest('GET', 'games/top', param, AuthType.APP, [], remove_none=True)
 
+    @helix_endpoint
     def get_games(self,
                   game_ids: Optional[List[str]] = None,
                   names: Optional[List[str]] = None) -> dict:
@@ -722,9 +872,7 @@ class Twitch:
             'id': game_ids,
             'name': names
         }
-        url = build_url(TWITCH_API_BASE_URL + 'games', param, remove_none=True, split_lists=True)
-        result = self.__api_get_request(url, AuthType.APP, [])
-        return result.json()
+        return HelixRequest('GET', 'games', param, AuthType.APP, [], remove_none=True, split_lists=True)
 
     def check_automod_status(self,
                              broadcaster_id: str,
@@ -736,6 +884,8 @@ class Twitch:
         Requires User authentication with scope :const:`twitchAPI.types.AuthScope.MODERATION_READ`\n
         For detailed documentation, see here: https://dev.twitch.tv/docs/api/reference#check-automod-status
 
+        Use :meth:`~twitchAPI.twitch.Twitch.check_automod_status_batch` to check multiple messages at once.
+
         :param str broadcaster_id: Provided broadcaster ID must match the user ID in the user auth token.
         :param str msg_id: Developer-generated identifier for mapping messages to results.
         :param str msg_text: Message text.
@@ -747,21 +897,52 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: dict
         """
-        # TODO you can pass multiple sets in the body, account for that
+        return self.check_automod_status_batch(broadcaster_id, [{
+            'msg_id': msg_id,
+            'msg_text': msg_text,
+            'user_id': user_id
+        }])
+
+    @helix_endpoint
+    def check_automod_status_batch(self,
+                                   broadcaster_id: str,
+                                   messages: List[dict]) -> dict:
+        """Determines whether multiple messages meet the channel’s AutoMod requirements with one request.\n\n
+
+        Requires User authentication with scope :const:`twitchAPI.types.AuthScope.MODERATION_READ`\n
+        For detailed documentation, see here: https://dev.twitch.tv/docs/api/reference#check-automod-status
+
+        Use :func:`~twitchAPI.bulk.check_automod_status_bulk` to check more than
+        :const:`~twitchAPI.twitch.AUTOMOD_BATCH_SIZE` messages.
+
+        :param str broadcaster_id: Provided broadcaster ID must match the user ID in the user auth token.
+        :param list[dict] messages: List of messages, each a dict with the keys :code:`msg_id`, :code:`msg_text` and
+                        :code:`user_id`. Maximum: 100
+        :raises ~twitchAPI.types.UnauthorizedException: if user authentication is not set
+        :raises ~twitchAPI.types.MissingScopeException: if the user authentication is missing the required scope
+        :raises ~twitchAPI.types.TwitchAuthorizationException: if the used authentication token became invalid
+                        and a re authentication failed
+        :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
+        :raises ValueError: if messages is empty or contains more than 100 messages
+        :rtype: dict
+        """
+        if len(messages) > AUTOMOD_BATCH_SIZE or len(messages) < 1:
+            raise ValueError(f'only between 1 and {AUTOMOD_BATCH_SIZE} messages are allowed')
         url_param = {
             'broadcaster_id': broadcaster_id
         }
-        url = build_url(TWITCH_API_BASE_URL + 'moderation/enforcements/status', url_param)
         body = {
             'data': [{
-                'msg_id': msg_id,
-                'msg_text': msg_text,
-                'user_id': user_id}
-            ]
+                'msg_id': m['msg_id'],
+                'msg_text': m['msg_text'],
+                'user_id': m['user_id']
+            } for m in messages]
         }
-        result = self.__api_post_request(url, AuthType.USER, [AuthScope.MODERATION_READ], data=body)
-        return result.json()
+        return HelixRequest('POST', 'moderation/enforcements/status', url_param,
+                            AuthType.USER, [AuthScope.MODERATION_READ],
+                            body=body)
 
+    @helix_endpoint
     def get_banned_events(self,
                           broadcaster_id: str,
                           user_id: Optional[str] = None,
@@ -793,13 +974,13 @@ class Twitch:
             'after': after,
             'first': first
         }
-        url = build_url(TWITCH_API_BASE_URL + 'moderation/banned/events', param, remove_none=True)
-        result = self.__api_get_request(url, AuthType.USER, [AuthScope.MODERATION_READ])
-        data = result.json()
-        data = fields_to_enum(data, ['event_type'], ModerationEventType, ModerationEventType.UNKNOWN)
-        data = make_fields_datetime(data, ['event_timestamp', 'expires_at'])
-        return data
+        return HelixRequest('GET', 'moderation/banned/events', param, AuthType.USER, [AuthScope.MODERATION_READ],
+                            remove_none=True,
+                            transform=parse_json(enum_fields(['event_type'], ModerationEventType,
+                                                             ModerationEventType.UNKNOWN),
+                                                 datetime_fields('event_timestamp', 'expires_at')))
 
+    @helix_endpoint
     def get_banned_users(self,
                          broadcaster_id: str,
                          user_id: Optional[str] = None,
@@ -828,10 +1009,11 @@ class Twitch:
             'after': after,
             'before': before
         }
-        url = build_url(TWITCH_API_BASE_URL + 'moderation/banned', param, remove_none=True)
-        result = self.__api_get_request(url, AuthType.USER, [AuthScope.MODERATION_READ])
-        return make_fields_datetime(result.json(), ['expires_at'])
+        return HelixRequest('GET', 'moderation/banned', param, AuthType.USER, [AuthScope.MODERATION_READ],
+                            remove_none=True,
+                            transform=parse_json(datetime_fields('expires_at')))
 
+    @helix_endpoint
     def get_moderators(self,
                        broadcaster_id: str,
                        user_ids: Optional[List[str]] = None,
@@ -860,10 +1042,11 @@ class Twitch:
             'user_id': user_ids,
             'after': after
         }
-        url = build_url(TWITCH_API_BASE_URL + 'moderation/moderators', param, remove_none=True, split_lists=True)
-        result = self.__api_get_request(url, AuthType.USER, [AuthScope.MODERATION_READ])
-        return result.json()
+        return HelixRequest('GET', 'moderation/moderators', param, AuthType.USER, [AuthScope.MODERATION_READ],
+                            remove_none=True,
+                            split_lists=True)
 
+    @helix_endpoint
     def get_moderator_events(self,
                              broadcaster_id: str,
                              user_ids: Optional[List[str]] = None) -> dict:
@@ -889,13 +1072,14 @@ class Twitch:
             'broadcaster_id': broadcaster_id,
             'user_id': user_ids
         }
-        url = build_url(TWITCH_API_BASE_URL + 'moderation/moderators/events', param, remove_none=True, split_lists=True)
-        result = self.__api_get_request(url, AuthType.USER, [AuthScope.MODERATION_READ])
-        data = result.json()
-        data = fields_to_enum(data, ['event_type'], ModerationEventType, ModerationEventType.UNKNOWN)
-        data = make_fields_datetime(data, ['event_timestamp'])
-        return data
-
+        return HelixRequest('GET', 'moderation/moderators/events', param, AuthType.USER, [AuthScope.MODERATION_READ],
+                            remove_none=True,
+                            split_lists=True,
+                            transform=parse_json(enum_fields(['event_type'], ModerationEventType,
+                                                             ModerationEventType.UNKNOWN),
+                                                 datetime_fields('event_timestamp')))
+
+    @helix_endpoint
     def create_stream_marker(self,
                              user_id: str,
                              description: Optional[str] = None) -> dict:
@@ -916,14 +1100,14 @@ class Twitch:
         """
         if description is not None and len(description) > 140:
             raise ValueError('max length for description is 140')
-        url = build_url(TWITCH_API_BASE_URL + 'streams/markers', {})
         body = {'user_id': user_id}
         if description is not None:
             body['description'] = description
-        result = self.__api_post_request(url, AuthType.USER, [AuthScope.USER_EDIT_BROADCAST], data=body)
-        data = result.json()
-        return make_fields_datetime(data, ['created_at'])
+        return HelixRequest('POST', 'streams/markers', {}, AuthType.USER, [AuthScope.USER_EDIT_BROADCAST],
+                            body=body,
+                            transform=parse_json(datetime_fields('created_at')))
 
+    @helix_endpoint
     def get_streams(self,
                     after: Optional[str] = None,
                     before: Optional[str] = None,
@@ -975,11 +1159,12 @@ class Twitch:
             'user_id': user_id,
             'user_login': user_login
         }
-        url = build_url(TWITCH_API_BASE_URL + 'streams', param, remove_none=True, split_lists=True)
-        result = self.__api_get_request(url, AuthType.APP, [])
-        data = result.json()
-        return make_fields_datetime(data, ['started_at'])
+        return HelixRequest('GET', 'streams', param, AuthType.APP, [],
+                            remove_none=True,
+                            split_lists=True,
+                            transform=parse_json(datetime_fields('started_at')))
 
+    @helix_endpoint
     def get_stream_markers(self,
                            user_id: str,
                            video_id: str,
@@ -1019,10 +1204,11 @@ class Twitch:
             'before': before,
             'first': first
         }
-        url = build_url(TWITCH_API_BASE_URL + 'streams/markers', param, remove_none=True)
-        result = self.__api_get_request(url, AuthType.USER, [AuthScope.USER_READ_BROADCAST])
-        return make_fields_datetime(result.json(), ['created_at'])
+        return HelixRequest('GET', 'streams/markers', param, AuthType.USER, [AuthScope.USER_READ_BROADCAST],
+                            remove_none=True,
+                            transform=parse_json(datetime_fields('created_at')))
 
+    @helix_endpoint
     def get_broadcaster_subscriptions(self,
                                       broadcaster_id: str,
                                       user_ids: Optional[List[str]] = None) -> dict:
@@ -1047,10 +1233,11 @@ class Twitch:
             'broadcaster_id': broadcaster_id,
             'user_id': user_ids
         }
-        url = build_url(TWITCH_API_BASE_URL + 'subscriptions', param, remove_none=True, split_lists=True)
-        result = self.__api_get_request(url, AuthType.USER, [AuthScope.CHANNEL_READ_SUBSCRIPTIONS])
-        return result.json()
+        return HelixRequest('GET', 'subscriptions', param, AuthType.USER, [AuthScope.CHANNEL_READ_SUBSCRIPTIONS],
+                            remove_none=True,
+                            split_lists=True)
 
+    @helix_endpoint
     def get_all_stream_tags(self,
                             after: Optional[str] = None,
                             first: int = 20,
@@ -1079,10 +1266,9 @@ class Twitch:
             'first': first,
             'tag_id': tag_ids
         }
-        url = build_url(TWITCH_API_BASE_URL + 'tags/streams', param, remove_none=True, split_lists=True)
-        result = self.__api_get_request(url, AuthType.APP, [])
-        return result.json()
+        return HelixRequest('GET', 'tags/streams', param, AuthType.APP, [], remove_none=True, split_lists=True)
 
+    @helix_endpoint
     def get_stream_tags(self,
                         broadcaster_id: str) -> dict:
         """Gets the list of tags for a specified stream (channel).\n\n
@@ -1097,10 +1283,9 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: dict
         """
-        url = build_url(TWITCH_API_BASE_URL + 'streams/tags', {'broadcaster_id': broadcaster_id})
-        result = self.__api_get_request(url, AuthType.APP, [])
-        return result.json()
+        return HelixRequest('GET', 'streams/tags', {'broadcaster_id': broadcaster_id}, AuthType.APP, [])
 
+    @helix_endpoint
     def replace_stream_tags(self,
                             broadcaster_id: str,
                             tag_ids: List[str]) -> dict:
@@ -1124,11 +1309,12 @@ class Twitch:
         """
         if len(tag_ids) > 100:
             raise ValueError('tag_ids can not have more than 100 entries')
-        url = build_url(TWITCH_API_BASE_URL + 'streams/tags', {'broadcaster_id': broadcaster_id})
-        self.__api_put_request(url, AuthType.USER, [AuthScope.USER_EDIT_BROADCAST], data={'tag_ids': tag_ids})
-        # this returns nothing
-        return {}
+        return HelixRequest('PUT', 'streams/tags', {'broadcaster_id': broadcaster_id},
+                            AuthType.USER, [AuthScope.USER_EDIT_BROADCAST],
+                            body={'tag_ids': tag_ids},
+                            transform=ignore_body)
 
+    @helix_endpoint
     def get_users(self,
                   user_ids: Optional[List[str]] = None,
                   logins: Optional[List[str]] = None) -> dict:
@@ -1159,12 +1345,12 @@ class Twitch:
             'id': user_ids,
             'login': logins
         }
-        url = build_url(TWITCH_API_BASE_URL + 'users', url_params, remove_none=True, split_lists=True)
-        response = self.__api_get_request(url,
-                                          AuthType.USER if user_ids is None and logins is None else AuthType.APP,
-                                          [])
-        return response.json()
+        return HelixRequest('GET', 'users', url_params,
+                            AuthType.USER if user_ids is None and logins is None else AuthType.APP, [],
+                            remove_none=True,
+                            split_lists=True)
 
+    @helix_endpoint
     def get_users_follows(self,
                           after: Optional[str] = None,
                           first: int = 20,
@@ -1199,10 +1385,11 @@ class Twitch:
             'from_id': from_id,
             'to_id': to_id
         }
-        url = build_url(TWITCH_API_BASE_URL + 'users/follows', param, remove_none=True)
-        result = self.__api_get_request(url, AuthType.APP, [])
-        return make_fields_datetime(result.json(), ['followed_at'])
+        return HelixRequest('GET', 'users/follows', param, AuthType.APP, [],
+                            remove_none=True,
+                            transform=parse_json(datetime_fields('followed_at')))
 
+    @helix_endpoint
     def update_user(self,
                     description: str) -> dict:
         """Updates the description of the Authenticated user.\n\n
@@ -1218,10 +1405,9 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: dict
         """
-        url = build_url(TWITCH_API_BASE_URL + 'users', {'description': description})
-        result = self.__api_put_request(url, AuthType.USER, [AuthScope.USER_EDIT])
-        return result.json()
+        return HelixRequest('PUT', 'users', {'description': description}, AuthType.USER, [AuthScope.USER_EDIT])
 
+    @helix_endpoint
     def get_user_extensions(self) -> dict:
         """Gets a list of all extensions (both active and inactive) for the authenticated user\n\n
 
@@ -1235,10 +1421,9 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: dict
         """
-        url = build_url(TWITCH_API_BASE_URL + 'users/extensions/list', {})
-        result = self.__api_get_request(url, AuthType.USER, [AuthScope.USER_READ_BROADCAST])
-        return result.json()
+        return HelixRequest('GET', 'users/extensions/list', {}, AuthType.USER, [AuthScope.USER_READ_BROADCAST])
 
+    @helix_endpoint
     def get_user_active_extensions(self,
                                    user_id: Optional[str] = None) -> dict:
         """Gets information about active extensions installed by a specified user, identified by a user ID or the
@@ -1255,10 +1440,11 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: dict
         """
-        url = build_url(TWITCH_API_BASE_URL + 'users/extensions', {'user_id': user_id}, remove_none=True)
-        result = self.__api_get_request(url, AuthType.USER, [AuthScope.USER_READ_BROADCAST])
-        return result.json()
+        return HelixRequest('GET', 'users/extensions', {'user_id': user_id},
+                            AuthType.USER, [AuthScope.USER_READ_BROADCAST],
+                            remove_none=True)
 
+    @helix_endpoint
     def update_user_extensions(self,
                                data: dict) -> dict:
         """"Updates the activation state, extension ID, and/or version number of installed extensions
@@ -1275,13 +1461,9 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: dict
         """
-        url = build_url(TWITCH_API_BASE_URL + 'users/extensions', {})
-        result = self.__api_put_request(url,
-                                        AuthType.USER,
-                                        [AuthScope.USER_EDIT_BROADCAST],
-                                        data=data)
-        return result.json()
+        return HelixRequest('PUT', 'users/extensions', {}, AuthType.USER, [AuthScope.USER_EDIT_BROADCAST], body=data)
 
+    @helix_endpoint
     def get_videos(self,
                    ids: Optional[List[str]] = None,
                    user_id: Optional[str] = None,
@@ -1335,13 +1517,13 @@ class Twitch:
             'sort': sort.value,
             'type': video_type.value
         }
-        url = build_url(TWITCH_API_BASE_URL + 'videos', param, remove_none=True, split_lists=True)
-        result = self.__api_get_request(url, AuthType.APP, [])
-        data = result.json()
-        data = make_fields_datetime(data, ['created_at', 'published_at'])
-        data = fields_to_enum(data, ['type'], VideoType, VideoType.UNKNOWN)
-        return data
+        return HelixRequest('GET', 'videos', param, AuthType.APP, [],
+                            remove_none=True,
+                            split_lists=True,
+                            transform=parse_json(datetime_fields('created_at', 'published_at'),
+                                                 enum_fields(['type'], VideoType, VideoType.UNKNOWN)))
 
+    @helix_endpoint
     def get_webhook_subscriptions(self,
                                   first: Optional[int] = 20,
                                   after: Optional[str] = None) -> dict:
@@ -1361,12 +1543,10 @@ class Twitch:
         """
         if first < 1 or first > 100:
             raise ValueError('first must be in range 1 to 100')
-        url = build_url(TWITCH_API_BASE_URL + 'webhooks/subscriptions',
-                        {'first': first, 'after': after},
-                        remove_none=True)
-        response = self.__api_get_request(url, AuthType.APP, [])
-        return response.json()
+        return HelixRequest('GET', 'webhooks/subscriptions', {'first': first, 'after': after}, AuthType.APP, [],
+                            remove_none=True)
 
+    @helix_endpoint
     def get_channel_information(self,
                                 broadcaster_id: str) -> dict:
         """Gets channel information for users.\n\n
@@ -1381,10 +1561,9 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: dict
         """
-        url = build_url(TWITCH_API_BASE_URL + 'channels', {'broadcaster_id': broadcaster_id})
-        response = self.__api_get_request(url, AuthType.APP, [])
-        return response.json()
+        return HelixRequest('GET', 'channels', {'broadcaster_id': broadcaster_id}, AuthType.APP, [])
 
+    @helix_endpoint
     def modify_channel_information(self,
                                    broadcaster_id: str,
                                    game_id: Optional[str] = None,
@@ -1409,14 +1588,16 @@ class Twitch:
         """
         if game_id is None and broadcaster_language is None and title is None:
             raise ValueError('You need to specify at least one of the optional parameter')
-        url = build_url(TWITCH_API_BASE_URL + 'channels',
-                        {'broadcaster_id': broadcaster_id}, remove_none=True)
         body = {k: v for k, v in {'game_id': game_id,
                                   'broadcaster_language': broadcaster_language,
-                                  'title': title} if v is not None}
-        response = self.__api_patch_request(url, AuthType.USER, [AuthScope.USER_EDIT_BROADCAST], data=body)
-        return response.status_code == 204
-
+                                  'title': title}.items() if v is not None}
+        return HelixRequest('PATCH', 'channels', {'broadcaster_id': broadcaster_id},
+                            AuthType.USER, [AuthScope.USER_EDIT_BROADCAST],
+                            body=body,
+                            remove_none=True,
+                            transform=status_equals(204))
+
+    @helix_endpoint
     def search_channels(self,
                         query: str,
                         first: Optional[int] = 20,
@@ -1441,14 +1622,17 @@ class Twitch:
         """
         if first < 1 or first > 100:
             raise ValueError('first must be between 1 and 100')
-        url = build_url(TWITCH_API_BASE_URL + 'search/channels',
-                        {'query': query,
-                         'first': first,
-                         'after': after,
-                         'live_only': live_only}, remove_none=True)
-        response = self.__api_get_request(url, AuthType.APP, [])
-        return make_fields_datetime(response.json(), ['started_at'])
+        param = {
+            'query': query,
+            'first': first,
+            'after': after,
+            'live_only': live_only
+        }
+        return HelixRequest('GET', 'search/channels', param, AuthType.APP, [],
+                            remove_none=True,
+                            transform=parse_json(datetime_fields('started_at')))
 
+    @helix_endpoint
     def search_categories(self,
                           query: str,
                           first: Optional[int] = 20,
@@ -1470,13 +1654,15 @@ class Twitch:
         """
         if first < 1 or first > 100:
             raise ValueError('first must be between 1 and 100')
-        url = build_url(TWITCH_API_BASE_URL + 'search/categories',
-                        {'query': query,
-                         'first': first,
-                         'after': after}, remove_none=True)
-        response = self.__api_get_request(url, AuthType.APP, [])
-        return response.json()
+        param = {
+            'query': query,
+            'first': first,
+            'after': after
+        }
+        return HelixRequest('GET', 'search/categories', param, AuthType.APP, [],
+                            remove_none=True)
 
+    @helix_endpoint
     def get_stream_key(self,
                        broadcaster_id: str) -> dict:
         """Gets the channel stream key for a user.\n\n
@@ -1492,10 +1678,10 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: dict
         """
-        url = build_url(TWITCH_API_BASE_URL + 'streams/key', {'broadcaster_id': broadcaster_id})
-        response = self.__api_get_request(url, AuthType.USER, [AuthScope.CHANNEL_READ_STREAM_KEY])
-        return response.json()
+        return HelixRequest('GET', 'streams/key', {'broadcaster_id': broadcaster_id},
+                            AuthType.USER, [AuthScope.CHANNEL_READ_STREAM_KEY])
 
+    @helix_endpoint
     def start_commercial(self,
                          broadcaster_id: str,
                          length: int) -> dict:
@@ -1516,12 +1702,13 @@ class Twitch:
         """
         if length not in [30, 60, 90, 120, 150, 180]:
             raise ValueError('length needs to be one of these: [30, 60, 90, 120, 150, 180]')
-        url = build_url(TWITCH_API_BASE_URL + 'channels/commercial',
-                        {'broadcaster_id': broadcaster_id,
-                         'length': length})
-        response = self.__api_post_request(url, AuthType.USER, [AuthScope.CHANNEL_EDIT_COMMERCIAL])
-        return response.json()
+        param = {
+            'broadcaster_id': broadcaster_id,
+            'length': length
+        }
+        return HelixRequest('POST', 'channels/commercial', param, AuthType.USER, [AuthScope.CHANNEL_EDIT_COMMERCIAL])
 
+    @helix_endpoint
     def create_user_follows(self,
                             from_id: str,
                             to_id: str,
@@ -1542,13 +1729,16 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: bool
         """
-        url = build_url(TWITCH_API_BASE_URL + 'users/follows',
-                        {'from_id': from_id,
-                         'to_id': to_id,
-                         'allow_notifications': allow_notifications}, remove_none=True)
-        response = self.__api_post_request(url, AuthType.USER, [AuthScope.USER_EDIT_FOLLOWS])
-        return response.status_code == 204
+        param = {
+            'from_id': from_id,
+            'to_id': to_id,
+            'allow_notifications': allow_notifications
+        }
+        return HelixRequest('POST', 'users/follows', param, AuthType.USER, [AuthScope.USER_EDIT_FOLLOWS],
+                            remove_none=True,
+                            transform=status_equals(204))
 
+    @helix_endpoint
     def delete_user_follows(self,
                             from_id: str,
                             to_id: str) -> bool:
@@ -1566,12 +1756,14 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: bool
         """
-        url = build_url(TWITCH_API_BASE_URL + 'users/follows',
-                        {'from_id': from_id,
-                         'to_id': to_id})
-        response = self.__api_delete_request(url, AuthType.USER, [AuthScope.USER_EDIT_FOLLOWS])
-        return response.status_code == 204
+        param = {
+            'from_id': from_id,
+            'to_id': to_id
+        }
+        return HelixRequest('DELETE', 'users/follows', param, AuthType.USER, [AuthScope.USER_EDIT_FOLLOWS],
+                            transform=status_equals(204))
 
+    @helix_endpoint
     def get_cheermotes(self,
                        broadcaster_id: str) -> dict:
         """Retrieves the list of available Cheermotes, animated emotes to which viewers can assign Bits,
@@ -1587,11 +1779,10 @@ class Twitch:
         :raises ~twitchAPI.types.TwitchBackendException: if the Twitch API itself runs into problems
         :rtype: dict
         """
-        url = build_url(TWITCH_API_BASE_URL + 'bits/cheermotes',
-                        {'broadcaster_id': broadcaster_id})
-        response = self.__api_get_request(url, AuthType.APP, [])
-        return make_fields_datetime(response.json(), ['last_updated'])
+        return HelixRequest('GET', 'bits/cheermotes', {'broadcaster_id': broadcaster_id}, AuthType.APP, [],
+                            transform=parse_json(datetime_fields('last_updated')))
 
+    @helix_endpoint
     def get_hype_train_events(self,
                               broadcaster_id: str,
                               first: Optional[int] = 1,
@@ -1619,19 +1810,20 @@ class Twitch:
         """
         if first < 1 or first > 100:
             raise ValueError('first must be between 1 and 100')
-        url = build_url(TWITCH_API_BASE_URL + 'hypetrain/events',
-                        {'broadcaster_id': broadcaster_id,
-                         'first': first,
-                         'id': id,
-                         'cursor': cursor}, remove_none=True)
-        response = self.__api_get_request(url, AuthType.APP, [AuthScope.CHANNEL_READ_HYPE_TRAIN])
-        data = make_fields_datetime(response.json(), ['event_timestamp',
-                                                      'started_at',
-                                                      'expires_at',
-                                                      'cooldown_end_time'])
-        data = fields_to_enum(data, ['type'], HypeTrainContributionMethod, HypeTrainContributionMethod.UNKNOWN)
-        return data
-
+        param = {
+            'broadcaster_id': broadcaster_id,
+            'first': first,
+            'id': id,
+            'cursor': cursor
+        }
+        return HelixRequest('GET', 'hypetrain/events', param, AuthType.APP, [AuthScope.CHANNEL_READ_HYPE_TRAIN],
+                            remove_none=True,
+                            transform=parse_json(datetime_fields('event_timestamp', 'started_at', 'expires_at',
+                                                                 'cooldown_end_time'),
+                                                 enum_fields(['type'], HypeTrainContributionMethod,
+                                                             HypeTrainContributionMethod.UNKNOWN)))
+
+    @helix_endpoint
     def get_drops_entitlements(self,
                                id: Optional[str] = None,
                                user_id: Optional[str] = None,
@@ -1660,15 +1852,14 @@ class Twitch:
         """
         if first < 1 or first > 100:
             raise ValueError('first must be between 1 and 100')
-        url = build_url(TWITCH_API_BASE_URL + 'entitlements/drops',
-                        {
-                            'id': id,
-                            'user_id': user_id,
-                            'game_id': game_id,
-                            'after': after,
-                            'first': first
-                        }, remove_none=True)
-        response = self.__api_get_request(url, AuthType.APP, [])
-        data = make_fields_datetime(response.json(), ['timestamp'])
-        return data
+        param = {
+            'id': id,
+            'user_id': user_id,
+            'game_id': game_id,
+            'after': after,
+            'first': first
+        }
+        return HelixRequest('GET', 'entitlements/drops', param, AuthType.APP, [],
+                            remove_none=True,
+                            transform=parse_json(datetime_fields('timestamp')))
 
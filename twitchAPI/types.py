@@ -169,6 +169,75 @@ class CodeStatus(Enum):
     UNKNOWN_VALUE = ''
 
 
+class EventQueuePolicy(Enum):
+    """What to do with new webhook events when a event queue is full
+
+    :var BLOCK: wait till there is space in the queue again
+    :var DROP: drop the new event
+    """
+    BLOCK = 'block'
+    DROP = 'drop'
+
+
+class StreamChangeType(Enum):
+    """Type of a change reported by :class:`~twitchAPI.polling.StreamTracker`
+
+    :var ONLINE: the stream went live
+    :var OFFLINE: the stream went offline
+    :var CHANGED: one or more fields of a live stream changed
+    """
+    ONLINE = 'online'
+    OFFLINE = 'offline'
+    CHANGED = 'changed'
+
+
+class PollResourceType(Enum):
+    """Types of resources that can be polled by :class:`~twitchAPI.polling.PollScheduler`
+
+    :var STREAM: a stream via :meth:`~twitchAPI.twitch.Twitch.get_streams`, key is the user id, up to 100 per request
+    :var HYPE_TRAIN_EVENTS: the most recent hype train event via
+            :meth:`~twitchAPI.twitch.Twitch.get_hype_train_events`, key is the broadcaster id
+    :var BANNED_EVENTS: the most recent ban event via :meth:`~twitchAPI.twitch.Twitch.get_banned_events`,
+            key is the broadcaster id
+    :var MODERATOR_EVENTS: the most recent moderator event via :meth:`~twitchAPI.twitch.Twitch.get_moderator_events`,
+            key is the broadcaster id
+    """
+    STREAM = 'stream'
+    HYPE_TRAIN_EVENTS = 'hype_train_events'
+    BANNED_EVENTS = 'banned_events'
+    MODERATOR_EVENTS = 'moderator_events'
+
+
+class ExportFormat(Enum):
+    """File formats supported by :class:`~twitchAPI.export.Exporter`
+
+    :var JSONL: one JSON object per line
+    :var CSV: comma separated values with a header
+    :var PARQUET: a directory of Parquet files, requires pyarrow
+    """
+    JSONL = 'jsonl'
+    CSV = 'csv'
+    PARQUET = 'parquet'
+
+
+class HookEvent(Enum):
+    """Points in the lifecycle of a request or webhook delivery that hooks can be registered for
+
+    :var BEFORE_SEND: before a request to the Twitch API is send
+    :var AFTER_RECEIVE: after a response of the Twitch API was received
+    :var ON_RETRY: before a request is retried
+    :var ON_REFRESH: after a token was refreshed
+    :var BEFORE_DISPATCH: before a webhook notification is passed to the callbacks
+    :var AFTER_DISPATCH: after all callbacks of a webhook notification finished or one of them raised
+    """
+    BEFORE_SEND = 'before_send'
+    AFTER_RECEIVE = 'after_receive'
+    ON_RETRY = 'on_retry'
+    ON_REFRESH = 'on_refresh'
+    BEFORE_DISPATCH = 'before_dispatch'
+    AFTER_DISPATCH = 'after_dispatch'
+
+
 class TwitchAPIException(Exception):
     """Base Twitch API Exception"""
     pass
@@ -18,6 +18,10 @@ Authentication is off by default but you can choose to authenticate to use some
 .. note:: Please note that Your Endpoint URL has to be HTTPS if you need authentication which means that you probably
             need a reverse proxy like nginx. This lib currently does not provide any way to add https on its own.
 
+If you set :attr:`~.TwitchWebHook.secret`, every notification is checked against its :code:`X-Hub-Signature` header and
+dropped before it gets parsed if the signature is missing or invalid. As required by WebSub, such notifications are
+still answered with a 2xx status, so the hub does not redeliver them.
+
 
 *******************
 Short code example:
@@ -64,22 +68,99 @@ succeeded but the final handshake failed.
 You can unsubscribe from a webhook subscription at any time by using :meth:`~twitchAPI.webhook.TwitchWebHook.unsubscribe`
 
 If :attr:`~.TwitchWebHook.unsubscribe_on_stop` is True (default), you dont need to manually unsubscribe from topics.
+The subscriptions stay in :attr:`~.TwitchWebHook.subscription_store` in that case, so
+:meth:`~twitchAPI.webhook.TwitchWebHook.restore_subscriptions` can recreate them on the next start.
 
-By deafult, subscriptions will be automatically renewed one minute before they run out for as long as the
-webhook is running.
+By deafult, subscriptions will be automatically renewed for as long as the webhook is running.
+Each subscription is renewed at a random point between half and nine tenth of its lease, so that renewals of many
+subscriptions are spread over the lease window instead of all happening at once.
+Renewals run concurrently (see :attr:`~.TwitchWebHook.renewal_concurrency`) without blocking the webhook itself,
+are limited to :attr:`~.TwitchWebHook.renewal_rate_limit` renewals per second and failed renewals are retried with an
+exponential backoff.
 
 You can also use :meth:`~twitchAPI.webhook.TwitchWebHook.unsubscribe_all` to unsubscribe from all topic subscriptions at
 once. This will also unsubscribe from topics that where left over from a previous run.
 
+****************************************
+Running inside of your own asyncio loop
+****************************************
+
+By default, :meth:`~twitchAPI.webhook.TwitchWebHook.start` runs the webhook in its own thread with its own event loop.
+If you already run a asyncio application, you can instead start the webhook on your loop with
+:meth:`~twitchAPI.webhook.TwitchWebHook.start_async` or add its routes to your existing aiohttp application with
+:meth:`~twitchAPI.webhook.TwitchWebHook.mount`. Callbacks can also be coroutine functions, they are awaited directly on
+the loop of the webhook.
+
+.. code-block:: python
+
+    app = web.Application()
+    hook = TwitchWebHook("https://my.cool.domain.net:8080", 'my_app_id', 8080)
+    hook.wait_for_subscription_confirm = False
+    hook.mount(app)
+    web.run_app(app, port=8080)
+
+*************
+Event streams
+*************
+
+Instead of or in addition to callbacks, you can also consume the events of the webhook as a stream.
+:meth:`~twitchAPI.webhook.TwitchWebHook.events` returns a async iterator, while
+:meth:`~twitchAPI.webhook.TwitchWebHook.event_queue` returns a :class:`asyncio.Queue` or, if threadsafe is True, a
+:class:`queue.Queue` that you can consume at your own pace.
+Each stream has its own max size, once it is full new events are either dropped or the webhook waits till there is
+space again, see :class:`~twitchAPI.types.EventQueuePolicy`.
+
+All streams receive the same :class:`~twitchAPI.webhook.WebhookEvent` instance, so please treat its data as read only.
+
+.. code-block:: python
+
+    async def consume(hook):
+        async for event in hook.events(topic='/streams'):
+            print(event.uuid, event.data)
+
+*******
+Metrics
+*******
+
+Set :attr:`~.TwitchWebHook.metrics` to a :class:`~twitchAPI.metrics.MetricsSink` to record how the time of each
+notification is spend. All metrics are labeled with the :code:`topic`, e.g. :code:`users/follows`:
+
+=============================================== ===========================================================
+Name                                            Description
+=============================================== ===========================================================
+:code:`twitch_webhook_notifications_total`      counter of notifications, also labeled with the :code:`status`
+:code:`twitch_webhook_body_read_seconds`        histogram of the time spend reading the body
+:code:`twitch_webhook_decode_seconds`           histogram of the time spend decoding the JSON body
+:code:`twitch_webhook_transform_seconds`        histogram of the time spend converting the fields of the data
+:code:`twitch_webhook_callback_seconds`         histogram of the time spend in event streams and callbacks
+:code:`twitch_webhook_in_flight`                gauge of notifications currently being handled (not labeled)
+:code:`twitch_webhook_queued_events`            gauge of events waiting in event streams (not labeled)
+:code:`twitch_webhook_dropped_events_total`     counter of events dropped by full event streams
+:code:`twitch_webhook_duplicates_total`         counter of duplicate notifications, see :attr:`~.TwitchWebHook.deduplicator`
+:code:`twitch_webhook_invalid_signatures_total` counter of notifications dropped because of a invalid signature
+:code:`twitch_webhook_transform_errors_total`   counter of notifications dropped because their data could not be converted
+=============================================== ===========================================================
+
+When using a :class:`~twitchAPI.metrics.PrometheusMetrics` sink, set :attr:`~.TwitchWebHook.metrics_route` to serve
+the metrics on the webhook itself. The same sink can also be used for :attr:`~twitchAPI.twitch.Twitch.metrics`.
+
+.. code-block:: python
+
+    from twitchAPI.metrics import PrometheusMetrics
+
+    hook.metrics = PrometheusMetrics()
+    hook.metrics_route = '/metrics'
+    hook.start()
+
 ********************
 Class Documentation:
 ********************
 """
 
 
-from typing import Union, Tuple, Callable
-from .helper import build_url, TWITCH_API_BASE_URL, get_uuid, get_json, make_fields_datetime, fields_to_enum
-from .helper import extract_uuid_str_from_url
+from typing import Union, Tuple, Callable, NamedTuple, List, Any
+from .helper import build_url, TWITCH_API_BASE_URL, get_uuid, make_fields_datetime, fields_to_enum
+from .helper import extract_uuid_str_from_url, verify_signature, run_hooks
 from .types import *
 import requests
 from aiohttp import web
@@ -88,10 +169,115 @@ import asyncio
 from uuid import UUID
 import logging
 import time
+import heapq
+import json
+import random
+import itertools
+import queue
 from .twitch import Twitch
+from .storage import SubscriptionStore, MemorySubscriptionStore, DeliveryDeduplicator
+from .cluster import HashRing
+from .metrics import MetricsSink, PrometheusMetrics
+from dateutil import parser as du_parser
 from concurrent.futures._base import CancelledError
 
 
+class WebhookEvent(NamedTuple):
+    """A single webhook event as yielded by the event streams
+
+    :var ~uuid.UUID uuid: UUID of the subscription
+    :var str topic: path of the topic, e.g. :code:`/streams`
+    :var data: the event data as it would be passed to the callback
+    """
+    uuid: UUID
+    topic: str
+    data: Any
+
+
+class _EventSubscriber:
+
+    def __init__(self,
+                 topic: Union[str, None],
+                 uuid: Union[UUID, None],
+                 max_size: int,
+                 policy: EventQueuePolicy,
+                 threadsafe: bool):
+        self.topic = topic
+        self.uuid = uuid
+        self.policy = policy
+        self.threadsafe = threadsafe
+        self.dropped = 0
+        self.on_drop: Union[Callable[[WebhookEvent], None], None] = None
+        if threadsafe:
+            self.loop = None
+            self.queue = queue.Queue(max_size)
+        else:
+            self.loop = asyncio.get_running_loop()
+            self.queue = asyncio.Queue(max_size)
+
+    def matches(self, event: WebhookEvent) -> bool:
+        return (self.topic is None or self.topic == event.topic) and (self.uuid is None or self.uuid == event.uuid)
+
+    def __drop(self, event: WebhookEvent) -> None:
+        self.dropped += 1
+        if self.on_drop is not None:
+            self.on_drop(event)
+
+    def __put_nowait(self, event: WebhookEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except (asyncio.QueueFull, queue.Full):
+            self.__drop(event)
+
+    async def put(self, event: WebhookEvent) -> None:
+        if self.threadsafe:
+            try:
+                self.queue.put_nowait(event)
+            except queue.Full:
+                if self.policy == EventQueuePolicy.DROP:
+                    self.__drop(event)
+                else:
+                    await asyncio.get_running_loop().run_in_executor(None, self.queue.put, event)
+        elif self.loop is asyncio.get_running_loop():
+            if self.policy == EventQueuePolicy.DROP:
+                self.__put_nowait(event)
+            else:
+                await self.queue.put(event)
+        elif self.policy == EventQueuePolicy.DROP:
+            self.loop.call_soon_threadsafe(self.__put_nowait, event)
+        else:
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.queue.put(event), self.loop))
+
+
+class _EventStream:
+    """async iterator returned by TwitchWebHook.events, registered on creation so no event before the first
+    __anext__ is lost"""
+
+    def __init__(self, hook: 'TwitchWebHook', event_queue: 'asyncio.Queue'):
+        self.__hook = hook
+        self.__queue = event_queue
+        self.__closed = False
+
+    def __aiter__(self) -> '_EventStream':
+        return self
+
+    async def __anext__(self) -> WebhookEvent:
+        if self.__closed:
+            raise StopAsyncIteration()
+        return await self.__queue.get()
+
+    async def aclose(self) -> None:
+        if not self.__closed:
+            self.__closed = True
+            self.__hook.remove_event_queue(self.__queue)
+
+    async def __aenter__(self) -> '_EventStream':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+
 class TwitchWebHook:
     """Webhook integration for the Twitch Helix API.
 
@@ -99,7 +285,11 @@ class TwitchWebHook:
     :param str api_client_id: The id of your API client
     :param int port: the port on which this webhook should run
     :var str secret: A random secret string. Set this for added security.
+    :var bool verify_signature: If True and :attr:`secret` is set, notifications without a valid signature are
+                    dropped before they get parsed. |default| :code:`True`
     :var str callback_url: The full URL of the webhook.
+    :var str hub_url: URL of the Twitch webhook hub, only change this for testing.
+                    |default| :code:`https://api.twitch.tv/helix/webhooks/hub`
     :var int subscribe_least_seconds: The duration in seconds for how long you want to subscribe to webhhoks.
                     Min 300 Seconds, Max 864000 Seconds. |default| :code:`600`
     :var bool auto_renew_subscription: If True, automatically renew all webhooks once they get close to running out.
@@ -110,32 +300,75 @@ class TwitchWebHook:
                     Only used if ``wait_for_subscription_confirm`` is set to True. |default| :code:`30`
     :var bool unsubscribe_on_stop: Unsubscribe all currently active Webhooks on calling `stop()`
                     |default| :code:`True`
+    :var int renewal_concurrency: Max number of subscription renewals that run at the same time.
+                    |default| :code:`10`
+    :var float renewal_rate_limit: Max number of subscription renewals started per second. |default| :code:`5`
+    :var int renewal_max_retries: How often a failed renewal is retried before giving up. |default| :code:`5`
+    :var float renewal_retry_delay: Delay in seconds before the first retry of a failed renewal, doubles with every
+                    further retry. |default| :code:`5`
+    :var ~twitchAPI.storage.SubscriptionStore subscription_store: Store used to persist the active subscriptions.
+                    |default| :class:`~twitchAPI.storage.MemorySubscriptionStore`
+    :var ~twitchAPI.storage.DeliveryDeduplicator deduplicator: If set, notifications that where already delivered
+                    are dropped. |default| :code:`None`
+    :var bool reuse_port: Set SO_REUSEPORT on the listening socket so that multiple processes can share the same port.
+                    |default| :code:`False`
+    :var str node_id: id of this worker when running multiple workers, see :mod:`twitchAPI.cluster`
+                    |default| :code:`None`
+    :var ~twitchAPI.cluster.HashRing node_ring: Ring used to decide which worker renews which subscription,
+                    see :mod:`twitchAPI.cluster` |default| :code:`None`
+    :var ~twitchAPI.metrics.MetricsSink metrics: If set, timing and queue metrics of every notification are recorded
+                    in this sink, see `Metrics`_ |default| :code:`None`
+    :var str metrics_route: If set and :attr:`metrics` is a :class:`~twitchAPI.metrics.PrometheusMetrics`, the metrics
+                    are served on this path, e.g. :code:`/metrics` |default| :code:`None`
     """
 
     secret = None
+    verify_signature: bool = True
     callback_url = None
+    hub_url: str = TWITCH_API_BASE_URL + 'webhooks/hub'
     subscribe_least_seconds: int = 600
     auto_renew_subscription: bool = True
     wait_for_subscription_confirm: bool = True
     wait_for_subscription_confirm_timeout: int = 30
     unsubscribe_on_stop: bool = True
+    renewal_concurrency: int = 10
+    renewal_rate_limit: float = 5
+    renewal_max_retries: int = 5
+    renewal_retry_delay: float = 5
+    subscription_store: SubscriptionStore = None
+    deduplicator: Union[DeliveryDeduplicator, None] = None
+    reuse_port: bool = False
+    node_id: Union[str, None] = None
+    node_ring: Union[HashRing, None] = None
+    metrics: Union[MetricsSink, None] = None
+    metrics_route: Union[str, None] = None
     _port: int = 80
     _host: str = '0.0.0.0'
     __twitch: Twitch = None
     __task_refresh = None
     __client_id = None
     __running = False
-    __callbacks = {}
-    __active_webhooks = {}
     __authenticate: bool = False
     __hook_thread: Union['threading.Thread', None] = None
     __hook_loop: Union['asyncio.AbstractEventLoop', None] = None
     __hook_runner: Union['web.AppRunner', None] = None
+    __renewal_wakeup: Union['asyncio.Event', None] = None
+    __next_token_refresh: float = 0
+    __callback_resolver = None
 
     def __init__(self, callback_url: str, api_client_id: str, port: int):
         self.callback_url = callback_url
         self.__client_id = api_client_id
         self._port = port
+        self.subscription_store = MemorySubscriptionStore()
+        self.__callbacks = {}
+        self.__active_webhooks = {}
+        self.__unsubscribe_all_helper = {}
+        self.__event_subscribers: List[_EventSubscriber] = []
+        self.__renewal_queue = []
+        self.__renewal_counter = itertools.count()
+        self.__hooks = {}
+        self.__in_flight = 0
 
     def authenticate(self, twitch: Twitch) -> None:
         """Set authentication for the Webhook. Can be either a app or user token.
@@ -150,24 +383,106 @@ class TwitchWebHook:
             raise RuntimeError('HTTPS is required for authenticated webhook.\n'
                                + 'Either use non authenticated webhook or use a HTTPS proxy!')
 
+    @staticmethod
+    def __observe(metrics: MetricsSink, name: str, start: float, tags: dict) -> float:
+        now = time.perf_counter()
+        metrics.observe(name, now - start, tags)
+        return now
+
+    async def __process_notification(self,
+                                     request: 'web.Request',
+                                     transform: Callable[[dict], Any],
+                                     metrics: Union[MetricsSink, None],
+                                     tags: Union[dict, None]) -> 'web.Response':
+        t = time.perf_counter() if metrics is not None else 0
+        # the body gets cached by aiohttp, so the signature check and decoding share a single read
+        body = await request.read() if request.body_exists else b''
+        if metrics is not None:
+            t = self.__observe(metrics, 'twitch_webhook_body_read_seconds', t, tags)
+        if self.secret is not None and self.verify_signature:
+            # drop notifications without a valid signature before parsing them, WebSub still expects a 2xx answer
+            if not verify_signature(self.secret, body, request.headers.get('X-Hub-Signature')):
+                logging.warning(f'dropped notification with invalid signature on {request.path}')
+                if metrics is not None:
+                    metrics.increment('twitch_webhook_invalid_signatures_total', tags=tags)
+                return web.Response(text="")
+        try:
+            decoded = json.loads(body) if len(body) > 0 else None
+        except ValueError:
+            decoded = None
+        if metrics is not None:
+            t = self.__observe(metrics, 'twitch_webhook_decode_seconds', t, tags)
+        try:
+            data = transform(decoded) if decoded is not None else None
+        except Exception:
+            # a error response would only make the hub redeliver the same notification
+            logging.exception(f'dropped notification with unexpected data on {request.path}')
+            if metrics is not None:
+                metrics.increment('twitch_webhook_transform_errors_total', tags=tags)
+            return web.Response(text="")
+        if metrics is not None:
+            t = self.__observe(metrics, 'twitch_webhook_transform_seconds', t, tags)
+        response = await self._generic_handle_callback(request, data)
+        if metrics is not None:
+            self.__observe(metrics, 'twitch_webhook_callback_seconds', t, tags)
+        return response
+
+    def __notification_handler(self, transform: Callable[[dict], Any]):
+        """Creates the handler of a notification route, transform turns the decoded body into the callback data"""
+        async def handle_notification(request: 'web.Request') -> 'web.Response':
+            metrics = self.metrics
+            if metrics is None:
+                return await self.__process_notification(request, transform, None, None)
+            tags = {'topic': request.path.strip('/')}
+            self.__in_flight += 1
+            metrics.gauge('twitch_webhook_in_flight', self.__in_flight)
+            try:
+                response = await self.__process_notification(request, transform, metrics, tags)
+            finally:
+                self.__in_flight -= 1
+                metrics.gauge('twitch_webhook_in_flight', self.__in_flight)
+            metrics.increment('twitch_webhook_notifications_total', tags=dict(tags, status=str(response.status)))
+            return response
+        return handle_notification
+
+    def __update_queue_metrics(self) -> None:
+        self.metrics.gauge('twitch_webhook_queued_events', sum(s.queue.qsize() for s in self.__event_subscribers))
+
+    def __record_drop(self, event: WebhookEvent) -> None:
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.increment('twitch_webhook_dropped_events_total', tags={'topic': event.topic.strip('/')})
+
+    async def __handle_metrics(self, request: 'web.Request') -> 'web.Response':
+        self.__update_queue_metrics()
+        return web.Response(body=self.metrics.render().encode('utf-8'),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    def __build_routes(self) -> list:
+        topics = {
+            '/users/follows': self.__transform_user_follows,
+            '/users/changed': self.__transform_user_changed,
+            '/streams': self.__transform_stream_changed,
+            '/extensions/transactions': self.__transform_extension_transaction_created,
+            '/moderation/moderators/events': self.__transform_moderation_events,
+            '/moderation/banned/events': self.__transform_moderation_events,
+            '/hypetrain/events': self.__transform_hypetrain_events,
+            '/subscriptions/events': self.__transform_subscription_events
+        }
+        routes = []
+        for path, transform in topics.items():
+            routes.append(web.get(path, self.__handle_challenge))
+            routes.append(web.post(path, self.__notification_handler(transform)))
+        if self.metrics_route is not None:
+            if isinstance(self.metrics, PrometheusMetrics):
+                routes.append(web.get(self.metrics_route, self.__handle_metrics))
+            else:
+                logging.warning('metrics_route is only available when metrics is a PrometheusMetrics sink')
+        return routes
+
     def __build_runner(self):
         hook_app = web.Application()
-        hook_app.add_routes([web.get('/users/follows', self.__handle_challenge),
-                             web.post('/users/follows', self.__handle_user_follows),
-                             web.get('/users/changed', self.__handle_challenge),
-                             web.post('/users/changed', self.__handle_user_changed),
-                             web.get('/streams', self.__handle_challenge),
-                             web.post('/streams', self.__handle_stream_changed),
-                             web.get('/extensions/transactions', self.__handle_challenge),
-                             web.post('/extensions/transactions', self.__handle_extension_transaction_created),
-                             web.get('/moderation/moderators/events', self.__handle_challenge),
-                             web.post('/moderation/moderators/events', self.__handle_moderator_change_events),
-                             web.get('/moderation/banned/events', self.__handle_challenge),
-                             web.post('/moderation/banned/events', self.__handle_channel_ban_change_events),
-                             web.get('/hypetrain/events', self.__handle_challenge),
-                             web.post('/hypetrain/events', self.__handle_hypetrain_events),
-                             web.get('/subscriptions/events', self.__handle_challenge),
-                             web.post('/subscriptions/events', self.__handle_subscription_events)])
+        hook_app.add_routes(self.__build_routes())
         hook_runner = web.AppRunner(hook_app)
         return hook_runner
 
@@ -176,39 +491,178 @@ class TwitchWebHook:
         self.__hook_loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.__hook_loop)
         self.__hook_loop.run_until_complete(runner.setup())
-        site = web.TCPSite(runner, str(self._host), self._port)
+        site = web.TCPSite(runner, str(self._host), self._port, reuse_port=self.reuse_port)
         self.__hook_loop.run_until_complete(site.start())
         logging.info('started twitch API hook on port ' + str(self._port))
-        # add refresh task
-        if self.auto_renew_subscription:
-            self.__task_refresh = self.__hook_loop.create_task(self.__refresh_task())
+        self.__start_background_tasks()
         try:
             self.__hook_loop.run_forever()
         except (CancelledError, asyncio.CancelledError):
             pass
 
+    def __start_background_tasks(self):
+        """Sets up the renewal of subscriptions on the currently used event loop"""
+        self.__hook_loop = asyncio.get_event_loop()
+        self.__renewal_wakeup = asyncio.Event()
+        # add refresh task
+        if self.auto_renew_subscription:
+            # subscriptions that where made before the loop existed still need to be scheduled
+            for uuid, entry in list(self.__active_webhooks.items()):
+                if entry.get('renew_at') is None:
+                    self.__schedule_renewal(uuid, self.__get_renewal_time(entry.get('expires_at')))
+            self.__task_refresh = self.__hook_loop.create_task(self.__refresh_task())
+
+    async def __stop_background_tasks(self, wait_for_confirm: bool = True):
+        loop = asyncio.get_event_loop()
+        if self.unsubscribe_on_stop:
+            for uuid in list(self.__active_webhooks.keys()):
+                if wait_for_confirm:
+                    await loop.run_in_executor(None, self.__unsubscribe, uuid, False)
+                else:
+                    # the store entry is kept, so the subscription can be restored on the next start
+                    entry = self.__active_webhooks.pop(uuid)
+                    self.__callbacks.pop(uuid, None)
+                    await loop.run_in_executor(None, self._generic_unsubscribe, entry.get('callback_path'),
+                                               entry.get('url'))
+        if self.__task_refresh is not None:
+            self.__task_refresh.cancel()
+            self.__task_refresh = None
+        self.__hook_loop = None
+
+    def __in_hook_loop(self) -> bool:
+        try:
+            return self.__hook_loop is not None and asyncio.get_running_loop() is self.__hook_loop
+        except RuntimeError:
+            return False
+
+    def __check_wait_allowed(self) -> None:
+        if self.wait_for_subscription_confirm and self.__in_hook_loop():
+            raise RuntimeError('can not wait for the subscription confirm inside of the webhook event loop, '
+                               'use run_in_executor or set wait_for_subscription_confirm to False')
+
+    def __get_renewal_time(self, expires_at: Union[float, None] = None) -> float:
+        """Picks a random point in the lease window at which the subscription should be renewed"""
+        now = time.time()
+        lease = self.subscribe_least_seconds if expires_at is None else max(expires_at - now, 0)
+        # renew somewhere between half and nine tenth of the lease but always at least one minute before it runs out
+        return now + max(min(lease * random.uniform(0.5, 0.9), lease - 60), 0)
+
+    def __owns_subscription(self, uuid: UUID) -> bool:
+        """Checks if this node is responsible for renewing the given subscription"""
+        if self.node_ring is None:
+            return True
+        return self.node_ring.get_node(str(uuid)) == self.node_id
+
+    def __schedule_renewal(self, uuid: UUID, renew_at: float, attempt: int = 0) -> None:
+        """Add a renewal to the queue, only call this from within the hook loop"""
+        entry = self.__active_webhooks.get(uuid)
+        if entry is None:
+            return
+        # older queue entries of this uuid are now outdated and will be skipped
+        entry['renew_at'] = renew_at
+        heapq.heappush(self.__renewal_queue, (renew_at, next(self.__renewal_counter), uuid, attempt))
+        self.__renewal_wakeup.set()
+
+    def __queue_renewal(self, uuid: UUID) -> None:
+        """Thread safe way to schedule the next renewal of the given subscription"""
+        if not self.auto_renew_subscription or self.__hook_loop is None:
+            # will be scheduled once the hook loop starts
+            return
+        entry = self.__active_webhooks.get(uuid)
+        if entry is None:
+            return
+        self.__hook_loop.call_soon_threadsafe(self.__schedule_renewal,
+                                              uuid,
+                                              self.__get_renewal_time(entry.get('expires_at')))
+
     async def __refresh_task(self):
+        semaphore = asyncio.Semaphore(self.renewal_concurrency)
+        next_slot = 0.0
+        self.__next_token_refresh = time.time() + self.subscribe_least_seconds - 60
         while True:
-            # renew 1 Min before timer runs out:
-            await asyncio.sleep(self.subscribe_least_seconds - 60)
+            now = time.time()
             # make sure that the auth token is still valid:
-            if self.__authenticate:
-                self.__twitch.refresh_used_token()
-            for key in self.__active_webhooks.keys():
-                self.renew_subscription(key)
+            if self.__authenticate and now >= self.__next_token_refresh:
+                await self.__hook_loop.run_in_executor(None, self.__twitch.refresh_used_token)
+                self.__next_token_refresh = now + self.subscribe_least_seconds - 60
+                continue
+            timeout = self.__next_token_refresh - now if self.__authenticate else None
+            if len(self.__renewal_queue) > 0:
+                due_in = self.__renewal_queue[0][0] - now
+                timeout = due_in if timeout is None else min(timeout, due_in)
+            if timeout is None or timeout > 0:
+                # sleep till the next renewal is due or a new one got scheduled
+                self.__renewal_wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.__renewal_wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            renew_at, _, uuid, attempt = heapq.heappop(self.__renewal_queue)
+            entry = self.__active_webhooks.get(uuid)
+            if entry is None or entry.get('renew_at') != renew_at:
+                # unsubscribed or rescheduled in the meantime
+                continue
+            if not self.__owns_subscription(uuid):
+                # an other node renews this one, check back once its next renewal is due
+                stored = self.subscription_store.get(uuid)
+                expires_at = entry.get('expires_at')
+                if stored is not None and stored.get('expires_at') is not None and \
+                        (expires_at is None or stored.get('expires_at') > expires_at):
+                    entry['expires_at'] = stored.get('expires_at')
+                    self.__schedule_renewal(uuid, self.__get_renewal_time(entry.get('expires_at')))
+                    continue
+                # the owner renews at least a minute before the lease runs out, it might not know this
+                # subscription at all if it was made after the owner started
+                takeover_at = expires_at - 30 if expires_at is not None else now
+                if now < takeover_at:
+                    self.__schedule_renewal(uuid, takeover_at)
+                    continue
+                logging.warning(f'webhook {str(uuid)} was not renewed by its owner, renewing it here')
+            # stay within the rate limit budget
+            delay = next_slot - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            next_slot = max(next_slot, time.time()) + 1 / self.renewal_rate_limit
+            await semaphore.acquire()
+            self.__hook_loop.create_task(self.__run_renewal(semaphore, uuid, attempt))
+
+    async def __run_renewal(self, semaphore: 'asyncio.Semaphore', uuid: UUID, attempt: int):
+        try:
+            success = await self.__hook_loop.run_in_executor(None, self.renew_subscription, uuid)
+        except Exception:
+            logging.exception(f'renewal of webhook {str(uuid)} failed')
+            success = False
+        finally:
+            semaphore.release()
+        if success:
+            # the next renewal got already queued by renew_subscription
+            return
+        entry = self.__active_webhooks.get(uuid)
+        if entry is None:
+            return
+        delay = self.renewal_retry_delay * (2 ** attempt)
+        if attempt < self.renewal_max_retries and time.time() + delay < entry.get('expires_at', 0):
+            logging.warning(f'renewal of webhook {str(uuid)} failed, retrying in {delay} seconds')
+            self.__schedule_renewal(uuid, time.time() + delay, attempt + 1)
+        else:
+            logging.error(f'giving up on renewing webhook {str(uuid)}')
+
+    def __check_startable(self):
+        if self.subscribe_least_seconds < 60 * 5 or self.subscribe_least_seconds > 864000:
+            # at least 5 min, max 864000 seconds
+            raise ValueError('subscribe_least_second has to be in range 300 to 864000')
+        if self.__running:
+            raise RuntimeError('already started')
 
     def start(self):
-        """Starts the Webhook
+        """Starts the Webhook in its own thread and event loop
 
         :rtype: None
         :raises ValueError: if subscribe_least_seconds is not in range 300 to 864000
         :raises RuntimeError: if webhook is already running
         """
-        if self.subscribe_least_seconds < 60 * 5 or self.subscribe_least_seconds > 864000:
-            # at least 5 min, max 864000 seconds
-            raise ValueError('subscribe_least_second has to be in range 300 to 864000')
-        if self.__running:
-            raise RuntimeError('already started')
+        self.__check_startable()
         self.__hook_thread = threading.Thread(target=self.__run_hook, args=(self.__build_runner(),))
         self.__running = True
         self.__hook_thread.start()
@@ -224,14 +678,70 @@ class TwitchWebHook:
             if self.unsubscribe_on_stop:
                 all_keys = list(self.__active_webhooks.keys())
                 for uuid in all_keys:
-                    self.unsubscribe(uuid)
+                    # keep the store entries, so the subscriptions can be restored on the next start
+                    self.__unsubscribe(uuid, False)
             if self.auto_renew_subscription:
-                self.__task_refresh.cancel()
+                self.__hook_loop.call_soon_threadsafe(self.__task_refresh.cancel)
             self.__hook_loop.call_soon_threadsafe(self.__hook_loop.stop)
             self.__hook_runner = None
             self.__hook_thread.join()
             self.__running = False
 
+    async def start_async(self):
+        """Starts the Webhook on the currently running event loop instead of its own thread
+
+        :rtype: None
+        :raises ValueError: if subscribe_least_seconds is not in range 300 to 864000
+        :raises RuntimeError: if webhook is already running
+        """
+        self.__check_startable()
+        runner = self.__build_runner()
+        await runner.setup()
+        site = web.TCPSite(runner, str(self._host), self._port, reuse_port=self.reuse_port)
+        await site.start()
+        logging.info('started twitch API hook on port ' + str(self._port))
+        self.__hook_runner = runner
+        self.__running = True
+        self.__start_background_tasks()
+
+    async def stop_async(self):
+        """Stops a Webhook started with :meth:`start_async`
+
+        :rtype: None
+        """
+        if self.__hook_runner is not None:
+            await self.__stop_background_tasks()
+            await self.__hook_runner.cleanup()
+            self.__hook_runner = None
+            self.__running = False
+
+    def mount(self, app: 'web.Application') -> None:
+        """Adds the routes of the Webhook to an existing aiohttp application.
+
+        The Webhook then runs on the event loop of that application and gets started and stopped together with it.
+        Make sure that :attr:`callback_url` points to the root of the given application.\n
+        Since the subscription handshake needs the event loop, either subscribe from a different thread (e.g. via
+        :code:`run_in_executor`) or set :attr:`wait_for_subscription_confirm` to False.
+
+        :param ~aiohttp.web.Application app: the application to add the routes to
+        :rtype: None
+        :raises ValueError: if subscribe_least_seconds is not in range 300 to 864000
+        :raises RuntimeError: if webhook is already running
+        """
+        self.__check_startable()
+        app.add_routes(self.__build_routes())
+        app.on_startup.append(self.__on_app_startup)
+        app.on_shutdown.append(self.__on_app_shutdown)
+
+    async def __on_app_startup(self, app: 'web.Application'):
+        self.__running = True
+        self.__start_background_tasks()
+
+    async def __on_app_shutdown(self, app: 'web.Application'):
+        # the server might not answer the handshake anymore at this point
+        await self.__stop_background_tasks(wait_for_confirm=False)
+        self.__running = False
+
     # ==================================================================================================================
     # HELPER
     # ==================================================================================================================
@@ -276,24 +786,33 @@ class TwitchWebHook:
             data['hub.callback'] = callback_path
         if self.secret is not None:
             data['hub.secret'] = self.secret
-        result = self.__api_post_request(TWITCH_API_BASE_URL + "webhooks/hub", data=data)
+        result = self.__api_post_request(self.hub_url, data=data)
         if result.status_code != 202:
             logging.error(f'Subscription failed! status code: {result.status_code}, body: {result.text}')
         return result.status_code == 202
 
     def _generic_subscribe(self, callback_path: str, url: str, uuid: UUID, callback_func) -> bool:
+        self.__check_wait_allowed()
+        # register the subscription before sending the request, the hub might answer with the challenge before
+        # the request returns
+        self.__active_webhooks[uuid] = {
+            'url': url,
+            'callback': callback_func,
+            'callback_path': callback_path + "?uuid=" + str(uuid),
+            'confirmed_subscribe': False,
+            'confirmed_unsubscribe': False,
+            'active': False,
+            'expires_at': time.time() + self.subscribe_least_seconds,
+            'renew_at': None
+        }
+        self.__add_callable(uuid, callback_func)
         success = self._subscribe(callback_path+"?uuid=" + str(uuid), url)
-        if success:
-            self.__add_callable(uuid, callback_func)
-            # self.__urls[uuid] = url
-            self.__active_webhooks[uuid] = {
-                'url': url,
-                'callback': callback_func,
-                'callback_path': callback_path + "?uuid=" + str(uuid),
-                'confirmed_subscribe': False,
-                'confirmed_unsubscribe': False,
-                'active': False
-            }
+        if not success:
+            self.__active_webhooks.pop(uuid, None)
+            self.__callbacks.pop(uuid, None)
+        else:
+            self.subscription_store.save(uuid, self.__active_webhooks[uuid])
+            self.__queue_renewal(uuid)
             if self.wait_for_subscription_confirm:
                 timeout = time.time() + self.wait_for_subscription_confirm_timeout
                 while timeout > time.time() and not self.__active_webhooks.get(uuid)['confirmed_subscribe']:
@@ -304,23 +823,67 @@ class TwitchWebHook:
     def _generic_unsubscribe(self, callback_path: str, url: str, callback_full: bool = True) -> bool:
         return self._subscribe(callback_path, url, mode="unsubscribe", callback_full=callback_full)
 
-    def _generic_handle_callback(self, request: 'web.Request', data: Union[dict, list, None]) -> 'web.Response':
+    def __attach_stored_subscription(self, uuid: UUID) -> Union[list, None]:
+        """Attach callbacks to a subscription that was made by a different worker"""
+        if self.__callback_resolver is None:
+            return None
+        stored = self.subscription_store.get(uuid)
+        if stored is None:
+            return None
+        self.__add_callable(uuid, self.__callback_resolver(stored.get('url')))
+        return self.__callbacks.get(uuid)
+
+    async def _generic_handle_callback(self, request: 'web.Request', data: Union[dict, list, None]) -> 'web.Response':
         uuid_str = request.rel_url.query.get('uuid')
         if data is None or uuid_str is None:
             return web.Response(text="")
+        if self.deduplicator is not None:
+            notification_id = request.headers.get('Twitch-Notification-Id')
+            if notification_id is not None and self.deduplicator.is_duplicate(notification_id):
+                if self.metrics is not None:
+                    self.metrics.increment('twitch_webhook_duplicates_total', tags={'topic': request.path.strip('/')})
+                return web.Response(text="")
         uuid = UUID(uuid_str)
+        # event streams also get events of subscriptions without callbacks
+        if len(self.__event_subscribers) > 0:
+            event = WebhookEvent(uuid, request.path, data)
+            for subscriber in list(self.__event_subscribers):
+                if subscriber.matches(event):
+                    await subscriber.put(event)
+            if self.metrics is not None:
+                self.__update_queue_metrics()
         callbacks = self.__callbacks.get(uuid)
+        if callbacks is None:
+            callbacks = self.__attach_stored_subscription(uuid)
         if callbacks is None:
             return web.Response(text="")
-        for cf in callbacks:
-            cf(uuid, data)
+        # only build the context when it is actually used
+        context = None
+        if len(self.__hooks) > 0:
+            context = {'endpoint': request.path.strip('/'), 'method': request.method, 'uuid': uuid, 'data': data,
+                       'start': time.perf_counter()}
+            run_hooks(self.__hooks, HookEvent.BEFORE_DISPATCH, context)
+        error = None
+        try:
+            for cf in callbacks:
+                result = cf(uuid, data)
+                # coroutine callbacks run directly on the event loop of the webhook
+                if asyncio.iscoroutine(result):
+                    await result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            # a span started before the dispatch has to be closed even if a callback failed
+            if context is not None:
+                context['duration'] = time.perf_counter() - context['start']
+                context['error'] = error
+                run_hooks(self.__hooks, HookEvent.AFTER_DISPATCH, context)
         return web.Response(text="")
     # ==================================================================================================================
     # SUBSCRIPTION HELPER
     # ==================================================================================================================
 
-    __unsubscribe_all_helper = {}
-
     def unsubscribe_all(self,
                         twitch: Twitch) -> bool:
         """Unsubscribe from all Webhooks that use the callback URL set in `callback_url`\n
@@ -331,6 +894,7 @@ class TwitchWebHook:
         :rtype: bool
         :returns: True if all webhooks could be unsubscribed, otherwise False.
         """
+        self.__check_wait_allowed()
         self.__unsubscribe_all_helper = {}
         data = twitch.get_webhook_subscriptions()
         sub_responses = []
@@ -359,13 +923,28 @@ class TwitchWebHook:
         if url is None:
             raise Exception(f'no subscription found for UUID {str(uuid)}')
         logging.info('renewing webhook ' + str(uuid))
-        return self._subscribe(url.get('callback_path'), url.get('url'))
+        success = self._subscribe(url.get('callback_path'), url.get('url'))
+        if success:
+            url['expires_at'] = time.time() + self.subscribe_least_seconds
+            self.subscription_store.save(uuid, url)
+            self.__queue_renewal(uuid)
+        return success
 
     def unsubscribe(self,
                     uuid: UUID) -> bool:
+        """Unsubscribe from a topic and remove it from :attr:`subscription_store`
+
+        :param uuid: UUID of the subscription
+        :rtype: bool
+        :returns: True if the unsubscribe worked
+        """
+        return self.__unsubscribe(uuid, True)
+
+    def __unsubscribe(self, uuid: UUID, forget: bool) -> bool:
         url = self.__active_webhooks.get(uuid)
         if url is None:
             raise Exception(f'no subscription found for UUID {str(uuid)}')
+        self.__check_wait_allowed()
         success = self._generic_unsubscribe(url.get('callback_path'), url.get('url'))
         if success:
             self.__callbacks.pop(uuid, None)
@@ -378,9 +957,186 @@ class TwitchWebHook:
                 else:
                     # unsubscribe failed!
                     return False
+            if forget:
+                self.subscription_store.delete(uuid)
+        return success
 
+    def restore_subscriptions(self,
+                              twitch: Twitch,
+                              callback_resolver: Callable[[str], Union[Callable[[UUID, dict], None], None]]) \
+            -> Tuple[int, int]:
+        """Restores the subscriptions persisted in :attr:`subscription_store` from a previous run.
 
-        return success
+        All persisted subscriptions are reconciled against :meth:`~twitchAPI.twitch.Twitch.get_webhook_subscriptions`.
+        Subscriptions that are still active get reattached without contacting Twitch, only expired or missing
+        subscriptions are created again. Note that this does not wait for the handshake of recreated subscriptions.\n
+        The webhook has to be started before calling this.
+
+        :param ~twitchAPI.twitch.Twitch twitch: App authorized instance of :class:`~twitchAPI.twitch.Twitch`
+        :param callback_resolver: function that returns the callback function for the given topic URL or None
+        :rtype: int, int
+        :returns: the number of reattached and the number of recreated subscriptions
+        """
+        self.__callback_resolver = callback_resolver
+        persisted = self.subscription_store.load()
+        remote = {}
+        cursor = None
+        while True:
+            data = twitch.get_webhook_subscriptions(first=100, after=cursor)
+            for d in data.get('data', []):
+                uuid_str = extract_uuid_str_from_url(d.get('callback'))
+                if uuid_str is not None and d.get('callback').startswith(self.callback_url):
+                    remote[uuid_str] = d
+            cursor = data.get('pagination', {}).get('cursor')
+            if cursor is None or len(data.get('data', [])) == 0:
+                break
+        reattached = 0
+        recreated = 0
+        # renew subscriptions that would run out within the next minute right away
+        valid_until = time.time() + 60
+        for uuid_str, sub in persisted.items():
+            uuid = UUID(uuid_str)
+            if uuid in self.__active_webhooks.keys():
+                continue
+            remote_sub = remote.get(uuid_str)
+            expires_at = None
+            if remote_sub is not None and remote_sub.get('topic') == sub.get('url'):
+                expires_at = du_parser.isoparse(remote_sub.get('expires_at')).timestamp()
+            if expires_at is not None and expires_at > valid_until:
+                reattached += 1
+            elif not self.__owns_subscription(uuid):
+                # the owning node will recreate it
+                expires_at = sub.get('expires_at')
+                reattached += 1
+            elif self._subscribe(sub.get('callback_path'), sub.get('url')):
+                expires_at = time.time() + self.subscribe_least_seconds
+                recreated += 1
+            else:
+                logging.error(f'could not recreate subscription {uuid_str} for topic {sub.get("url")}')
+                continue
+            callback_func = callback_resolver(sub.get('url'))
+            self.__add_callable(uuid, callback_func)
+            self.__active_webhooks[uuid] = {
+                'url': sub.get('url'),
+                'callback': callback_func,
+                'callback_path': sub.get('callback_path'),
+                'confirmed_subscribe': True,
+                'confirmed_unsubscribe': False,
+                'active': True,
+                'expires_at': expires_at,
+                'renew_at': None
+            }
+            self.subscription_store.save(uuid, self.__active_webhooks[uuid])
+            self.__queue_renewal(uuid)
+        return reattached, recreated
+
+    # ==================================================================================================================
+    # HOOKS
+    # ==================================================================================================================
+
+    def register_hook(self, event: HookEvent, hook: Callable[[dict], None]) -> None:
+        """Registers a function that gets called at the given point of the handling of every notification.
+
+        The hook is called with a context dict that contains :code:`endpoint` (the topic path, e.g.
+        :code:`users/follows`), :code:`method`, :code:`uuid`, :code:`data` and :code:`start`
+        (:func:`time.perf_counter` at the start of the dispatch).
+        :const:`~twitchAPI.types.HookEvent.AFTER_DISPATCH` also gets the :code:`duration` in seconds and the
+        :code:`error` raised by a callback or None. It is called even if a callback raised.
+        The same dict is passed to all hooks of a single notification, so a tracer can store its span in it.
+
+        Exceptions raised by hooks are logged and ignored.
+
+        :param ~twitchAPI.types.HookEvent event: either :const:`~twitchAPI.types.HookEvent.BEFORE_DISPATCH` or
+                    :const:`~twitchAPI.types.HookEvent.AFTER_DISPATCH`
+        :param hook: the function to call
+        :rtype: None
+        :raises ValueError: if the event is not a webhook event
+        """
+        if event not in (HookEvent.BEFORE_DISPATCH, HookEvent.AFTER_DISPATCH):
+            raise ValueError(f'{event} is only available for Twitch')
+        self.__hooks.setdefault(event, []).append(hook)
+
+    def remove_hook(self, event: HookEvent, hook: Callable[[dict], None]) -> None:
+        """Removes a hook registered with :meth:`register_hook`
+
+        :param ~twitchAPI.types.HookEvent event: the lifecycle event
+        :param hook: the registered function
+        :rtype: None
+        :raises ValueError: if the hook is not registered for this event
+        """
+        self.__hooks.get(event, []).remove(hook)
+        if len(self.__hooks[event]) == 0:
+            self.__hooks.pop(event)
+
+    # ==================================================================================================================
+    # EVENT STREAMS
+    # ==================================================================================================================
+
+    def event_queue(self,
+                    topic: Union[str, None] = None,
+                    uuid: Union[UUID, None] = None,
+                    max_size: int = 1000,
+                    policy: EventQueuePolicy = EventQueuePolicy.BLOCK,
+                    threadsafe: bool = False) -> Union['asyncio.Queue', 'queue.Queue']:
+        """Returns a queue that receives all webhook events matching the given filters as
+        :class:`~twitchAPI.webhook.WebhookEvent`.\n
+        If threadsafe is False, this has to be called from within the event loop that will consume the queue.
+
+        :param str topic: only receive events of this topic, given as its webhook path, e.g. :code:`'/streams'`
+                    |default| :code:`None`
+        :param ~uuid.UUID uuid: only receive events of this subscription |default| :code:`None`
+        :param int max_size: max amount of events held in the queue, 0 for unlimited |default| :code:`1000`
+        :param ~twitchAPI.types.EventQueuePolicy policy: what to do with new events when the queue is full
+                    |default| :const:`~twitchAPI.types.EventQueuePolicy.BLOCK`
+        :param bool threadsafe: if True, return a :class:`queue.Queue` instead of a :class:`asyncio.Queue`
+                    |default| :code:`False`
+        :rtype: ~asyncio.Queue or ~queue.Queue
+        :raises RuntimeError: if threadsafe is False and there is no running event loop
+        """
+        subscriber = _EventSubscriber(topic, uuid, max_size, policy, threadsafe)
+        subscriber.on_drop = self.__record_drop
+        self.__event_subscribers.append(subscriber)
+        return subscriber.queue
+
+    def remove_event_queue(self, event_queue: Union['asyncio.Queue', 'queue.Queue']) -> None:
+        """Stops putting events into a queue returned by :meth:`event_queue`
+
+        :param event_queue: the queue
+        :rtype: None
+        """
+        self.__event_subscribers = [s for s in self.__event_subscribers if s.queue is not event_queue]
+
+    def get_dropped_event_count(self, event_queue: Union['asyncio.Queue', 'queue.Queue']) -> int:
+        """Returns how many events where dropped because the given queue was full
+
+        :param event_queue: a queue returned by :meth:`event_queue`
+        :rtype: int
+        """
+        for subscriber in self.__event_subscribers:
+            if subscriber.queue is event_queue:
+                return subscriber.dropped
+        return 0
+
+    def events(self,
+               topic: Union[str, None] = None,
+               uuid: Union[UUID, None] = None,
+               max_size: int = 1000,
+               policy: EventQueuePolicy = EventQueuePolicy.BLOCK) -> '_EventStream':
+        """Async iterator over all webhook events matching the given filters.\n
+        Events are buffered from the moment this is called, not from the start of the iteration. Has to be called from
+        within the event loop that will consume the events. Call :code:`aclose()` on the returned iterator or use it as
+        :code:`async with` context manager to stop receiving events.
+
+        :param str topic: only yield events of this topic, given as its webhook path, e.g. :code:`'/streams'`
+                    |default| :code:`None`
+        :param ~uuid.UUID uuid: only yield events of this subscription |default| :code:`None`
+        :param int max_size: max amount of events buffered, 0 for unlimited |default| :code:`1000`
+        :param ~twitchAPI.types.EventQueuePolicy policy: what to do with new events when the buffer is full
+                    |default| :const:`~twitchAPI.types.EventQueuePolicy.BLOCK`
+        :rtype: AsyncIterator[~twitchAPI.webhook.WebhookEvent]
+        :raises RuntimeError: if there is no running event loop
+        """
+        return _EventStream(self, self.event_queue(topic, uuid, max_size, policy))
 
     # ==================================================================================================================
     # SUBSCRIPTIONS
@@ -555,52 +1311,22 @@ class TwitchWebHook:
     async def __handle_default(self, request: 'web.Request'):
         return web.Response(text="pyTwitchAPI webhook")
 
-    async def __handle_stream_changed(self, request: 'web.Request'):
-        d = await get_json(request)
-        data = None
-        if d is not None:
-            if len(d['data']) > 0:
-                data = d['data'][0]
-                data = make_fields_datetime(data, ['started_at'])
-            else:
-                data = {
-                    'type': 'offline'
-                }
-        return self._generic_handle_callback(request, data)
-
-    async def __handle_user_follows(self, request: 'web.Request'):
-        data = await get_json(request)
-        if data is not None:
-            data = data['data'][0]
-            data = make_fields_datetime(data, ['followed_at'])
-        return self._generic_handle_callback(request, data)
-
-    async def __handle_user_changed(self, request: 'web.Request'):
-        data = await get_json(request)
-        if data is not None:
-            data = data['data'][0]
-        return self._generic_handle_callback(request, data)
-
-    async def __handle_extension_transaction_created(self, request: 'web.Request'):
-        d = await get_json(request)
-        data = d
-        if data is not None:
-            data = data['data'][0]
-            data = make_fields_datetime(data, ['timestamp'])
-        return self._generic_handle_callback(request, data)
-
     async def __handle_challenge(self, request: 'web.Request'):
         challenge = request.rel_url.query.get('hub.challenge')
         if challenge is not None:
             # found challenge, lets answer it
             if request.rel_url.query.get('hub.mode') == 'subscribe':
                 # we treat this as active as soon as we answer the challenge
-                self.__active_webhooks.get(UUID(request.rel_url.query.get('uuid')))['active'] = True
-                self.__active_webhooks.get(UUID(request.rel_url.query.get('uuid')))['confirmed_subscribe'] = True
+                entry = self.__active_webhooks.get(UUID(request.rel_url.query.get('uuid')))
+                # might be unknown when an other worker made this subscription
+                if entry is not None:
+                    entry['active'] = True
+                    entry['confirmed_subscribe'] = True
             if request.rel_url.query.get('hub.mode') == 'unsubscribe':
                 uuid_str = request.rel_url.query.get('uuid')
                 if uuid_str in self.__unsubscribe_all_helper.keys():
                     self.__unsubscribe_all_helper[uuid_str] = True
+                    self.subscription_store.delete(UUID(uuid_str))
                 if UUID(uuid_str) in self.__active_webhooks.keys():
                     # we treat this as invalid as soon as we answer the challenge
                     if self.wait_for_subscription_confirm:
@@ -611,34 +1337,42 @@ class TwitchWebHook:
             return web.Response(text=challenge)
         return web.Response(status=500)
 
-    async def __handle_moderator_change_events(self, request: 'web.Request'):
-        data = await get_json(request)
-        if data is not None:
-            data = data['data'][0]
-            data = make_fields_datetime(data, ['event_timestamp'])
-            return self._generic_handle_callback(request, data)
-
-    async def __handle_channel_ban_change_events(self, request: 'web.Request'):
-        data = await get_json(request)
-        if data is not None:
-            data = data['data'][0]
-            data = make_fields_datetime(data, ['event_timestamp'])
-        return self._generic_handle_callback(request, data)
-
-    async def __handle_subscription_events(self, request: 'web.Request'):
-        data = await get_json(request)
-        if data is not None:
-            data = data['data'][0]
-            data = make_fields_datetime(data, 'event_timestamp')
-        return self._generic_handle_callback(request, data)
-
-    async def __handle_hypetrain_events(self, request: 'web.Request'):
-        data = await get_json(request)
-        if data is not None:
-            data = data['data'][0]
-            data = make_fields_datetime(data, ['event_timestamp',
-                                               'cooldown_end_time',
-                                               'expires_at',
-                                               'started_at'])
-            data = fields_to_enum(data, ['type'], HypeTrainContributionMethod, HypeTrainContributionMethod.UNKNOWN)
-        return self._generic_handle_callback(request, data)
+    # ==================================================================================================================
+    # NOTIFICATION TRANSFORMS
+    # ==================================================================================================================
+
+    @staticmethod
+    def __transform_stream_changed(d: dict):
+        if len(d['data']) > 0:
+            return make_fields_datetime(d['data'][0], ['started_at'])
+        return {
+            'type': 'offline'
+        }
+
+    @staticmethod
+    def __transform_user_follows(d: dict):
+        return make_fields_datetime(d['data'][0], ['followed_at'])
+
+    @staticmethod
+    def __transform_user_changed(d: dict):
+        return d['data'][0]
+
+    @staticmethod
+    def __transform_extension_transaction_created(d: dict):
+        return make_fields_datetime(d['data'][0], ['timestamp'])
+
+    @staticmethod
+    def __transform_moderation_events(d: dict):
+        return make_fields_datetime(d['data'][0], ['event_timestamp'])
+
+    @staticmethod
+    def __transform_subscription_events(d: dict):
+        return make_fields_datetime(d['data'][0], 'event_timestamp')
+
+    @staticmethod
+    def __transform_hypetrain_events(d: dict):
+        data = make_fields_datetime(d['data'][0], ['event_timestamp',
+                                                   'cooldown_end_time',
+                                                   'expires_at',
+                                                   'started_at'])
+        return fields_to_enum(data, ['type'], HypeTrainContributionMethod, HypeTrainContributionMethod.UNKNOWN)